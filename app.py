@@ -1,5 +1,6 @@
-from flask import Flask, render_template, request, redirect, url_for
+from flask import Flask, jsonify, render_template, request, redirect, url_for
 from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
 from dotenv import load_dotenv
 import os
 
@@ -16,7 +17,21 @@ PORT = os.getenv("DB_PORT")
 DB_NAME = os.getenv("DB_NAME")
 
 db_string = f"postgresql://{USER}:{PASSWORD}@{HOST}:{PORT}/{DB_NAME}"
-engine = create_engine(db_string)
+
+# Same pool settings as the Django site (see caregiver_site/settings.py).
+# Behind PgBouncer in transaction mode, PgBouncer does the pooling.
+POOL_MODE = os.getenv("DATABASE_POOL_MODE", "persistent")
+if POOL_MODE == "pgbouncer":
+    engine = create_engine(db_string, poolclass=NullPool)
+else:
+    engine = create_engine(
+        db_string,
+        pool_size=int(os.getenv("DATABASE_POOL_SIZE", "5")),
+        max_overflow=int(os.getenv("DATABASE_POOL_MAX_OVERFLOW", "10")),
+        pool_timeout=float(os.getenv("DATABASE_POOL_TIMEOUT", "10")),
+        pool_recycle=int(os.getenv("DATABASE_POOL_RECYCLE", "1800")),
+        pool_pre_ping=os.getenv("DATABASE_POOL_PRE_PING", "True").lower() == "true",
+    )
 
 @app.route('/')
 def index():
@@ -62,5 +77,19 @@ def delete_user(id):
         conn.commit()
     return redirect(url_for('users'))
 
+# --- METRICS: Connection pool usage of this process ---
+@app.route('/metrics/pool')
+def pool_metrics():
+    pool = engine.pool
+    if POOL_MODE == "pgbouncer":
+        return jsonify({"mode": POOL_MODE})
+    return jsonify({
+        "mode": POOL_MODE,
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(0, pool.overflow()),
+    })
+
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,416 @@
+"""
+Load test for the hot Django views.
+
+Logs in as generated caregivers and members (`manage.py generate_data`),
+drives a mixed read/write workload against a running server at the given
+concurrency and reports requests/sec and p50/p95/p99 latency per endpoint.
+Results are written as JSON, tagged with the git commit, so runs can be
+compared across commits with --compare.
+
+    python manage.py generate_data --users 100000 --defer-indexes
+    python benchmarks/load_test.py --start-server --concurrency 32 --duration 60
+    python benchmarks/load_test.py --base-url http://127.0.0.1:8000 --compare benchmarks/results/<old>.json
+
+To compare the WSGI and ASGI deployments (Procfile and Procfile.asgi), run
+the same workload against each, optionally with clients that hold a
+connection open while trickling in their request:
+
+    python benchmarks/load_test.py --start-server --server wsgi --slow-clients 16 --output wsgi.json
+    python benchmarks/load_test.py --start-server --server asgi --slow-clients 16 --compare wsgi.json
+
+Only the standard library is used on the client side. The client shares the
+GIL across its threads, so keep an eye on its CPU: if it is saturated, the
+numbers measure the client, not the server.
+"""
+import argparse
+import html
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from http.cookiejar import CookieJar
+from pathlib import Path
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode, urlsplit
+from urllib.request import HTTPCookieProcessor, HTTPRedirectHandler, Request, build_opener
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "caregiver_site.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+
+from core.synthetic import CAREGIVER_BLURBS, CAREGIVING_TYPES, CITIES, EMAIL_DOMAIN, TABLE_COLUMNS  # noqa: E402
+
+RESULTS_DIR = ROOT / "benchmarks" / "results"
+
+# (action, weight) per role. Writes are apply_job and post_job.
+CAREGIVER_MIX = {"jobs_list": 40, "jobs_list_next_page": 10, "search": 25, "apply_job": 20, "login": 5}
+MEMBER_MIX = {"member_jobs": 45, "search": 35, "post_job": 15, "login": 5}
+CAREGIVER_SHARE = 0.6
+SEARCH_WORDS = sorted({word.lower() for blurbs in CAREGIVER_BLURBS.values() for blurb in blurbs for word in blurb.split()})
+NEXT_PAGE_RE = re.compile(r'href="(\?[^"]*cursor=[^"]+)"')
+# The app served by --start-server: the Procfile and Procfile.asgi commands.
+SERVERS = {
+    "wsgi": ["caregiver_site.wsgi:application"],
+    "asgi": ["caregiver_site.asgi:application", "--worker-class", "uvicorn_worker.UvicornWorker"],
+}
+
+
+class _NoRedirect(HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class Client:
+    """One browser session: its own cookies, no redirect following."""
+
+    def __init__(self, base_url, timeout):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.cookies = CookieJar()
+        self.opener = build_opener(HTTPCookieProcessor(self.cookies), _NoRedirect)
+
+    def request(self, method, path, data=None):
+        """
+        Return (status, body, seconds). Connection failures are status 0.
+        """
+        headers = {}
+        body = None
+        if data is not None:
+            body = urlencode(data, doseq=True).encode()
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+            headers["X-CSRFToken"] = self.csrf_token()
+        started = time.perf_counter()
+        try:
+            with self.opener.open(Request(self.base_url + path, body, headers, method=method), timeout=self.timeout) as response:
+                status, content = response.status, response.read()
+        except HTTPError as error:
+            status, content = error.code, error.read()
+        except (URLError, OSError):
+            status, content = 0, b""
+        return status, content.decode("utf-8", "replace"), time.perf_counter() - started
+
+    def csrf_token(self):
+        return next((cookie.value for cookie in self.cookies if cookie.name == "csrftoken"), "")
+
+
+class VirtualUser(threading.Thread):
+    def __init__(self, n, role, email, args, samples, start_at, measure_from, stop_at):
+        super().__init__(name=f"vu-{n}", daemon=True)
+        self.role = role
+        self.email = email
+        self.args = args
+        self.samples = samples
+        self.start_at = start_at
+        self.measure_from = measure_from
+        self.stop_at = stop_at
+        self.random = random.Random(args.seed + n)
+        self.client = Client(args.base_url, args.timeout)
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.next_jobs_page = None
+
+    def run(self):
+        mix = CAREGIVER_MIX if self.role == "caregiver" else MEMBER_MIX
+        actions, weights = list(mix), list(mix.values())
+        while time.monotonic() < self.start_at:
+            time.sleep(0.01)
+        self.client.request("GET", "/login/")  # sets the CSRF cookie
+        status, seconds = self.login()
+        if status != 302:
+            self.errors["login"] += 1
+            return
+        while (now := time.monotonic()) < self.stop_at:
+            action = self.random.choices(actions, weights)[0]
+            status, seconds = getattr(self, action)()
+            if now >= self.measure_from:
+                self.record(action, status, seconds)
+            if self.args.think_ms:
+                time.sleep(self.random.uniform(0, 2 * self.args.think_ms) / 1000)
+
+    def record(self, action, status, seconds):
+        # Redirects are the normal answer to every POST here.
+        if 200 <= status < 400:
+            self.latencies[action].append(seconds)
+        else:
+            self.errors[action] += 1
+
+    def get(self, path, expect_next_page=False):
+        status, body, seconds = self.client.request("GET", path)
+        if expect_next_page:
+            match = NEXT_PAGE_RE.search(body)
+            self.next_jobs_page = html.unescape(match.group(1)) if match else None
+        return status, seconds
+
+    def post(self, path, data):
+        status, _, seconds = self.client.request("POST", path, data)
+        return status, seconds
+
+    def login(self):
+        return self.post("/login/", {"username": self.email, "password": self.args.password})
+
+    def jobs_list(self):
+        query = ""
+        if self.random.random() < 0.3:
+            query = "?" + urlencode({"caregiving_type": self.random.choice(list(CAREGIVING_TYPES))})
+        return self.get(f"/jobs/{query}", expect_next_page=True)
+
+    def jobs_list_next_page(self):
+        if not self.next_jobs_page:
+            return self.jobs_list()
+        return self.get(f"/jobs/{self.next_jobs_page}", expect_next_page=True)
+
+    def search(self):
+        params = {}
+        if self.random.random() < 0.6:
+            params["caregiving_type"] = self.random.choice(list(CAREGIVING_TYPES))
+        if self.random.random() < 0.5:
+            params["city"] = self.random.choice(list(CITIES))
+        if self.random.random() < 0.4:
+            params["q"] = self.random.choice(SEARCH_WORDS)
+        return self.get("/search/?" + urlencode(params))
+
+    def apply_job(self):
+        return self.post(f"/jobs/{self.random.choice(self.samples['job_ids'])}/apply/", {})
+
+    def member_jobs(self):
+        return self.get("/member/jobs/")
+
+    def post_job(self):
+        return self.post(
+            "/member/jobs/",
+            {
+                "required_caregiving_type": self.random.choice(list(CAREGIVING_TYPES)),
+                "other_requirements": "Posted by the load test",
+            },
+        )
+
+
+class SlowClient(threading.Thread):
+    """
+    A client on a bad link: keeps a connection open by sending its request
+    headers one line per --slow-interval, reconnecting when the server gives up.
+    """
+
+    def __init__(self, n, args, stop_at):
+        super().__init__(name=f"slow-{n}", daemon=True)
+        self.address = (urlsplit(args.base_url).hostname, urlsplit(args.base_url).port or 80)
+        self.interval = args.slow_interval
+        self.stop_at = stop_at
+
+    def run(self):
+        while time.monotonic() < self.stop_at:
+            try:
+                with socket.create_connection(self.address, timeout=5) as sock:
+                    sock.sendall(f"GET /login/ HTTP/1.1\r\nHost: {self.address[0]}\r\n".encode())
+                    while time.monotonic() < self.stop_at:
+                        time.sleep(self.interval)
+                        sock.sendall(b"X-Slow: 1\r\n")
+            except OSError:
+                time.sleep(0.1)
+
+
+def load_samples(limit):
+    """
+    Generated accounts per role and a random sample of job ids to apply to.
+    """
+    pattern = f"%@{EMAIL_DOMAIN}"
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT u.email FROM users u JOIN caregivers c ON c.caregiver_user_id = u.user_id "
+            "WHERE u.email LIKE %s ORDER BY random() LIMIT %s",
+            [pattern, limit],
+        )
+        caregivers = [row[0] for row in cursor.fetchall()]
+        cursor.execute(
+            "SELECT u.email FROM users u JOIN members m ON m.member_user_id = u.user_id "
+            "WHERE u.email LIKE %s ORDER BY random() LIMIT %s",
+            [pattern, limit],
+        )
+        members = [row[0] for row in cursor.fetchall()]
+        cursor.execute("SELECT job_id FROM jobs ORDER BY random() LIMIT 5000")
+        job_ids = [row[0] for row in cursor.fetchall()]
+        cursor.execute(
+            "SELECT relname, reltuples::bigint FROM pg_class WHERE relname = ANY(%s) AND relkind = 'r'",
+            [list(TABLE_COLUMNS)],
+        )
+        dataset = dict(cursor.fetchall())
+    connection.close()
+    if not caregivers or not members or not job_ids:
+        sys.exit("No generated caregivers, members or jobs found; run `manage.py generate_data` first.")
+    return {"caregivers": caregivers, "members": members, "job_ids": job_ids, "dataset": dataset}
+
+
+def start_server(args):
+    command = [
+        "gunicorn", *SERVERS[args.server],
+        "--bind", args.base_url.split("://", 1)[-1].rstrip("/"),
+        "--workers", str(args.server_workers),
+        "--log-level", "warning",
+    ]
+    server = subprocess.Popen(command, cwd=ROOT)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if Client(args.base_url, args.timeout).request("GET", "/login/")[0] == 200:
+            return server
+        time.sleep(0.2)
+    server.terminate()
+    sys.exit(f"Server did not come up: {' '.join(command)}")
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies, errors, seconds):
+    values = sorted(latencies)
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "rps": round(len(values) / seconds, 2),
+        **{
+            f"{name}_ms": None if percentile(values, pct) is None else round(percentile(values, pct) * 1000, 2)
+            for name, pct in [("p50", 50), ("p95", 95), ("p99", 99), ("max", 100)]
+        },
+    }
+
+
+def report(users, measured_seconds):
+    latencies, errors = defaultdict(list), defaultdict(int)
+    for user in users:
+        for action, values in user.latencies.items():
+            latencies[action].extend(values)
+        for action, count in user.errors.items():
+            errors[action] += count
+    endpoints = {
+        action: summarize(latencies[action], errors[action], measured_seconds)
+        for action in sorted(set(latencies) | set(errors))
+    }
+    total = summarize(
+        [value for values in latencies.values() for value in values], sum(errors.values()), measured_seconds
+    )
+    return endpoints, total
+
+
+def print_table(endpoints, total, baseline=None):
+    old_rows = {**baseline["endpoints"], "total": baseline["total"]} if baseline else {}
+    print(f"{'endpoint':<22} {'reqs':>7} {'errors':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for name, row in [*endpoints.items(), ("total", total)]:
+        timings = " ".join(
+            f"{row[key]:>8.1f}" if row[key] is not None else f"{'-':>8}"
+            for key in ("p50_ms", "p95_ms", "p99_ms", "max_ms")
+        )
+        line = f"{name:<22} {row['requests']:>7} {row['errors']:>6} {row['rps']:>8.1f} {timings}"
+        old = old_rows.get(name)
+        if old and old["p95_ms"] and row["p95_ms"]:
+            line += f"   p95 {_delta(row['p95_ms'], old['p95_ms'])}, req/s {_delta(row['rps'], old['rps'])}"
+        print(line)
+
+
+def _delta(new, old):
+    return f"{(new - old) / old * 100:+.0f}%" if old else "n/a"
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--start-server", action="store_true", help="run gunicorn on --base-url for the test")
+    parser.add_argument("--server-workers", type=int, default=4, help="gunicorn workers with --start-server")
+    parser.add_argument("--server", choices=sorted(SERVERS), default="wsgi", help="app to run with --start-server")
+    parser.add_argument("--slow-clients", type=int, default=0, help="extra connections that trickle in their request")
+    parser.add_argument("--slow-interval", type=float, default=1, help="seconds between a slow client's header lines")
+    parser.add_argument("--concurrency", type=int, default=16, help="simultaneous virtual users")
+    parser.add_argument("--duration", type=float, default=30, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="seconds of traffic before measuring")
+    parser.add_argument("--think-ms", type=float, default=0, help="mean pause between a user's requests")
+    parser.add_argument("--timeout", type=float, default=30, help="per-request timeout in seconds")
+    parser.add_argument("--password", default="synthetic", help="password of the generated users")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="results file (default: benchmarks/results/<commit>-<time>.json)")
+    parser.add_argument("--compare", type=Path, help="earlier results file to show deltas against")
+    args = parser.parse_args()
+
+    samples = load_samples(args.concurrency)
+    server = start_server(args) if args.start_server else None
+    try:
+        rnd = random.Random(args.seed)
+        start_at = time.monotonic() + 0.5
+        measure_from = start_at + args.warmup
+        stop_at = measure_from + args.duration
+        users = []
+        for n in range(args.concurrency):
+            role = "caregiver" if rnd.random() < CAREGIVER_SHARE else "member"
+            accounts = samples["caregivers" if role == "caregiver" else "members"]
+            users.append(VirtualUser(n, role, accounts[n % len(accounts)], args, samples, start_at, measure_from, stop_at))
+        for user in [*users, *(SlowClient(n, args, stop_at) for n in range(args.slow_clients))]:
+            user.start()
+        for user in users:
+            user.join()
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    endpoints, total = report(users, args.duration)
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+    print(
+        f"{args.concurrency} users (+{args.slow_clients} slow) for {args.duration:.0f}s against {args.base_url} "
+        f"({samples['dataset'].get('users', 0)} users, {samples['dataset'].get('jobs', 0)} jobs)"
+    )
+    print_table(endpoints, total, baseline)
+
+    commit = git_commit()
+    started = datetime.now(timezone.utc)
+    output = args.output or RESULTS_DIR / f"{commit}-{started:%Y%m%dT%H%M%SZ}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(
+        json.dumps(
+            {
+                "commit": commit,
+                "timestamp": started.isoformat(),
+                "base_url": args.base_url,
+                "concurrency": args.concurrency,
+                "duration": args.duration,
+                "warmup": args.warmup,
+                "think_ms": args.think_ms,
+                "server": args.server if args.start_server else None,
+                "server_workers": args.server_workers if args.start_server else None,
+                "slow_clients": args.slow_clients,
+                "dataset": samples["dataset"],
+                "endpoints": endpoints,
+                "total": total,
+            },
+            indent=2,
+        )
+    )
+    print(f"results written to {output}")
+    if total["errors"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Login throughput benchmark for core.auth_backends.AppUserBackend.
+
+Creates synthetic users, then authenticates them repeatedly with the current
+backend and with the previous implementation (kept below for comparison),
+reporting logins/sec and hash computations per login.
+
+    python benchmarks/login_bench.py --users 20 --logins 200
+    python benchmarks/login_bench.py --cleanup
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "caregiver_site.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.contrib.auth import hashers  # noqa: E402
+from django.contrib.auth.backends import BaseBackend  # noqa: E402
+from django.contrib.auth.hashers import check_password, make_password  # noqa: E402
+
+from core.auth_backends import AppUserBackend  # noqa: E402
+from core.models import AppUser  # noqa: E402
+
+PASSWORD = "bench-password"
+EMAIL_DOMAIN = "@bench.invalid"
+
+
+class LegacyAppUserBackend(BaseBackend):
+    """The backend as it was before single-hash logins, for comparison."""
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        try:
+            app_user = AppUser.objects.get(email=username)
+        except AppUser.DoesNotExist:
+            return None
+        stored_pw = app_user.password or ""
+        is_hashed = stored_pw.startswith(("pbkdf2_", "argon2", "bcrypt", "scrypt"))
+        valid = check_password(password, stored_pw) if is_hashed else stored_pw == password
+        if not valid:
+            return None
+        User = get_user_model()
+        user, created = User.objects.get_or_create(
+            username=app_user.email,
+            defaults={"email": app_user.email, "first_name": app_user.given_name, "last_name": app_user.surname},
+        )
+        needs_pw_update = not check_password(password, user.password)
+        if created or needs_pw_update:
+            user.password = make_password(password)
+            user.save()
+        if not is_hashed:
+            app_user.password = user.password
+            app_user.save(update_fields=["password"])
+        return user
+
+
+class HashCounter:
+    """Counts calls to the configured password hasher's encode()."""
+
+    def __init__(self):
+        self.calls = 0
+        self.hasher = hashers.get_hasher()
+        self.original = type(self.hasher).encode
+
+    def __enter__(self):
+        counter = self
+
+        def counting_encode(hasher, *args, **kwargs):
+            counter.calls += 1
+            return counter.original(hasher, *args, **kwargs)
+
+        type(self.hasher).encode = counting_encode
+        return self
+
+    def __exit__(self, *exc):
+        type(self.hasher).encode = self.original
+
+
+def seed(count):
+    hashed = make_password(PASSWORD)
+    emails = [f"login{n}{EMAIL_DOMAIN}" for n in range(count)]
+    for email in emails:
+        AppUser.objects.update_or_create(
+            email=email,
+            defaults={"given_name": "Bench", "surname": "Login", "city": "Astana", "password": hashed},
+        )
+        get_user_model().objects.update_or_create(username=email, defaults={"email": email, "password": hashed})
+    return emails
+
+
+def cleanup():
+    AppUser.objects.filter(email__endswith=EMAIL_DOMAIN).delete()
+    get_user_model().objects.filter(username__endswith=EMAIL_DOMAIN).delete()
+
+
+def run(backend, emails, logins):
+    with HashCounter() as counter:
+        started = time.perf_counter()
+        for n in range(logins):
+            assert backend.authenticate(None, username=emails[n % len(emails)], password=PASSWORD)
+        elapsed = time.perf_counter() - started
+    return logins / elapsed, counter.calls / logins
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--cleanup", action="store_true", help="remove synthetic users and exit")
+    args = parser.parse_args()
+
+    if args.cleanup:
+        cleanup()
+        return
+    emails = seed(args.users)
+    print(f"hasher: {hashers.get_hasher().algorithm}, {args.logins} logins over {args.users} users")
+    for name, backend in [("legacy", LegacyAppUserBackend()), ("current", AppUserBackend())]:
+        rate, hashes = run(backend, emails, args.logins)
+        print(f"{name:<8} {rate:8.1f} logins/sec  {hashes:.2f} hashes/login")
+
+
+if __name__ == "__main__":
+    main()
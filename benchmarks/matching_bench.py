@@ -0,0 +1,117 @@
+"""
+Benchmark for caregiver-to-job matching (core.matching).
+
+Builds a MatchingIndex of synthetic caregivers in memory (no database
+needed) and times top-k ranking for jobs in different cities, plus an
+incremental update and a full rebuild, with the rankings timed again while
+the rebuild runs in a background thread as get_index() runs it. By default
+every caregiver has the same caregiving type, so each ranking scores all of
+them:
+
+    python benchmarks/matching_bench.py --caregivers 1000000
+    python benchmarks/matching_bench.py --from-db   # index the configured database instead
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "caregiver_site.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from core.matching import MatchingIndex, build_index  # noqa: E402
+from core.synthetic import CAREGIVING_TYPES, CITIES  # noqa: E402
+
+TARGET_MS = 10.0
+
+
+def synthetic_rows(total, types, seed=0):
+    rnd = random.Random(seed)
+    cities = [city.upper() for city in CITIES]
+    for caregiver_user_id in range(1, total + 1):
+        yield (
+            caregiver_user_id,
+            types[caregiver_user_id % len(types)],
+            rnd.choice(cities),
+            round(rnd.uniform(5, 40), 2),
+            rnd.random() < 0.6,
+            rnd.random() < 0.8,
+            int(rnd.expovariate(0.3)),
+        )
+
+
+def build(args):
+    if args.from_db:
+        return build_index()
+    index = MatchingIndex()
+    index.load(synthetic_rows(args.caregivers, list(CAREGIVING_TYPES)[: args.types]))
+    return index
+
+
+def run(index, repeats, k, title):
+    print(f"{title}, caregivers indexed: {len(index)}")
+    print(f"{'scenario':<34} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}  result")
+    failed = False
+    for kind, partition in index.partitions.items():
+        for city in list(index.city_codes)[:3]:
+            timings = []
+            for _ in range(repeats):
+                started = time.perf_counter()
+                index.top(kind, city, k, applicant_ids=range(1, 200, 7))
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            p50 = statistics.median(timings)
+            p95 = timings[int(0.95 * (len(timings) - 1))]
+            ok = p95 < TARGET_MS
+            failed = failed or not ok
+            name = f"{kind[:16]} / {city[:10]} ({partition.size})"
+            print(f"{name:<34} {p50:8.2f} {p95:8.2f} {timings[-1]:8.2f}  {'ok' if ok else 'SLOW'}")
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--caregivers", type=int, default=1_000_000, help="synthetic caregivers to index")
+    parser.add_argument("--types", type=int, default=1, help="spread them over this many caregiving types")
+    parser.add_argument("--from-db", action="store_true", help="index the caregivers of the configured database")
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("-k", type=int, default=20, help="caregivers returned per job")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    index = build(args)
+    print(f"built in {time.perf_counter() - started:.2f}s")
+
+    updates = [row for _, row in zip(range(1000), synthetic_rows(len(index), list(index.partitions), seed=1))]
+    started = time.perf_counter()
+    index.upsert(updates)
+    print(f"1000 incremental updates in {(time.perf_counter() - started) * 1000:.2f} ms")
+
+    failed = run(index, args.repeats, args.k, "ranking")
+
+    rebuilt = {}
+
+    def rebuild():
+        started = time.perf_counter()
+        build(args)
+        rebuilt["seconds"] = time.perf_counter() - started
+
+    thread = threading.Thread(target=rebuild)
+    thread.start()
+    run(index, args.repeats, args.k, "ranking during a rebuild")
+    thread.join()
+    print(f"rebuilt in {rebuilt['seconds']:.2f}s")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
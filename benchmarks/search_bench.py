@@ -0,0 +1,143 @@
+"""
+Benchmark for caregiver search (core.search.find_caregivers).
+
+Seeds synthetic caregivers into the configured database, then times the
+queries the search page issues. Run against a scratch database, e.g.
+
+    python benchmarks/search_bench.py --seed 1000000
+    python benchmarks/search_bench.py
+    python benchmarks/search_bench.py --cleanup
+
+Synthetic rows use the `@bench.invalid` email domain so they can be removed
+with --cleanup.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "caregiver_site.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+
+from core.search import find_caregivers  # noqa: E402
+
+TARGET_MS = 10.0
+BENCH_EMAIL_PATTERN = "bench%@bench.invalid"
+
+SEED_SQL = """
+WITH new_users AS (
+    INSERT INTO users (email, given_name, surname, city, phone_number, profile_description, password)
+    SELECT
+        'bench' || g || '@bench.invalid',
+        (ARRAY['Aigerim','Daniyar','Alice','Bob','Dana','Erlan','Fiona','Gulnara','Ivan','Madina',
+               'Nurlan','Olga','Ruslan','Saule','Timur','Zarina','Arman','Amina','Kevin','Laura'])[1 + g %% 20],
+        (ARRAY['Smith','Brown','Akhmetov','Ivanova','Nurlanov','Sadykova','Kim','Lee','Petrov','Omarova'])[1 + (g / 20) %% 10],
+        (ARRAY['Astana','Almaty','Shymkent','Karaganda','Aktobe','Taraz','Pavlodar','Oskemen',
+               'Semey','Atyrau','Kostanay','Kyzylorda'])[1 + (g / 7) %% 12],
+        NULL,
+        (ARRAY['Experienced nurse','Loves kids','Patient and kind','Energetic student',
+               'Professional care','Certified babysitter','Good with pets too',
+               'Special needs experience','Part-time helper','Music tutor and sitter'])[1 + g %% 10]
+        || ' ' ||
+        (ARRAY['available weekends','first aid certified','speaks English and Kazakh','non-smoker',
+               'has a driver license','cooks healthy meals','night shifts ok'])[1 + (g / 3) %% 7],
+        'bench'
+    FROM generate_series(%s, %s) AS g
+    RETURNING user_id
+)
+INSERT INTO caregivers (caregiver_user_id, gender, caregiving_type, hourly_rate)
+SELECT
+    user_id,
+    CASE WHEN user_id %% 2 = 0 THEN 'F' ELSE 'M' END,
+    (ARRAY['Babysitter','Elderly Care','Playmate for children'])[1 + user_id %% 3],
+    round((5 + random() * 25)::numeric, 2)
+FROM new_users;
+"""
+
+SCENARIOS = [
+    ("type only", {"caregiving_type": "Babysitter"}),
+    ("city substring", {"city": "stan"}),
+    ("type + city", {"caregiving_type": "Elderly Care", "city": "Almaty"}),
+    ("keywords", {"q": "nurse"}),
+    ("keywords, two terms", {"q": "patient kind"}),
+    ("keywords + type + city", {"q": "certified babysitter", "caregiving_type": "Babysitter", "city": "astana"}),
+    ("rare name", {"q": "Gulnara Omarova"}),
+]
+
+
+def seed(total, batch_size=100_000):
+    with connection.cursor() as cursor:
+        # populate.py seeds explicit ids without advancing the sequence
+        cursor.execute(
+            "SELECT setval(pg_get_serial_sequence('users', 'user_id'), "
+            "(SELECT COALESCE(MAX(user_id), 0) FROM users) + 1, false)"
+        )
+        cursor.execute("SELECT COUNT(*) FROM users WHERE email LIKE %s", [BENCH_EMAIL_PATTERN])
+        start = cursor.fetchone()[0] + 1
+        end = start + total - 1
+        for lo in range(start, end + 1, batch_size):
+            hi = min(lo + batch_size - 1, end)
+            cursor.execute(SEED_SQL, [lo, hi])
+            print(f"seeded caregivers {lo}..{hi}")
+        cursor.execute("ANALYZE users")
+        cursor.execute("ANALYZE caregivers")
+
+
+def cleanup():
+    with connection.cursor() as cursor:
+        cursor.execute("DELETE FROM users WHERE email LIKE %s", [BENCH_EMAIL_PATTERN])
+        print(f"removed {cursor.rowcount} synthetic users")
+
+
+def run(repeats, limit, explain):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) FROM caregivers")
+        print(f"caregivers in table: {cursor.fetchone()[0]}")
+    print(f"{'scenario':<26} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}  result")
+    failed = False
+    for name, params in SCENARIOS:
+        qs = find_caregivers(**params)[:limit]
+        list(qs)  # warm the cache
+        timings = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            list(qs.all())
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        p50 = statistics.median(timings)
+        p95 = timings[int(0.95 * (len(timings) - 1))]
+        ok = p95 < TARGET_MS
+        failed = failed or not ok
+        print(f"{name:<26} {p50:8.2f} {p95:8.2f} {timings[-1]:8.2f}  {'ok' if ok else 'SLOW'}")
+        if explain:
+            print(qs.explain(analyze=True))
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=0, help="insert this many synthetic caregivers first")
+    parser.add_argument("--cleanup", action="store_true", help="remove synthetic caregivers and exit")
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=50, help="rows fetched per query (one results page)")
+    parser.add_argument("--explain", action="store_true", help="print EXPLAIN ANALYZE for each scenario")
+    args = parser.parse_args()
+
+    if args.cleanup:
+        cleanup()
+        return
+    if args.seed:
+        seed(args.seed)
+    sys.exit(1 if run(args.repeats, args.limit, args.explain) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Per-request overhead of sessions and user loading on jobs_list.
+
+Logs one user in and requests jobs_list repeatedly in-process, once per
+session engine / user cache combination, counting the queries each request
+spends on the session, on loading the user and on the view itself.
+
+    python benchmarks/session_bench.py --requests 200
+    python benchmarks/session_bench.py --email someone@synthetic.invalid
+
+The user defaults to the first caregiver, whose listing also shows which jobs
+they applied to.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "caregiver_site.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.cache import cache  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client, override_settings  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from django.urls import reverse  # noqa: E402
+
+from core.models import AppUser, Caregiver  # noqa: E402
+
+# (label, SESSION_ENGINE, USER_CACHE_SECONDS)
+CONFIGURATIONS = [
+    ("db sessions, uncached user", "django.contrib.sessions.backends.db", 0),
+    ("cached_db sessions, uncached user", "django.contrib.sessions.backends.cached_db", 0),
+    ("cached_db sessions, cached user", "django.contrib.sessions.backends.cached_db", 300),
+    ("cache sessions, cached user", "django.contrib.sessions.backends.cache", 300),
+]
+
+
+def classify(sql):
+    if '"django_session"' in sql:
+        return "session"
+    if 'FROM "users"' in sql:
+        return "user"
+    return "view"
+
+
+def run(user, session_engine, user_cache_seconds, requests):
+    counts = {"session": 0, "user": 0, "view": 0}
+    timings = []
+    with override_settings(SESSION_ENGINE=session_engine, USER_CACHE_SECONDS=user_cache_seconds):
+        cache.clear()
+        client = Client(SERVER_NAME="localhost")
+        client.force_login(user, backend="core.auth_backends.AppUserBackend")
+        url = reverse("jobs_list")
+        client.get(url)  # warm up the listing cache
+        for _ in range(requests):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = client.get(url)
+                timings.append((time.perf_counter() - started) * 1000)
+            assert response.status_code == 200, response.status_code
+            for query in captured.captured_queries:
+                counts[classify(query["sql"])] += 1
+    return {kind: count / requests for kind, count in counts.items()}, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--email", help="user to log in as (default: the first caregiver)")
+    args = parser.parse_args()
+
+    if args.email:
+        user = AppUser.objects.get(email=args.email)
+    else:
+        user = Caregiver.objects.order_by("pk").select_related("caregiver_user").first().caregiver_user
+    print(f"jobs_list as {user.email}, {args.requests} requests per configuration; queries per request:")
+    print(f"{'configuration':<36} {'session':>8} {'user':>6} {'view':>6} {'total':>6} {'p50 ms':>8}")
+    for label, session_engine, user_cache_seconds in CONFIGURATIONS:
+        queries, timings = run(user, session_engine, user_cache_seconds, args.requests)
+        print(
+            f"{label:<36} {queries['session']:8.2f} {queries['user']:6.2f} {queries['view']:6.2f} "
+            f"{sum(queries.values()):6.2f} {statistics.median(timings):8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
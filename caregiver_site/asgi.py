@@ -12,5 +12,9 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'caregiver_site.settings')
+# Persistent connections don't carry over between requests under ASGI (each
+# request runs its queries in a fresh thread), so pool them instead; see
+# DATABASE_POOL_MODE in settings.
+os.environ.setdefault('DATABASE_POOL_MODE', 'pool')
 
 application = get_asgi_application()
@@ -37,7 +37,7 @@ CSRF_TRUSTED_ORIGINS = [
 # Application definition
 
 INSTALLED_APPS = [
-    'django.contrib.admin',
+    'core.apps.SiteAdminConfig',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -48,11 +48,14 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'core.middleware.StaticFilesMiddleware',
+    'core.middleware.QueryStatsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.AppIdentityMiddleware',
+    'core.middleware.ReplicaPinMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -80,14 +83,86 @@ WSGI_APPLICATION = 'caregiver_site.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+DATABASE_SSL_REQUIRE = os.getenv("DATABASE_SSL_REQUIRE", "True").lower() == "true"  # Render Postgres uses SSL
+
+# How the site holds server connections (app.py reads the same variables):
+# - "persistent": one connection per worker thread, reused for 10 minutes.
+# - "pool": a pool per worker process (core.pooled_postgresql) of
+#   DATABASE_POOL_SIZE connections plus up to DATABASE_POOL_MAX_OVERFLOW extra
+#   ones under load; a request waits up to DATABASE_POOL_TIMEOUT seconds for
+#   one. Connections are pinged before reuse and replaced after
+#   DATABASE_POOL_RECYCLE seconds. A deployment opens at most
+#   processes * (size + overflow) connections per database.
+# - "pgbouncer": connect to PgBouncer in transaction pooling mode, which does
+#   the pooling. Server-side cursors are disabled since they don't survive
+#   the end of a transaction; the database's timezone must be UTC so Django
+#   never has to SET it on a connection.
+DATABASE_POOL_MODE = os.getenv("DATABASE_POOL_MODE", "persistent")
+DATABASE_POOL = {
+    "SIZE": int(os.getenv("DATABASE_POOL_SIZE", "5")),
+    "MAX_OVERFLOW": int(os.getenv("DATABASE_POOL_MAX_OVERFLOW", "10")),
+    "TIMEOUT": float(os.getenv("DATABASE_POOL_TIMEOUT", "10")),
+    "RECYCLE": int(os.getenv("DATABASE_POOL_RECYCLE", "1800")),
+    "PRE_PING": os.getenv("DATABASE_POOL_PRE_PING", "True").lower() == "true",
+}
+
+
+def database_settings(config):
+    if not config:
+        return config
+    if DATABASE_POOL_MODE == "pool":
+        return {**config, "ENGINE": "core.pooled_postgresql", "CONN_MAX_AGE": 0, "POOL": DATABASE_POOL}
+    config = {**config, "CONN_MAX_AGE": 600, "CONN_HEALTH_CHECKS": True}
+    if DATABASE_POOL_MODE == "pgbouncer":
+        config["DISABLE_SERVER_SIDE_CURSORS"] = True
+    return config
+
+
 DATABASES = {
-    "default": dj_database_url.config(
-        default=os.getenv("DATABASE_URL"),
-        conn_max_age=600,
-        ssl_require=True,  # Render Postgres uses SSL
+    "default": database_settings(
+        dj_database_url.config(default=os.getenv("DATABASE_URL"), ssl_require=DATABASE_SSL_REQUIRE)
     )
 }
 
+# Read replicas, as a comma-separated DATABASE_REPLICA_URLS. Views decorated
+# with core.db_router.replica_reads read from one of them; all other reads,
+# and a client's reads for REPLICA_STICKY_SECONDS after it writes, stay on
+# the primary. Tests read the primary through them (MIRROR).
+DATABASE_REPLICAS = []
+for number, url in enumerate(filter(None, map(str.strip, os.getenv("DATABASE_REPLICA_URLS", "").split(","))), 1):
+    DATABASES[f"replica_{number}"] = {
+        **database_settings(dj_database_url.parse(url, ssl_require=DATABASE_SSL_REQUIRE)),
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(f"replica_{number}")
+DATABASE_ROUTERS = ["core.db_router.ReplicaRouter"]
+REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", "10"))
+
+# Cache: sessions, logged-in users, jobs_list pages and invalidation versions.
+# The default keeps it in each process's memory, which is only right for a
+# single process; with more, point CACHE_BACKEND / CACHE_LOCATION at a shared
+# cache (e.g. django.core.cache.backends.redis.RedisCache, redis://host:6379)
+# so invalidations reach every worker.
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache")
+CACHES = {"default": {"BACKEND": CACHE_BACKEND, "LOCATION": os.getenv("CACHE_LOCATION", "")}}
+if CACHE_BACKEND.endswith(".LocMemCache"):
+    CACHES["default"]["OPTIONS"] = {"MAX_ENTRIES": int(os.getenv("CACHE_MAX_ENTRIES", "100000"))}
+# Whether every worker process sees the same cache; the defaults below only
+# cache sessions and users when it does.
+CACHE_SHARED = not CACHE_BACKEND.endswith((".LocMemCache", ".DummyCache"))
+
+# Where sessions live: "db" (a query per request), "cached_db" (read from the
+# cache, written through to the database) or "cache" (cache only; lost with
+# it). The cached engines need the cache above to be shared between workers,
+# or a worker can keep serving a session another one has logged out, so they
+# are only the default with a shared cache.
+SESSION_STORE = os.getenv("SESSION_STORE", "cached_db" if CACHE_SHARED else "db")
+SESSION_ENGINE = f"django.contrib.sessions.backends.{SESSION_STORE}"
+# The logged-in user and their profiles are loaded from the cache for up to
+# this long (core.identity); changes invalidate them sooner, in every worker
+# only with a shared cache (hence off by default without one). 0 disables it.
+USER_CACHE_SECONDS = int(os.getenv("USER_CACHE_SECONDS", "300" if CACHE_SHARED else "0"))
+
 
 
 # Password validation
@@ -137,6 +212,15 @@ STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Caregiver photo uploads are staged here (outside MEDIA_ROOT, never served)
+# and turned into resized, content-hashed files by core.photos; ones that
+# can't be decoded are moved to its failed/ subdirectory. Set
+# PHOTO_BACKGROUND_WORKER=false to leave processing to `manage.py process_photos`.
+PHOTO_STAGING_ROOT = Path(os.getenv("PHOTO_STAGING_ROOT", BASE_DIR / "upload_staging"))
+PHOTO_BACKGROUND_WORKER = os.getenv("PHOTO_BACKGROUND_WORKER", "True").lower() == "true"
+PHOTO_MAX_SIZE = (800, 800)
+PHOTO_THUMB_SIZE = (200, 200)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -150,3 +234,69 @@ AUTHENTICATION_BACKENDS = [
 LOGIN_URL = "login"
 LOGIN_REDIRECT_URL = "home"
 LOGOUT_REDIRECT_URL = "home"
+
+
+# Pagination
+# Listing pages use keyset pagination; `?page_size=` may override the default
+# up to MAX_PAGE_SIZE.
+JOBS_PAGE_SIZE = int(os.getenv("JOBS_PAGE_SIZE", "50"))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "200"))
+# jobs_list pages are cached for this long (core.listings); writes invalidate
+# them sooner. 0 disables the cache.
+JOBS_CACHE_SECONDS = int(os.getenv("JOBS_CACHE_SECONDS", "300"))
+
+# Upper bound on job_ids accepted by one bulk-apply request.
+BULK_APPLY_MAX_JOBS = int(os.getenv("BULK_APPLY_MAX_JOBS", "200"))
+
+# Caregiver search ranks at most this many keyword matches per query, and
+# counts results exactly up to SEARCH_EXACT_COUNT_LIMIT (planner estimate above).
+SEARCH_PAGE_SIZE = int(os.getenv("SEARCH_PAGE_SIZE", "20"))
+SEARCH_RANK_CANDIDATES = int(os.getenv("SEARCH_RANK_CANDIDATES", "500"))
+SEARCH_EXACT_COUNT_LIMIT = int(os.getenv("SEARCH_EXACT_COUNT_LIMIT", "1000"))
+
+# NDJSON exports from /api/ (core.api) fetch and send this many rows at a time.
+API_CHUNK_SIZE = int(os.getenv("API_CHUNK_SIZE", "2000"))
+
+# CSV exports (core.exports): the endpoint streams COPY output in chunks of
+# EXPORT_CHUNK_BYTES, with at most EXPORT_QUEUE_CHUNKS of them buffered.
+# Gzip level 1 keeps compression from becoming the bottleneck.
+EXPORT_CHUNK_BYTES = int(os.getenv("EXPORT_CHUNK_BYTES", str(256 * 1024)))
+EXPORT_QUEUE_CHUNKS = int(os.getenv("EXPORT_QUEUE_CHUNKS", "8"))
+EXPORT_GZIP_LEVEL = int(os.getenv("EXPORT_GZIP_LEVEL", "1"))
+
+# Caregiver matching (core.matching). Each process ranks from its own in-memory
+# index, scored MATCHING_BATCH_SIZE rows at a time. It is rebuilt when more than
+# MATCHING_MAX_CHANGES changes are pending or after MATCHING_REBUILD_SECONDS.
+MATCHING_RESULTS = int(os.getenv("MATCHING_RESULTS", "20"))
+MATCHING_BATCH_SIZE = int(os.getenv("MATCHING_BATCH_SIZE", "65536"))
+MATCHING_MAX_CHANGES = int(os.getenv("MATCHING_MAX_CHANGES", "10000"))
+MATCHING_REBUILD_SECONDS = int(os.getenv("MATCHING_REBUILD_SECONDS", "3600"))
+
+# SQL instrumentation (core.sql_stats). A request logs a warning on the
+# "core.sql" logger when it exceeds its view's (max queries, max DB ms) budget,
+# keyed by URL name with "default" for the rest, or repeats one statement
+# SQL_REPEAT_THRESHOLD+ times. SQL_LOG_REQUESTS logs a JSON line for every
+# request. Totals per view are served at /metrics/sql/ to staff (anyone in DEBUG).
+SQL_INSTRUMENTATION = os.getenv("SQL_INSTRUMENTATION", "True").lower() == "true"
+SQL_LOG_REQUESTS = os.getenv("SQL_LOG_REQUESTS", "False").lower() == "true"
+SQL_REPEAT_THRESHOLD = int(os.getenv("SQL_REPEAT_THRESHOLD", "5"))
+SQL_QUERY_BUDGETS = {
+    "default": (20, 200),
+    "login": (10, 100),
+    "jobs_list": (8, 100),
+    "search": (8, 150),
+    "member_jobs": (8, 100),
+    "job_applicants": (8, 100),
+    "apply_job": (8, 50),
+    "bulk_apply_jobs": (8, 50),
+    "job_matches": (8, 50),
+    "api_jobs": (8, 100),
+    "api_caregivers": (8, 150),
+}
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {"core.sql": {"handlers": ["console"], "level": "INFO", "propagate": False}},
+}
@@ -1,3 +1,13 @@
 from django.contrib import admin
+from django.contrib.auth.models import User
 
-# Register your models here.
+
+class SiteAdmin(admin.AdminSite):
+    """
+    The admin, for Django's own accounts (auth_user) only. Site users with
+    AppUser.is_staff get the exports and metrics, not the admin, whose views
+    (password change among them) expect an auth User.
+    """
+
+    def has_permission(self, request):
+        return isinstance(request.user, User) and super().has_permission(request)
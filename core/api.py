@@ -0,0 +1,98 @@
+"""
+Machine-readable listings of jobs and caregivers (the /api/ views).
+
+Results come either as keyset-paginated JSON pages, the same pages the HTML
+listings show, or as NDJSON: one object per line for the whole result,
+streamed from a server-side cursor API_CHUNK_SIZE rows at a time, so an
+export of any size is served in constant memory. The stream is iterated
+natively by the server: a sync iterator under WSGI and an async one under
+ASGI, since Django buffers a stream whose kind doesn't match the server.
+"""
+from functools import reduce
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+
+NDJSON_CONTENT_TYPE = "application/x-ndjson"
+
+# Output name -> model field path, for Job and Caregiver querysets. Streams
+# read the paths with values(), which skips building model instances.
+# Caregivers' email and phone number stay out: anyone could stream them all.
+JOB_FIELDS = {
+    "job_id": "job_id",
+    "caregiving_type": "required_caregiving_type",
+    "other_requirements": "other_requirements",
+    "date_posted": "date_posted",
+    "member_user_id": "member_id",
+    "member_given_name": "member__member_user__given_name",
+    "member_surname": "member__member_user__surname",
+}
+CAREGIVER_FIELDS = {
+    "caregiver_user_id": "caregiver_user_id",
+    "given_name": "caregiver_user__given_name",
+    "surname": "caregiver_user__surname",
+    "city": "caregiver_user__city",
+    "profile_description": "caregiver_user__profile_description",
+    "caregiving_type": "caregiving_type",
+    "hourly_rate": "hourly_rate",
+}
+
+
+def json_page(page, fields):
+    """
+    A KeysetPage of model instances as {"results": [...], "next_cursor": ...}.
+    """
+    results = [
+        {name: reduce(getattr, path.split("__"), row) for name, path in fields.items()} for row in page
+    ]
+    return JsonResponse({"results": results, "next_cursor": page.next_cursor})
+
+
+def ndjson_response(request, queryset, fields):
+    """
+    Stream every row of `queryset` as NDJSON, one chunk of lines per
+    API_CHUNK_SIZE rows.
+    """
+    # Resolve the database now: a view's replica_reads has ended by the time
+    # the response is iterated.
+    queryset = queryset.using(queryset.db).values(*fields.values())
+    chunk_size = settings.API_CHUNK_SIZE
+    encoder = DjangoJSONEncoder(separators=(",", ":"))
+
+    def lines(rows):
+        return "".join(
+            encoder.encode({name: row[path] for name, path in fields.items()}) + "\n" for row in rows
+        ).encode()
+
+    if isinstance(request, ASGIRequest):
+        async def content():
+            rows = []
+            async for row in queryset.aiterator(chunk_size=chunk_size):
+                rows.append(row)
+                if len(rows) == chunk_size:
+                    yield lines(rows)
+                    rows = []
+            yield lines(rows)
+    else:
+        def content():
+            rows = []
+            for row in queryset.iterator(chunk_size=chunk_size):
+                rows.append(row)
+                if len(rows) == chunk_size:
+                    yield lines(rows)
+                    rows = []
+            yield lines(rows)
+
+    return StreamingHttpResponse(content(), content_type=NDJSON_CONTENT_TYPE)
+
+
+def wants_ndjson(request):
+    """
+    `?format=ndjson`, or an Accept header asking for NDJSON.
+    """
+    requested = request.GET.get("format")
+    if requested:
+        return requested == "ndjson"
+    return NDJSON_CONTENT_TYPE in request.headers.get("Accept", "")
@@ -1,6 +1,16 @@
 from django.apps import AppConfig
+from django.contrib.admin import apps as admin_apps
 
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+
+
+class SiteAdminConfig(admin_apps.AdminConfig):
+    # Listed in INSTALLED_APPS in place of django.contrib.admin; CoreConfig stays the app default.
+    default = False
+    default_site = "core.admin.SiteAdmin"
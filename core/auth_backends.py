@@ -1,13 +1,18 @@
-from django.contrib.auth import get_user_model
 from django.contrib.auth.backends import BaseBackend
-from django.contrib.auth.hashers import check_password, make_password
+from django.contrib.auth.hashers import check_password, identify_hasher, make_password
+from django.utils.crypto import constant_time_compare
 
+from .identity import bump_identity_version, load_identity
 from .models import AppUser
 
 
 class AppUserBackend(BaseBackend):
     """
-    Authenticate against the existing AppUser table while keeping Django's auth user in sync.
+    Authenticate against the existing AppUser table; the AppUser is the logged-in user.
+
+    A login costs one hash verification and no writes, except that plaintext
+    legacy passwords and hashes with outdated parameters are upgraded in place
+    on successful login.
     """
 
     def authenticate(self, request, username=None, password=None, **kwargs):
@@ -20,45 +25,32 @@ class AppUserBackend(BaseBackend):
             return None
 
         stored_pw = app_user.password or ""
-        is_hashed = stored_pw.startswith(("pbkdf2_", "argon2", "bcrypt", "scrypt"))
-
-        if is_hashed:
-            valid = check_password(password, stored_pw)
+        if _is_hashed(stored_pw):
+            valid = check_password(password, stored_pw, setter=lambda raw: _set_password(app_user, raw))
         else:
-            valid = stored_pw == password
+            valid = bool(stored_pw) and constant_time_compare(stored_pw, password)
+            if valid:
+                _set_password(app_user, password)
 
         if not valid:
             return None
+        return app_user
 
-        User = get_user_model()
-        user, created = User.objects.get_or_create(
-            username=app_user.email,
-            defaults={
-                "email": app_user.email,
-                "first_name": app_user.given_name,
-                "last_name": app_user.surname,
-            },
-        )
+    def get_user(self, user_id):
+        # Runs on every request of a logged-in user; usually served from the cache.
+        return load_identity(user_id)
 
-        # Ensure auth user mirrors AppUser
-        needs_pw_update = not check_password(password, user.password)
-        if created or needs_pw_update:
-            user.password = make_password(password)
-            user.email = app_user.email
-            user.first_name = app_user.given_name
-            user.last_name = app_user.surname
-            user.save()
 
-        # Harden AppUser password to hashed form if it was plain
-        if not is_hashed:
-            app_user.password = user.password
-            app_user.save(update_fields=["password"])
+def _is_hashed(encoded):
+    try:
+        identify_hasher(encoded)
+    except ValueError:
+        return False
+    return True
 
-        return user
 
-    def get_user(self, user_id):
-        User = get_user_model()
-        try:
-            return User.objects.get(pk=user_id)
-        except User.DoesNotExist:
-            return None
+def _set_password(app_user, raw_password):
+    app_user.password = make_password(raw_password)
+    AppUser.objects.filter(pk=app_user.pk).update(password=app_user.password)
+    # The cached user carries the old password, and with it the old session hash.
+    bump_identity_version(app_user.pk)
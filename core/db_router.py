@@ -0,0 +1,98 @@
+"""
+Read-replica routing.
+
+Everything reads from and writes to the primary ("default") unless a view
+opts in with @replica_reads: then its GET/HEAD reads go to one of
+settings.DATABASE_REPLICAS, picked per request. Writes always go to the
+primary. After any request with an unsafe method, ReplicaPinMiddleware
+(core.middleware) sets a cookie that keeps the client on the primary for
+REPLICA_STICKY_SECONDS, so people see their own writes despite replication lag.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_COOKIE = "pin_primary"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS", "TRACE")
+
+_read_alias = ContextVar("read_alias", default=None)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+def replica_reads(view):
+    """
+    Serve the view's ORM reads (and raw reads through `read_connection()`)
+    from a replica on GET/HEAD, unless the client is pinned to the primary.
+    Works on sync and async views.
+    """
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            token = _read_alias.set(_pick_replica(request))
+            try:
+                return await view(request, *args, **kwargs)
+            finally:
+                _read_alias.reset(token)
+
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        token = _read_alias.set(_pick_replica(request))
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _read_alias.reset(token)
+
+    return wrapper
+
+
+def _pick_replica(request):
+    if (
+        request.method not in ("GET", "HEAD")
+        or PIN_COOKIE in request.COOKIES
+        or not settings.DATABASE_REPLICAS
+    ):
+        return None
+    return random.choice(settings.DATABASE_REPLICAS)
+
+
+@contextmanager
+def primary_reads():
+    """
+    Read from the primary inside the block, e.g. to fill a cache whose
+    entries must not carry replication lag.
+    """
+    token = _read_alias.set(None)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def read_connection():
+    """
+    The connection raw read-only SQL should use: the current replica inside
+    @replica_reads, otherwise the primary.
+    """
+    return connections[_read_alias.get() or DEFAULT_DB_ALIAS]
+
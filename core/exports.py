@@ -0,0 +1,242 @@
+"""
+CSV exports for operations staff, written by PostgreSQL itself with
+COPY (...) TO STDOUT: the server formats the CSV and the client only passes
+bytes along, so an export costs about as much as reading the table.
+
+`manage.py export_data` copies straight into a file. The staff endpoint
+streams: psycopg2's copy_expert can only push into a file object, so the
+COPY runs in a worker thread that writes into a small bounded queue the
+response reads from. Memory stays flat, and a slow client slows the COPY
+down instead of buffering it.
+"""
+import gzip
+import queue
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.http import StreamingHttpResponse
+
+Export = namedtuple("Export", "name sql date_column")
+
+EXPORTS = {
+    export.name: export
+    for export in [
+        # Without password hashes and the search document.
+        Export(
+            "users",
+            "SELECT user_id, email, given_name, surname, city, phone_number, profile_description FROM users",
+            None,
+        ),
+        Export(
+            "jobs",
+            "SELECT job_id, member_user_id, required_caregiving_type, other_requirements, date_posted FROM jobs",
+            "date_posted",
+        ),
+        Export(
+            "job_applications",
+            "SELECT caregiver_user_id, job_id, date_applied FROM job_applications",
+            "date_applied",
+        ),
+        Export(
+            "appointments",
+            "SELECT appointment_id, caregiver_user_id, member_user_id, appointment_date, appointment_time, "
+            "work_hours, status FROM appointments",
+            "appointment_date",
+        ),
+        # The rows of queries.py's view_job_applications, without needing the view to exist.
+        Export(
+            "view_job_applications",
+            """
+            SELECT j.job_id, u_mem.given_name AS employer, u_app.given_name AS applicant_name, ja.date_applied
+            FROM job_applications ja
+            JOIN jobs j ON ja.job_id = j.job_id
+            JOIN users u_mem ON j.member_user_id = u_mem.user_id
+            JOIN users u_app ON ja.caregiver_user_id = u_app.user_id
+            """,
+            "date_applied",
+        ),
+    ]
+}
+
+_DONE = object()
+
+
+class ExportError(ValueError):
+    pass
+
+
+def copy_sql(connection, export, since=None, until=None):
+    """
+    The COPY statement for `export`, limited to rows dated within
+    [since, until] (either may be None).
+    """
+    conditions, params = [], []
+    if since or until:
+        if not export.date_column:
+            raise ExportError(f"{export.name} has no date to filter on.")
+        if since:
+            conditions.append(f"{export.date_column} >= %s")
+            params.append(since)
+        if until:
+            conditions.append(f"{export.date_column} <= %s")
+            params.append(until)
+    query = export.sql
+    if conditions:
+        query = f"SELECT * FROM ({query}) AS export WHERE {' AND '.join(conditions)}"
+    # COPY takes no bind parameters.
+    return connection.ops.compose_sql(f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER)", params)
+
+
+def write_csv(out, export, since=None, until=None, compress=False, using=DEFAULT_DB_ALIAS):
+    """
+    Write `export` as CSV (gzipped with `compress`) into the binary file `out`.
+    """
+    connection = connections[using]
+    sql = copy_sql(connection, export, since, until)
+    with connection.cursor() as cursor:
+        if not compress:
+            cursor.copy_expert(sql, out)
+            return
+        with gzip.GzipFile(fileobj=out, mode="wb", compresslevel=settings.EXPORT_GZIP_LEVEL) as zipped:
+            cursor.copy_expert(sql, zipped)
+
+
+def csv_response(request, export, since=None, until=None, compress=False):
+    """
+    A StreamingHttpResponse downloading `export`, iterated natively by the
+    server (Django buffers a sync stream served over ASGI, and vice versa).
+    """
+    chunks = iter_csv(export, since, until, compress)
+    if isinstance(request, ASGIRequest):
+        chunks = _aiter(chunks)
+    response = StreamingHttpResponse(chunks, content_type="application/gzip" if compress else "text/csv")
+    filename = f"{export.name}.csv.gz" if compress else f"{export.name}.csv"
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+def iter_csv(export, since=None, until=None, compress=False, using=DEFAULT_DB_ALIAS):
+    """
+    Return an iterator over `export` as chunks of CSV bytes, produced by a
+    COPY in a worker thread. Closing it early cancels the COPY. Bad filters
+    raise ExportError here rather than mid-stream.
+    """
+    copy_sql(connections[using], export, since, until)
+    return _CopyStream(export, since, until, compress, using)
+
+
+class _CopyStream:
+    """
+    Iterator over the chunks of a COPY running in a worker thread. cancel()
+    may be called from any thread, even while another is inside next();
+    close() cancels and waits for the worker.
+    """
+
+    def __init__(self, export, since, until, compress, using):
+        self.chunks = queue.Queue(maxsize=settings.EXPORT_QUEUE_CHUNKS)
+        # Set once the reader stops, whether it read everything or gave up.
+        self.stopped = threading.Event()
+        self.worker = threading.Thread(
+            target=self.produce,
+            args=(export, since, until, compress, using),
+            name=f"export-{export.name}",
+            daemon=True,
+        )
+        self.worker.start()
+
+    def produce(self, export, since, until, compress, using):
+        try:
+            sink = _QueueWriter(self.chunks, self.stopped)
+            write_csv(sink, export, since, until, compress, using)
+            sink.flush()
+            result = _DONE
+        except Exception as error:
+            result = error
+        finally:
+            # The thread's own connection; an interrupted COPY leaves it unusable anyway.
+            connections[using].close()
+        _put(self.chunks, result, self.stopped)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        while not self.stopped.is_set():
+            try:
+                chunk = self.chunks.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if chunk is _DONE:
+                break
+            if isinstance(chunk, Exception):
+                self.stopped.set()
+                raise chunk
+            return chunk
+        self.stopped.set()
+        raise StopIteration
+
+    def cancel(self):
+        self.stopped.set()
+
+    def close(self):
+        self.cancel()
+        self.worker.join()
+
+
+async def _aiter(stream):
+    # next() and close() share one thread: a close() may not overlap a
+    # next() still waiting on the COPY after its task was cancelled.
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="export-reader")
+    # Each next() may wait on the COPY; keep that off the event loop.
+    read = sync_to_async(next, thread_sensitive=False, executor=executor)
+    try:
+        while (chunk := await read(stream, None)) is not None:
+            yield chunk
+    finally:
+        stream.cancel()
+        await sync_to_async(stream.close, thread_sensitive=False, executor=executor)()
+        executor.shutdown(wait=False)
+
+
+class _QueueWriter:
+    """
+    The file object COPY writes into: batches its many small writes (one per
+    row) into EXPORT_CHUNK_BYTES chunks and queues them.
+    """
+
+    def __init__(self, chunks, stopped):
+        self.chunks = chunks
+        self.stopped = stopped
+        self.buffer = bytearray()
+
+    def write(self, data):
+        self.buffer += data
+        if len(self.buffer) >= settings.EXPORT_CHUNK_BYTES:
+            self.flush()
+        return len(data)
+
+    def flush(self):
+        if not self.buffer:
+            return
+        chunk, self.buffer = bytes(self.buffer), bytearray()
+        if not _put(self.chunks, chunk, self.stopped):
+            # Raising from write() aborts copy_expert.
+            raise ExportError("Export cancelled.")
+
+
+def _put(chunks, item, stopped):
+    """
+    Queue `item` unless the reader has gone away; returns whether it was queued.
+    """
+    while not stopped.is_set():
+        try:
+            chunks.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
@@ -37,7 +37,7 @@ class CaregiverRegistrationForm(forms.Form):
     )
     hourly_rate = forms.DecimalField(max_digits=10, decimal_places=2)
     profile_description = forms.CharField(widget=forms.Textarea, required=False)
-    photo = forms.FileField(label="Photo (upload)", required=False)
+    photo = forms.ImageField(label="Photo (upload)", required=False)
 
     def clean(self):
         cleaned = super().clean()
@@ -76,3 +76,10 @@ class JobForm(forms.Form):
         ]
     )
     other_requirements = forms.CharField(widget=forms.Textarea, required=False)
+
+
+class AppointmentForm(forms.Form):
+    caregiver_user_id = forms.IntegerField(min_value=1)
+    appointment_date = forms.DateField()
+    appointment_time = forms.TimeField()
+    work_hours = forms.IntegerField(min_value=1, max_value=12)
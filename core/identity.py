@@ -0,0 +1,66 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import AppUser
+
+
+def identity_key(user_id):
+    return f"app-identity:{user_id}"
+
+
+def version_key(user_id):
+    return f"app-identity-version:{user_id}"
+
+
+def bump_identity_version(user_id):
+    """
+    Invalidate the cached identity (user and profiles) of `user_id`.
+
+    Readers compare the version stored with the cached identity with this one
+    on each request, so the cache backend must be shared between workers for
+    this to reach them.
+    """
+    cache.set(version_key(user_id), time.time_ns(), None)
+
+
+def load_identity(user_id):
+    """
+    Return the AppUser `user_id` with its caregiver and member profiles
+    loaded (None if there is no such user).
+
+    Served from the cache while the user's identity version is unchanged,
+    otherwise loaded with a single query and cached for USER_CACHE_SECONDS.
+    """
+    key, current = identity_key(user_id), version_key(user_id)
+    cached = cache.get_many([key, current]) if settings.USER_CACHE_SECONDS else {}
+    if settings.USER_CACHE_SECONDS and current not in cached:
+        # Never fall back to a default: an identity cached under it may predate an evicted bump.
+        cache.add(current, time.time_ns(), None)
+        cached[current] = cache.get(current)
+    if key in cached and cached[key][0] == cached[current]:
+        return cached[key][1]
+
+    # The version is read before the row, so a change committed in between
+    # leaves this copy already stale.
+    app_user = (
+        AppUser.objects.select_related("caregiver_profile", "member_profile").filter(pk=user_id).first()
+    )
+    if app_user is not None and settings.USER_CACHE_SECONDS:
+        cache.set(key, (cached[current], app_user), settings.USER_CACHE_SECONDS)
+    return app_user
+
+
+def resolve_identity(request):
+    """
+    Return (app_user, caregiver, member) for the logged-in user.
+
+    The AppUser is request.user itself; when it came from load_identity (any
+    request after the login one) its profiles are already loaded.
+    """
+    app_user = request.user
+    if not isinstance(app_user, AppUser):
+        # Anonymous, or one of Django's own admin accounts.
+        return None, None, None
+    return app_user, getattr(app_user, "caregiver_profile", None), getattr(app_user, "member_profile", None)
@@ -0,0 +1,429 @@
+"""
+Bulk import of fixture-shaped records: data.json and partner feeds like it.
+
+Records look like `manage.py dumpdata` output ({"model": "core.appuser",
+"pk": 1, "fields": {...}}), either as one JSON array or as NDJSON, one
+record per line (read lazily, for large feeds). Each model is imported in
+dependency order, BATCH_SIZE records at a time:
+
+- every record is checked against its model's fields, without queries;
+- references (a job's member, an appointment's caregiver, ...) and
+  duplicates are checked with one query per batch;
+- the batch is written with a single multi-row INSERT ... ON CONFLICT.
+
+Users are matched by email: a user whose email already exists keeps their
+id, and records referring to them by the feed's pk follow along. Of
+several records with one email, the first is imported (the last, with
+`update`). A job or appointment is the existing row with its pk only when
+that row belongs to the same people (SAME_ROW); a pk taken by anyone
+else's is remapped the same way, so a feed never touches unrelated rows.
+Other rows are matched by their key (caregiver_user_id, job_id, ...).
+Existing rows are left alone unless `update=True`. New rows keep the
+feed's pk when it is free and otherwise get one above both the table's
+and the feed's highest id; the id sequences are synced once at the end.
+
+Invalid records are rejected, not fatal. The whole import is one
+transaction that blocks other writers to these tables. Plaintext passwords
+are stored as given; AppUserBackend hashes them on first login.
+"""
+import io
+import json
+import time
+from collections import defaultdict, namedtuple
+from pathlib import Path
+
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection, transaction
+
+from . import listings, matching
+from .identity import bump_identity_version
+from .models import Address, Appointment, AppUser, Caregiver, Job, JobApplication, Member
+
+# conflict: the unique columns a duplicate is detected by; None for
+# appointments, whose duplicates include overlapping bookings (an exclusion
+# constraint, which only ON CONFLICT DO NOTHING without a target handles).
+# serial: new rows may need a fresh id.
+Target = namedtuple("Target", "model conflict serial")
+
+TARGETS = [
+    Target(AppUser, ("email",), True),
+    Target(Caregiver, ("caregiver_user_id",), False),
+    Target(Member, ("member_user_id",), False),
+    # addresses has no unique constraint; member_user_id is matched explicitly.
+    Target(Address, ("member_user_id",), False),
+    Target(Job, ("job_id",), True),
+    Target(JobApplication, ("caregiver_user_id", "job_id"), False),
+    Target(Appointment, None, True),
+]
+TARGETS_BY_LABEL = {target.model._meta.label_lower: target for target in TARGETS}
+# Models whose primary key is a users.user_id, so references to them follow
+# users that were matched by email to a different id.
+USER_KEYED = (AppUser, Caregiver, Member)
+# For serial models matched by pk: the columns an existing row with the
+# feed's pk must share to be the same record rather than a collision.
+SAME_ROW = {
+    Job: ("member_user_id",),
+    Appointment: ("caregiver_user_id", "member_user_id"),
+}
+# Never taken from a feed: new users get the column default, existing ones keep theirs.
+NOT_IMPORTED = {(AppUser, "is_staff")}
+BATCH_SIZE = 5000
+MAX_REPORTED_REJECTIONS = 1000
+
+Rejection = namedtuple("Rejection", "position model pk reason")
+# values: column -> value. aliases: feed pks of earlier records merged into this one.
+Row = namedtuple("Row", "position pk values aliases")
+
+
+class ImportStats:
+    def __init__(self):
+        self.read = 0
+        self.written = 0
+        self.skipped = 0
+        self.merged = 0
+        self.rejected = 0
+        self.seconds = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.read / self.seconds if self.seconds else 0.0
+
+
+class ImportReport:
+    """
+    Per-model counts and timings, plus the rejected records (the first
+    MAX_REPORTED_REJECTIONS kept; all of them passed to `on_reject`).
+    """
+
+    def __init__(self, on_reject=None):
+        self.models = defaultdict(ImportStats)
+        self.rejections = []
+        self.on_reject = on_reject
+        self.seconds = 0.0
+
+    @property
+    def total(self):
+        return sum(stats.read for stats in self.models.values())
+
+    def reject(self, position, model, pk, reason):
+        rejection = Rejection(position, model, pk, reason)
+        self.models[model].rejected += 1
+        if len(self.rejections) < MAX_REPORTED_REJECTIONS:
+            self.rejections.append(rejection)
+        if self.on_reject:
+            self.on_reject(rejection)
+
+
+def read_records(path):
+    """
+    Yield (position, record) from a JSON array file or, for .ndjson/.jsonl
+    files, one record per line; position is the index or line number.
+    """
+    path = Path(path)
+    if path.suffix in (".ndjson", ".jsonl"):
+        with path.open(encoding="utf-8") as lines:
+            for number, line in enumerate(lines, 1):
+                if line.strip():
+                    yield number, json.loads(line)
+    else:
+        with path.open(encoding="utf-8") as source:
+            yield from enumerate(json.load(source))
+
+
+def import_records(path, update=False, batch_size=BATCH_SIZE, dry_run=False, on_reject=None):
+    """
+    Import the records in `path` and return an ImportReport. With
+    `dry_run` everything is validated and written, then rolled back.
+    """
+    report = ImportReport(on_reject)
+    started = time.monotonic()
+    with transaction.atomic():
+        importer = _Importer(report, update)
+        importer.scan(read_records(path))
+        importer.lock()
+        for target in TARGETS:
+            label = target.model._meta.label_lower
+            if not importer.feed_counts.get(label):
+                continue
+            model_started = time.monotonic()
+            batch = []
+            for position, record in read_records(path):
+                if isinstance(record, dict) and record.get("model") == label:
+                    batch.append((position, record))
+                    if len(batch) == batch_size:
+                        importer.import_batch(target, batch)
+                        batch = []
+            if batch:
+                importer.import_batch(target, batch)
+            report.models[label].seconds = time.monotonic() - model_started
+        call_command("sync_sequences", stdout=io.StringIO())
+        if dry_run:
+            transaction.set_rollback(True)
+        else:
+            transaction.on_commit(importer.invalidate_caches)
+    report.seconds = time.monotonic() - started
+    return report
+
+
+class _Importer:
+    def __init__(self, report, update):
+        self.report = report
+        self.update = update
+        self.feed_counts = defaultdict(int)
+        self.feed_max_pk = defaultdict(int)
+        self.next_id = {}
+        # Model -> {feed pk: id}, for rows that got a different id than their
+        # pk; users are under AppUser.
+        self.ids = defaultdict(dict)
+        self.updated_user_ids = []
+
+    def lock(self):
+        tables = ", ".join(target.model._meta.db_table for target in TARGETS)
+        with connection.cursor() as cursor:
+            # Readers carry on; writers wait, so ids handed out here can't be taken meanwhile.
+            cursor.execute(f"LOCK TABLE {tables} IN EXCLUSIVE MODE")
+
+    def scan(self, records):
+        """
+        First pass: reject records of unknown models, count the rest and
+        note the highest pk per model (fresh ids go above it).
+        """
+        for position, record in records:
+            label = record.get("model") if isinstance(record, dict) else None
+            if label not in TARGETS_BY_LABEL:
+                self.report.reject(position, label or "?", None, f"Unknown model {label!r}.")
+                continue
+            self.feed_counts[label] += 1
+            if isinstance(record.get("pk"), int):
+                self.feed_max_pk[label] = max(self.feed_max_pk[label], record["pk"])
+
+    def import_batch(self, target, batch):
+        label = target.model._meta.label_lower
+        stats = self.report.models[label]
+        stats.read += len(batch)
+        rows = []
+        for position, record in batch:
+            try:
+                rows.append(Row(position, record.get("pk"), self.clean(target.model, record), []))
+            except ValidationError as error:
+                self.report.reject(position, label, record.get("pk"), "; ".join(error.messages))
+        rows = self.dedupe(target, rows)
+        rows = self.check_references(target, rows)
+        if target.model is AppUser:
+            rows = self.resolve_users(rows)
+        elif target.serial:
+            rows = self.assign_ids(target, rows)
+        if not rows:
+            return
+        written = self.write(target, [row.values for row in rows])
+        stats.written += written
+        stats.skipped += len(rows) - written
+
+    def clean(self, model, record):
+        """
+        The record's column values in concrete field order, validated and
+        converted like a model form would, without database access.
+        """
+        fields = record.get("fields")
+        if not isinstance(fields, dict):
+            raise ValidationError("Missing fields.")
+        values = {}
+        errors = []
+        for field in _imported_fields(model):
+            if field.primary_key and field.name not in fields:
+                raw = record.get("pk")
+            elif field.name in fields:
+                raw = fields[field.name]
+            else:
+                raw = field.get_default() if field.has_default() else None
+            try:
+                if field.primary_key and raw is None and not field.is_relation:
+                    values[field.column] = None  # a fresh id is assigned
+                elif field.is_relation:
+                    values[field.column] = self.mapped_id(field.related_model, raw)
+                else:
+                    values[field.column] = field.clean(raw, None)
+            except (TypeError, ValueError):
+                errors.append(f"{field.name}: {raw!r} is not an id.")
+            except ValidationError as error:
+                errors.extend(f"{field.name}: {message}" for message in error.messages)
+        if errors:
+            raise ValidationError(errors)
+        return values
+
+    def mapped_id(self, model, pk):
+        pk = int(pk)
+        return self.ids[AppUser if model in USER_KEYED else model].get(pk, pk)
+
+    def dedupe(self, target, rows):
+        """
+        One record per conflict key, as one INSERT can't touch a row twice:
+        the first, or with `update` the last, the same as across batches.
+        Rows still waiting for a fresh id are all distinct.
+        """
+        if not target.conflict:
+            return rows
+        by_key = {}
+        for row in rows:
+            key = tuple(row.values[column] for column in target.conflict)
+            if None in key:
+                by_key[row.position] = row
+                continue
+            if key not in by_key:
+                by_key[key] = row
+                continue
+            self.report.models[target.model._meta.label_lower].merged += 1
+            kept, dropped = (by_key.pop(key), row) if not self.update else (row, by_key.pop(key))
+            # The dropped record's pks now mean the kept one.
+            kept.aliases.extend([*dropped.aliases, dropped.pk])
+            by_key[key] = kept
+        return list(by_key.values())
+
+    def check_references(self, target, rows):
+        """
+        Reject rows referring to users, members, caregivers or jobs that
+        neither exist nor were imported, with one query per referenced table.
+        """
+        for field in _imported_fields(target.model):
+            if not field.is_relation:
+                continue
+            related = field.related_model._meta
+            ids = list({row.values[field.column] for row in rows})
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"SELECT {related.pk.column} FROM {related.db_table} WHERE {related.pk.column} = ANY(%s)",
+                    [ids],
+                )
+                found = {row[0] for row in cursor.fetchall()}
+            kept = []
+            for row in rows:
+                value = row.values[field.column]
+                if value in found:
+                    kept.append(row)
+                else:
+                    self.report.reject(
+                        row.position, target.model._meta.label_lower, row.pk, f"{field.name}: {value} does not exist."
+                    )
+            rows = kept
+        return rows
+
+    def resolve_users(self, rows):
+        """
+        Give each user row its user_id: the existing user's for a known
+        email, else the feed pk when it is free, else a fresh one.
+        """
+        emails = [row.values["email"] for row in rows]
+        pks = [row.values["user_id"] for row in rows if row.values["user_id"] is not None]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT user_id, email FROM users WHERE email = ANY(%s) OR user_id = ANY(%s)", [emails, pks]
+            )
+            existing = cursor.fetchall()
+        id_by_email = {email: user_id for user_id, email in existing}
+        taken = {user_id for user_id, _ in existing}
+        for row in rows:
+            values = row.values
+            if values["email"] in id_by_email:
+                values["user_id"] = id_by_email[values["email"]]
+                if self.update:
+                    self.updated_user_ids.append(values["user_id"])
+            elif values["user_id"] is None or values["user_id"] in taken:
+                values["user_id"] = self.fresh_id(TARGETS[0])
+            taken.add(values["user_id"])
+            for feed_pk in [row.pk, *row.aliases]:
+                if isinstance(feed_pk, int) and feed_pk != values["user_id"]:
+                    self.ids[AppUser][feed_pk] = values["user_id"]
+        return rows
+
+    def assign_ids(self, target, rows):
+        """
+        Give each row its id: the feed pk when it is free or its row is the
+        same record (SAME_ROW), else a fresh one that references to the pk
+        follow.
+        """
+        meta = target.model._meta
+        pk = meta.pk.column
+        same_row = SAME_ROW[target.model]
+        pks = [row.values[pk] for row in rows if row.values[pk] is not None]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT {pk}, {', '.join(same_row)} FROM {meta.db_table} WHERE {pk} = ANY(%s)", [pks]
+            )
+            existing = {found[0]: found[1:] for found in cursor.fetchall()}
+        for row in rows:
+            values = row.values
+            taken = values[pk] in existing and existing[values[pk]] != tuple(values[column] for column in same_row)
+            if values[pk] is None or taken:
+                values[pk] = self.fresh_id(target)
+            for feed_pk in [row.pk, *row.aliases]:
+                if isinstance(feed_pk, int) and feed_pk != values[pk]:
+                    self.ids[target.model][feed_pk] = values[pk]
+        return rows
+
+    def fresh_id(self, target):
+        """
+        The next id above both the table's and the feed's highest; the tables
+        are locked, so nothing else hands these out before the import ends.
+        """
+        meta = target.model._meta
+        if meta.label_lower not in self.next_id:
+            with connection.cursor() as cursor:
+                cursor.execute(f"SELECT COALESCE(MAX({meta.pk.column}), 0) FROM {meta.db_table}")
+                highest = max(cursor.fetchone()[0], self.feed_max_pk[meta.label_lower])
+            self.next_id[meta.label_lower] = highest + 1
+        fresh = self.next_id[meta.label_lower]
+        self.next_id[meta.label_lower] += 1
+        return fresh
+
+    def write(self, target, rows):
+        """
+        Insert (or with `update`, upsert) `rows` in one statement; returns how
+        many were written.
+        """
+        meta = target.model._meta
+        fields = _imported_fields(target.model)
+        columns = [field.column for field in fields]
+        arrays = ", ".join(f"%s::{field.db_type(connection)}[]" for field in fields)
+        source = f"unnest({arrays}) AS u({', '.join(columns)})"
+        params = [[values[column] for values in rows] for column in columns]
+        settable = [column for column in columns if column not in (target.conflict or ()) and column != meta.pk.column]
+        with connection.cursor() as cursor:
+            written = 0
+            if target.model is Address:
+                if self.update:
+                    assignments = ", ".join(f"{column} = u.{column}" for column in settable)
+                    cursor.execute(
+                        f"UPDATE addresses a SET {assignments} FROM {source} "
+                        f"WHERE a.member_user_id = u.member_user_id",
+                        params,
+                    )
+                    written = cursor.rowcount
+                cursor.execute(
+                    f"INSERT INTO addresses ({', '.join(columns)}) SELECT * FROM {source} "
+                    f"WHERE NOT EXISTS (SELECT 1 FROM addresses a WHERE a.member_user_id = u.member_user_id)",
+                    params,
+                )
+                return written + cursor.rowcount
+            if target.conflict and self.update and settable:
+                assignments = ", ".join(f"{column} = EXCLUDED.{column}" for column in settable)
+                conflict = f"ON CONFLICT ({', '.join(target.conflict)}) DO UPDATE SET {assignments}"
+            elif target.conflict:
+                conflict = f"ON CONFLICT ({', '.join(target.conflict)}) DO NOTHING"
+            else:
+                conflict = "ON CONFLICT DO NOTHING"
+            cursor.execute(
+                f"INSERT INTO {meta.db_table} ({', '.join(columns)}) SELECT * FROM {source} {conflict}", params
+            )
+            return cursor.rowcount
+
+    def invalidate_caches(self):
+        # The rows went in without model signals.
+        matching.invalidate()
+        listings.jobs_changed()
+        for user_id in self.updated_user_ids:
+            bump_identity_version(user_id)
+
+
+def _imported_fields(model):
+    return [field for field in model._meta.concrete_fields if (model, field.name) not in NOT_IMPORTED]
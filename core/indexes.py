@@ -0,0 +1,61 @@
+"""
+Secondary indexes on the externally managed tables.
+
+setup/schema.sql only creates tables and their primary/foreign keys; every
+other index lives in INDEXES and is created by `manage.py apply_indexes`,
+which can be re-run at any time. Indexes are matched by name, so changing a
+definition means giving it a new name (and dropping the old one by hand).
+`manage.py check_query_plans` verifies the hot queries actually use them.
+"""
+from collections import namedtuple
+
+ManagedIndex = namedtuple("ManagedIndex", "name table definition extension", defaults=(None,))
+
+INDEXES = [
+    # Caregiver search: trigram index for city substring matches (Django's
+    # icontains compiles to UPPER(city) LIKE UPPER(...)), GIN index for
+    # full-text keyword search, and the caregiving type filter in id order.
+    ManagedIndex("idx_users_city_trgm", "users", "USING GIN (UPPER(city) gin_trgm_ops)", extension="pg_trgm"),
+    ManagedIndex("idx_users_search_vector", "users", "USING GIN (search_vector)"),
+    ManagedIndex("idx_caregivers_type", "caregivers", "(caregiving_type, caregiver_user_id)"),
+    # Keyset pagination of the jobs list (ORDER BY date_posted DESC, job_id DESC),
+    # unfiltered and filtered by caregiving type.
+    ManagedIndex("idx_jobs_date_posted_job_id", "jobs", "(date_posted, job_id)"),
+    ManagedIndex("idx_jobs_type_date_posted", "jobs", "(required_caregiving_type, date_posted, job_id)"),
+    # A member's paginated job list; also serves the jobs -> members foreign key.
+    ManagedIndex("idx_jobs_member_date_posted", "jobs", "(member_user_id, date_posted, job_id)"),
+    # Applicant counts and pages per job. The primary key already leads with
+    # caregiver_user_id, which covers "jobs this caregiver applied to".
+    ManagedIndex("idx_job_applications_job_id", "job_applications", "(job_id, caregiver_user_id)"),
+    # Appointments per caregiver (optionally by status) and per member.
+    ManagedIndex("idx_appointments_caregiver_status", "appointments", "(caregiver_user_id, status)"),
+    ManagedIndex("idx_appointments_member", "appointments", "(member_user_id)"),
+    # addresses has no primary key; every lookup and cascade goes by member.
+    ManagedIndex("idx_addresses_member", "addresses", "(member_user_id)"),
+]
+
+
+def index_state(cursor):
+    """
+    Return {index name: is_valid} for the indexes in the current schema.
+    An index left behind by a failed CREATE INDEX CONCURRENTLY is invalid.
+    """
+    cursor.execute(
+        """
+        SELECT c.relname, i.indisvalid
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE c.relnamespace = current_schema()::regnamespace
+        """
+    )
+    return dict(cursor.fetchall())
+
+
+def available_extensions(cursor):
+    cursor.execute("SELECT name FROM pg_available_extensions")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def create_index_sql(index, concurrently=False):
+    concurrently_sql = "CONCURRENTLY " if concurrently else ""
+    return f"CREATE INDEX {concurrently_sql}IF NOT EXISTS {index.name} ON {index.table} {index.definition}"
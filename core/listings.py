@@ -0,0 +1,101 @@
+"""
+Shared cache for the jobs_list pages.
+
+A listing page is the same for every visitor, so it is cached by filter,
+cursor position and page size; the view adds the per-caregiver "applied"
+overlay on top. Keys embed generation numbers rather than being deleted:
+
+- A new job is the newest row, so it only changes the first page of its
+  caregiving type and of the unfiltered listing (later pages are defined by
+  their cursor). Creating one bumps the head generation of those two.
+- Anything else (a deleted or edited job, a member changing the name shown
+  on their jobs, a bulk load) can change any page and bumps the listing
+  generation.
+
+Generations are bumped once the write commits, so a reader can't cache a
+page under the new generation before the change is visible. The cache
+backend must be shared between workers for this to reach all of them.
+"""
+import hashlib
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .db_router import primary_reads
+from .pagination import decode_job_cursor
+
+LISTING_KEY = "jobs-list:generation"
+# What jobs_list renders. Cached pages load only these, so they never carry
+# the posters' password hashes or contact details.
+PAGE_FIELDS = (
+    "job_id",
+    "required_caregiving_type",
+    "other_requirements",
+    "date_posted",
+    "member__member_user__given_name",
+    "member__member_user__surname",
+)
+
+
+def head_key(caregiving_type):
+    return f"jobs-list:head:{hashlib.md5(caregiving_type.encode()).hexdigest()}"
+
+
+def cached_jobs_page(caregiving_type, cursor, page_size, load):
+    """
+    Return the jobs_list page for (caregiving_type, cursor, page_size),
+    calling `load(cursor)` to build it on a miss. Cursors that don't decode
+    are treated as the first page, the same as paginate_jobs does.
+    """
+    key, cursor = _page_key(caregiving_type, cursor, page_size)
+    page = cache.get(key)
+    if page is None:
+        # Fill from the primary: a page read from a lagging replica would be
+        # cached under the new generation and outlive the lag.
+        with primary_reads():
+            page = load(cursor)
+        cache.set(key, page, settings.JOBS_CACHE_SECONDS)
+    return page
+
+
+async def acached_jobs_page(caregiving_type, cursor, page_size, load):
+    """
+    cached_jobs_page for async views; `load` is a coroutine function.
+    """
+    key, cursor = await sync_to_async(_page_key)(caregiving_type, cursor, page_size)
+    page = await cache.aget(key)
+    if page is None:
+        with primary_reads():
+            page = await load(cursor)
+        await cache.aset(key, page, settings.JOBS_CACHE_SECONDS)
+    return page
+
+
+def _page_key(caregiving_type, cursor, page_size):
+    position = decode_job_cursor(cursor)
+    if position is None:
+        cursor = None
+    keys = [LISTING_KEY] if position else [LISTING_KEY, head_key(caregiving_type)]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            # Never fall back to a default: pages cached under it may predate an evicted bump.
+            cache.add(key, time.time_ns(), None)
+            generations[key] = cache.get(key)
+    key_parts = (caregiving_type, position, page_size, *(generations[key] for key in keys))
+    return f"jobs-list:page:{hashlib.md5(repr(key_parts).encode()).hexdigest()}", cursor
+
+
+def job_created(caregiving_type):
+    def bump():
+        now = time.time_ns()
+        cache.set_many({head_key(""): now, head_key(caregiving_type): now}, None)
+
+    transaction.on_commit(bump)
+
+
+def jobs_changed():
+    transaction.on_commit(lambda: cache.set(LISTING_KEY, time.time_ns(), None))
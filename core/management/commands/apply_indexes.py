@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from core.indexes import INDEXES, available_extensions, create_index_sql, index_state
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the secondary indexes listed in core/indexes.py that are missing. "
+        "Safe to re-run; invalid leftovers of an interrupted concurrent build are rebuilt."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrently",
+            action="store_true",
+            help="Build with CREATE INDEX CONCURRENTLY so writes are not blocked (slower).",
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Print the statements without running them.")
+
+    def handle(self, *args, **options):
+        concurrently = options["concurrently"]
+        dry_run = options["dry_run"]
+        with connection.cursor() as cursor:
+            state = index_state(cursor)
+            extensions = available_extensions(cursor)
+            enabled = set()
+            created = []
+            for index in INDEXES:
+                if state.get(index.name):
+                    self.stdout.write(f"{index.name}: exists")
+                    continue
+
+                if index.extension and index.extension not in enabled:
+                    if index.extension not in extensions:
+                        self.stderr.write(
+                            self.style.WARNING(f"{index.name}: skipped, extension {index.extension} is not installed")
+                        )
+                        continue
+                    self._run(cursor, f"CREATE EXTENSION IF NOT EXISTS {index.extension}", dry_run)
+                    enabled.add(index.extension)
+
+                if index.name in state:
+                    self._run(cursor, f"DROP INDEX {'CONCURRENTLY ' if concurrently else ''}{index.name}", dry_run)
+                self._run(cursor, create_index_sql(index, concurrently), dry_run)
+                created.append(index)
+                self.stdout.write(self.style.SUCCESS(f"{index.name}: {'would be created' if dry_run else 'created'}"))
+
+            if created and not dry_run:
+                # Fresh statistics so the planner picks the new indexes up right away.
+                for table in sorted({index.table for index in created}):
+                    cursor.execute(f"ANALYZE {table}")
+
+    def _run(self, cursor, sql, dry_run):
+        if dry_run:
+            self.stdout.write(f"{sql};")
+        else:
+            cursor.execute(sql)
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.query_plans import explain, hot_queries, seq_scans, table_sizes
+
+
+class Command(BaseCommand):
+    help = (
+        "EXPLAIN the hot queries of the views and queries.py against the current data "
+        "and fail if any of them sequentially scans a large table."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--min-rows",
+            type=int,
+            default=10000,
+            help="Tables with at least this many (estimated) rows count as large. Default: 10000.",
+        )
+
+    def handle(self, *args, **options):
+        min_rows = options["min_rows"]
+        sizes = table_sizes()
+        failures = []
+        for query in hot_queries():
+            plan = explain(query)
+            scanned = sorted(
+                table
+                for table in set(seq_scans(plan))
+                if sizes.get(table, 0) >= min_rows and table not in query.allow_seq_scan
+            )
+            if scanned:
+                failures.append(query.label)
+                self.stdout.write(self.style.ERROR(f"SEQ SCAN  {query.label}: {', '.join(scanned)}"))
+            else:
+                self.stdout.write(f"ok        {query.label} (cost {plan['Total Cost']:.0f})")
+            if options["verbosity"] >= 2:
+                self.stdout.write(f"          {query.sql.strip()}")
+
+        if failures:
+            raise CommandError(f"{len(failures)} hot queries scan a table with {min_rows}+ rows; see above.")
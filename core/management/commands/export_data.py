@@ -0,0 +1,48 @@
+import sys
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from core.exports import EXPORTS, ExportError, write_csv
+
+
+class Command(BaseCommand):
+    help = (
+        "Write a table (or view_job_applications) as CSV with COPY ... TO STDOUT, "
+        "to stdout unless --output is given. Memory use does not grow with the table."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("name", choices=sorted(EXPORTS))
+        parser.add_argument("--since", type=date.fromisoformat, help="Only rows dated on or after (YYYY-MM-DD).")
+        parser.add_argument("--until", type=date.fromisoformat, help="Only rows dated on or before (YYYY-MM-DD).")
+        parser.add_argument("--gzip", action="store_true", help="Compress the output.")
+        parser.add_argument("--output", "-o", help="File to write (default: stdout).")
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        export = EXPORTS[options["name"]]
+        started = time.monotonic()
+        try:
+            if options["output"]:
+                with open(options["output"], "wb") as out:
+                    self.write(out, export, options)
+            else:
+                self.write(sys.stdout.buffer, export, options)
+                sys.stdout.buffer.flush()
+        except ExportError as error:
+            raise CommandError(str(error))
+        # stderr, so the CSV on stdout stays clean.
+        self.stderr.write(f"{export.name}: exported in {time.monotonic() - started:.2f}s")
+
+    def write(self, out, export, options):
+        write_csv(
+            out,
+            export,
+            since=options["since"],
+            until=options["until"],
+            compress=options["gzip"],
+            using=options["database"],
+        )
@@ -0,0 +1,106 @@
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from core import listings, matching
+from core.indexes import INDEXES
+from core.synthetic import EMAIL_DOMAIN, TABLE_COLUMNS, SyntheticData, copy_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a realistic synthetic dataset (users, caregivers, members, addresses, jobs, "
+        "applications, appointments) and load it with COPY. Scales from 10k to 10M users."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10_000, help="Number of users to create. Default: 10000.")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed; the same seed gives the same data.")
+        parser.add_argument("--chunk-size", type=int, default=50_000, help="Rows per COPY statement.")
+        parser.add_argument(
+            "--password",
+            default="synthetic",
+            help="Password of every generated user (hashed once). Default: synthetic.",
+        )
+        parser.add_argument(
+            "--truncate",
+            action="store_true",
+            help="Empty every table first (like setup/populate.py) instead of adding to existing data.",
+        )
+        parser.add_argument(
+            "--remove",
+            action="store_true",
+            help=f"Delete previously generated users (@{EMAIL_DOMAIN}) and everything that cascades from them.",
+        )
+        parser.add_argument(
+            "--defer-indexes",
+            action="store_true",
+            help="Drop the managed secondary indexes during the load and rebuild them afterwards (faster).",
+        )
+
+    def handle(self, *args, **options):
+        if options["remove"]:
+            with connection.cursor() as cursor:
+                cursor.execute("DELETE FROM users WHERE email LIKE %s", [f"%@{EMAIL_DOMAIN}"])
+                self.stdout.write(f"Removed {cursor.rowcount} generated users.")
+            matching.invalidate()
+            listings.jobs_changed()
+            return
+
+        started = time.monotonic()
+        with connection.cursor() as cursor:
+            if options["truncate"]:
+                cursor.execute(f"TRUNCATE TABLE {', '.join(reversed(TABLE_COLUMNS))} CASCADE")
+            if options["defer_indexes"]:
+                for index in INDEXES:
+                    cursor.execute(f"DROP INDEX IF EXISTS {index.name}")
+
+            data = SyntheticData(
+                users=options["users"],
+                first_user_id=self._next_id(cursor, "users", "user_id"),
+                first_job_id=self._next_id(cursor, "jobs", "job_id"),
+                first_appointment_id=self._next_id(cursor, "appointments", "appointment_id"),
+                password=make_password(options["password"]),
+                today=timezone.now().date(),
+                seed=options["seed"],
+            )
+            for table, columns in TABLE_COLUMNS.items():
+                table_started = time.monotonic()
+                count = copy_rows(
+                    cursor,
+                    table,
+                    columns,
+                    data.rows(table),
+                    options["chunk_size"],
+                    progress=self._progress(table, options["verbosity"]),
+                )
+                self.stdout.write(f"{table}: {count} rows in {time.monotonic() - table_started:.1f}s")
+
+        call_command("sync_sequences", stdout=self.stdout)
+        if options["defer_indexes"]:
+            call_command("apply_indexes", stdout=self.stdout, stderr=self.stderr)
+        with connection.cursor() as cursor:
+            for table in TABLE_COLUMNS:
+                cursor.execute(f"ANALYZE {table}")
+        # COPY bypasses the signals that keep matching indexes and job listings current.
+        matching.invalidate()
+        listings.jobs_changed()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Done in {time.monotonic() - started:.1f}s. Generated users have @{EMAIL_DOMAIN} "
+                f"emails and password {options['password']!r}."
+            )
+        )
+
+    def _progress(self, table, verbosity):
+        if verbosity < 2:
+            return None
+        return lambda total: self.stdout.write(f"  {table}: {total} rows")
+
+    def _next_id(self, cursor, table, column):
+        cursor.execute(f"SELECT COALESCE(MAX({column}), 0) + 1 FROM {table}")
+        return cursor.fetchone()[0]
@@ -0,0 +1,61 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from core.importer import BATCH_SIZE, import_records
+
+SHOWN_REJECTIONS = 20
+
+
+class Command(BaseCommand):
+    help = (
+        "Import fixture-shaped records (data.json, or a partner feed as a JSON array or NDJSON) in batches, "
+        "matching users by email. Rejected records are reported, not fatal."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="A .json array of records, or .ndjson/.jsonl with one record per line.")
+        parser.add_argument(
+            "--batch-size", type=int, default=BATCH_SIZE, help=f"Records per INSERT. Default: {BATCH_SIZE}."
+        )
+        parser.add_argument(
+            "--update",
+            action="store_true",
+            help="Overwrite existing users (by email) and rows (by key) instead of skipping them.",
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Validate and write, then roll everything back.")
+        parser.add_argument("--rejects", help="Write every rejected record's position and reason here, as NDJSON.")
+
+    def handle(self, *args, **options):
+        rejects = open(options["rejects"], "w", encoding="utf-8") if options["rejects"] else None
+        try:
+            report = import_records(
+                options["path"],
+                update=options["update"],
+                batch_size=options["batch_size"],
+                dry_run=options["dry_run"],
+                on_reject=(lambda rejection: rejects.write(json.dumps(rejection._asdict()) + "\n")) if rejects else None,
+            )
+        finally:
+            if rejects:
+                rejects.close()
+
+        for model, stats in report.models.items():
+            line = (
+                f"{model}: {stats.read} read, {stats.written} written, {stats.skipped} skipped, "
+                f"{stats.rejected} rejected"
+            )
+            if stats.merged:
+                line += f", {stats.merged} duplicates merged"
+            if stats.seconds:
+                line += f" ({stats.rows_per_second:,.0f} rows/s)"
+            self.stdout.write(line)
+        rate = report.total / report.seconds if report.seconds else 0
+        verb = "Checked (dry run, rolled back)" if options["dry_run"] else "Imported"
+        self.stdout.write(f"{verb} {report.total} records in {report.seconds:.2f}s ({rate:,.0f} records/s).")
+
+        for rejection in report.rejections[:SHOWN_REJECTIONS]:
+            self.stderr.write(f"  #{rejection.position} {rejection.model} pk={rejection.pk}: {rejection.reason}")
+        rejected = sum(stats.rejected for stats in report.models.values())
+        if rejected > SHOWN_REJECTIONS:
+            self.stderr.write(f"  ... {rejected - SHOWN_REJECTIONS} more rejected records.")
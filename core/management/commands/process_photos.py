@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.photos import pending_photos, process_staged_photo, purge_abandoned_uploads
+
+
+class Command(BaseCommand):
+    help = (
+        "Process caregiver photos left in the staging directory and purge abandoned uploads. "
+        "Use --loop to run as a standalone photo worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="keep polling the staging directory")
+        parser.add_argument("--interval", type=float, default=5.0, help="seconds between polls with --loop")
+        parser.add_argument(
+            "--abandoned-after",
+            type=int,
+            default=3600,
+            help="delete unclaimed .part uploads older than this many seconds",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            for path in pending_photos():
+                try:
+                    stored = process_staged_photo(path)
+                except Exception as exc:
+                    self.stderr.write(f"{path.name}: {exc}")
+                else:
+                    self.stdout.write(f"{path.name} -> {stored}")
+            purged = purge_abandoned_uploads(options["abandoned_after"])
+            if purged:
+                self.stdout.write(f"purged {purged} abandoned uploads")
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from core.reports import REPORT_VIEWS, create_sql, existing_views, refresh_sql
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the reporting materialized views in core/reports.py that are missing and "
+        "refresh the others concurrently (readers are not blocked). Run it from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("names", nargs="*", help="Only these reports (default: all).")
+        parser.add_argument(
+            "--blocking",
+            action="store_true",
+            help="Plain REFRESH: faster, but locks readers out until it finishes.",
+        )
+
+    def handle(self, *args, **options):
+        views = REPORT_VIEWS
+        if options["names"]:
+            known = {view.name for view in REPORT_VIEWS}
+            unknown = sorted(set(options["names"]) - known)
+            if unknown:
+                raise CommandError(f"Unknown reports: {', '.join(unknown)}. Known: {', '.join(sorted(known))}.")
+            views = [view for view in REPORT_VIEWS if view.name in options["names"]]
+
+        with connection.cursor() as cursor:
+            existing = existing_views(cursor)
+            for view in views:
+                started = time.monotonic()
+                if view.name in existing:
+                    cursor.execute(refresh_sql(view, concurrently=not options["blocking"]))
+                    action = "refreshed"
+                else:
+                    with transaction.atomic():
+                        for sql in create_sql(view):
+                            cursor.execute(sql)
+                    action = "created"
+                self.stdout.write(f"{view.name}: {action} in {time.monotonic() - started:.2f}s")
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+# (table, serial column) pairs whose sequences can fall behind explicit-id seeding.
+SERIAL_COLUMNS = [
+    ("users", "user_id"),
+    ("jobs", "job_id"),
+    ("appointments", "appointment_id"),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Move the users/jobs/appointments id sequences past the highest existing id. "
+        "Run once after seeding rows with explicit ids (setup/populate.py, loaddata data.json)."
+    )
+
+    def handle(self, *args, **options):
+        with transaction.atomic(), connection.cursor() as cursor:
+            for table, column in SERIAL_COLUMNS:
+                # Block concurrent inserts so no id is handed out between MAX() and setval().
+                cursor.execute(f"LOCK TABLE {table} IN EXCLUSIVE MODE")
+                cursor.execute(
+                    f"SELECT setval(pg_get_serial_sequence(%s, %s), "
+                    f"COALESCE(MAX({column}), 0) + 1, false) FROM {table}",
+                    [table, column],
+                )
+                next_id = cursor.fetchone()[0]
+                self.stdout.write(f"{table}.{column}: next id {next_id}")
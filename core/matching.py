@@ -0,0 +1,422 @@
+"""
+In-memory caregiver-to-job matching.
+
+MatchingIndex keeps every caregiver as one row of a per-caregiving-type
+Partition: parallel numpy arrays of ids, city codes, hourly rates and the
+experience and profile signals. Ranking the caregivers for a job is a handful
+of vectorized operations over the partition of the job's type, scored in
+batches of MATCHING_BATCH_SIZE rows with a running top-k, so no SQL runs
+per candidate.
+
+Each process builds its index from the database on first use and then keeps
+it current incrementally: the signals in core.signals (and views that change
+caregiver data with raw SQL) call `caregiver_changed()`, which appends the id
+to a change log in the cache, and `get_index()` re-reads just those
+caregivers before the next ranking. Bulk loads call `invalidate()` to force a
+rebuild; rebuilds after the first run in a background thread, and requests
+keep ranking with the old index until the new one is swapped in. As with identity versions, the cache backend must be shared between
+workers for changes to reach all of them; MATCHING_REBUILD_SECONDS bounds how
+stale an index can get otherwise.
+"""
+import math
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+# Score = sum of weighted signals, each in [0, 1].
+CITY_WEIGHT = 3.0
+APPLIED_WEIGHT = 2.0
+EXPERIENCE_WEIGHT = 1.0
+AFFORDABILITY_WEIGHT = 1.0
+PROFILE_WEIGHT = 0.5
+# Accepted appointments beyond this count add no more experience.
+EXPERIENCE_SATURATION = 20
+# Rates at or above this percentile of the caregiving type score no affordability.
+RATE_CAP_PERCENTILE = 95
+
+GENERATION_KEY = "matching:generation"
+CHANGES_KEY = "matching:changes"
+CHANGE_TIMEOUT = 24 * 60 * 60
+
+CAREGIVER_COLUMNS = """
+    c.caregiver_user_id, c.caregiving_type, UPPER(u.city), c.hourly_rate,
+    COALESCE(c.photo, '') <> '', COALESCE(u.profile_description, '') <> ''
+"""
+ALL_CAREGIVERS_SQL = f"""
+    SELECT {CAREGIVER_COLUMNS}, COALESCE(a.accepted, 0)
+    FROM caregivers c
+    JOIN users u ON u.user_id = c.caregiver_user_id
+    LEFT JOIN (
+        SELECT caregiver_user_id, COUNT(*) AS accepted
+        FROM appointments
+        WHERE status = 'Accepted'
+        GROUP BY caregiver_user_id
+    ) a ON a.caregiver_user_id = c.caregiver_user_id
+"""
+CHANGED_CAREGIVERS_SQL = f"""
+    SELECT {CAREGIVER_COLUMNS},
+           (SELECT COUNT(*) FROM appointments a
+            WHERE a.caregiver_user_id = c.caregiver_user_id AND a.status = 'Accepted')
+    FROM caregivers c
+    JOIN users u ON u.user_id = c.caregiver_user_id
+    WHERE c.caregiver_user_id = ANY(%s)
+"""
+JOB_CONTEXT_SQL = """
+    SELECT UPPER(u.city), ARRAY(SELECT caregiver_user_id FROM job_applications WHERE job_id = %s)
+    FROM users u
+    WHERE u.user_id = %s
+"""
+
+Columns = namedtuple("Columns", "ids cities base")
+
+
+class Partition:
+    """
+    The caregivers of one caregiving type as parallel arrays. Rows
+    [0, size) are in use; removed caregivers stay as inactive rows until the
+    next rebuild, and appends grow the arrays by doubling.
+    """
+
+    def __init__(self, ids, cities, rates, experience, profile):
+        self.size = len(ids)
+        self.ids = np.asarray(ids, dtype=np.int32)
+        self.cities = np.asarray(cities, dtype=np.int32)
+        self.rates = np.asarray(rates, dtype=np.float32)
+        self.experience = np.asarray(experience, dtype=np.float32)
+        self.profile = np.asarray(profile, dtype=np.float32)
+        known_rates = self.rates[~np.isnan(self.rates)]
+        cap = float(np.percentile(known_rates, RATE_CAP_PERCENTILE)) if len(known_rates) else 0.0
+        self.rate_cap = max(cap, 1.0)
+        # The job-independent part of the score, kept up to date by set();
+        # removed caregivers score -inf.
+        self.base = _base_score(self.rates, self.experience, self.profile, self.rate_cap)
+
+    def columns(self):
+        """
+        The rows in use. Readers take this once, so a concurrent append that
+        grows the arrays can't hand them columns of different lengths.
+        """
+        size = self.size
+        return Columns(self.ids[:size], self.cities[:size], self.base[:size])
+
+    def set(self, position, city, rate, experience, profile):
+        self.cities[position] = city
+        self.rates[position] = rate
+        self.experience[position] = experience
+        self.profile[position] = profile
+        self.base[position] = _base_score(
+            self.rates[position], self.experience[position], self.profile[position], self.rate_cap
+        )
+
+    def deactivate(self, position):
+        self.base[position] = -np.inf
+
+    def append(self, caregiver_user_id, city, rate, experience, profile):
+        if self.size == len(self.ids):
+            self._grow(max(16, 2 * self.size))
+        position = self.size
+        self.ids[position] = caregiver_user_id
+        self.set(position, city, rate, experience, profile)
+        self.size += 1
+        return position
+
+    def _grow(self, capacity):
+        for name in ("ids", "cities", "rates", "experience", "profile", "base"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[: self.size] = old[: self.size]
+            setattr(self, name, new)
+
+
+class MatchingIndex:
+    """
+    Caregivers partitioned by caregiving type, with city names interned as
+    integer codes and per-id lookup arrays for incremental updates.
+    """
+
+    def __init__(self, generation=None, changes_seen=0):
+        self.generation = generation
+        self.changes_seen = changes_seen
+        self.built_at = time.monotonic()
+        self.partitions = {}
+        self.kinds = []
+        self.city_codes = {}
+        # Indexed by caregiver_user_id: position in kinds (-1 if absent) and row in that partition.
+        self.kind_of = np.full(0, -1, dtype=np.int16)
+        self.position_of = np.full(0, -1, dtype=np.int32)
+
+    def __len__(self):
+        return int(np.count_nonzero(self.kind_of >= 0))
+
+    def load(self, rows):
+        """
+        Fill an empty index from caregiver rows (see ALL_CAREGIVERS_SQL).
+        """
+        grouped = {}
+        for caregiver_user_id, kind, city, rate, has_photo, described, accepted in rows:
+            columns = grouped.setdefault(kind or "", ([], [], [], [], []))
+            columns[0].append(caregiver_user_id)
+            columns[1].append(self._city_code(city))
+            columns[2].append(_rate(rate))
+            columns[3].append(_experience(accepted))
+            columns[4].append(_profile(has_photo, described))
+        for kind, columns in grouped.items():
+            partition = self.partitions[kind] = Partition(*columns)
+            self._ensure_capacity(int(partition.ids.max()))
+            self.kind_of[partition.ids] = self._kind_code(kind)
+            self.position_of[partition.ids] = np.arange(partition.size, dtype=np.int32)
+
+    def upsert(self, rows):
+        for caregiver_user_id, kind, city, rate, has_photo, described, accepted in rows:
+            kind = kind or ""
+            signals = (self._city_code(city), _rate(rate), _experience(accepted), _profile(has_photo, described))
+            current = self._locate(caregiver_user_id)
+            if current and current[0] == kind:
+                current[1].set(current[2], *signals)
+                continue
+            if current:
+                current[1].deactivate(current[2])
+            partition = self.partitions.get(kind)
+            if partition is None:
+                partition = self.partitions[kind] = Partition([], [], [], [], [])
+            self._ensure_capacity(caregiver_user_id)
+            self.position_of[caregiver_user_id] = partition.append(caregiver_user_id, *signals)
+            self.kind_of[caregiver_user_id] = self._kind_code(kind)
+
+    def remove(self, caregiver_user_ids):
+        for caregiver_user_id in caregiver_user_ids:
+            current = self._locate(caregiver_user_id)
+            if current:
+                current[1].deactivate(current[2])
+                self.kind_of[caregiver_user_id] = -1
+
+    def reload(self, caregiver_user_ids):
+        """
+        Re-read `caregiver_user_ids` from the database; ids that are no longer
+        caregivers are removed.
+        """
+        caregiver_user_ids = set(caregiver_user_ids)
+        with connection.cursor() as cursor:
+            cursor.execute(CHANGED_CAREGIVERS_SQL, [list(caregiver_user_ids)])
+            rows = cursor.fetchall()
+        self.upsert(rows)
+        self.remove(caregiver_user_ids - {row[0] for row in rows})
+
+    def top(self, caregiving_type, city, k, applicant_ids=()):
+        """
+        The `k` best caregivers of `caregiving_type` for a job in `city`, as
+        [(caregiver_user_id, score)], best first (ties by id). Caregivers in
+        `applicant_ids` already applied to the job and get APPLIED_WEIGHT.
+        """
+        partition = self.partitions.get(caregiving_type)
+        if partition is None or k < 1:
+            return []
+        columns = partition.columns()
+        city_code = self.city_codes.get((city or "").upper(), -1)
+        applied = self._positions(caregiving_type, applicant_ids)
+
+        scores, positions = [], []
+        batch = settings.MATCHING_BATCH_SIZE
+        for start in range(0, len(columns.ids), batch):
+            end = min(start + batch, len(columns.ids))
+            score = (columns.cities[start:end] == city_code) * np.float32(CITY_WEIGHT)
+            score += columns.base[start:end]
+            hits = applied[(applied >= start) & (applied < end)]
+            score[hits - start] += APPLIED_WEIGHT
+            best = np.argpartition(score, -k)[-k:] if end - start > k else np.arange(end - start)
+            scores.append(score[best])
+            positions.append(best + start)
+
+        scores = np.concatenate(scores)
+        positions = np.concatenate(positions)
+        keep = np.isfinite(scores)
+        scores, ids = scores[keep], columns.ids[positions[keep]]
+        order = np.lexsort((ids, -scores))[:k]
+        return [(int(ids[i]), float(scores[i])) for i in order]
+
+    def _positions(self, kind, caregiver_user_ids):
+        ids = np.asarray([i for i in caregiver_user_ids if i < len(self.kind_of)], dtype=np.int64)
+        if kind not in self.kinds or not len(ids):
+            return np.empty(0, dtype=np.int64)
+        ids = ids[self.kind_of[ids] == self.kinds.index(kind)]
+        return self.position_of[ids].astype(np.int64)
+
+    def _locate(self, caregiver_user_id):
+        if caregiver_user_id >= len(self.kind_of) or self.kind_of[caregiver_user_id] < 0:
+            return None
+        kind = self.kinds[self.kind_of[caregiver_user_id]]
+        return kind, self.partitions[kind], int(self.position_of[caregiver_user_id])
+
+    def _ensure_capacity(self, caregiver_user_id):
+        if caregiver_user_id < len(self.kind_of):
+            return
+        capacity = max(caregiver_user_id + 1, 2 * len(self.kind_of))
+        kind_of = np.full(capacity, -1, dtype=np.int16)
+        position_of = np.full(capacity, -1, dtype=np.int32)
+        kind_of[: len(self.kind_of)] = self.kind_of
+        position_of[: len(self.position_of)] = self.position_of
+        self.kind_of, self.position_of = kind_of, position_of
+
+    def _kind_code(self, kind):
+        if kind not in self.kinds:
+            self.kinds.append(kind)
+        return self.kinds.index(kind)
+
+    def _city_code(self, city):
+        return self.city_codes.setdefault(city or "", len(self.city_codes))
+
+
+def _base_score(rates, experience, profile, rate_cap):
+    # Unknown rates count as expensive.
+    affordability = 1 - np.minimum(np.nan_to_num(rates / np.float32(rate_cap), nan=1.0), 1)
+    return np.float32(EXPERIENCE_WEIGHT) * experience + np.float32(PROFILE_WEIGHT) * profile + (
+        np.float32(AFFORDABILITY_WEIGHT) * affordability
+    )
+
+
+def _rate(rate):
+    return math.nan if rate is None else float(rate)
+
+
+def _experience(accepted):
+    return min(math.log1p(accepted) / math.log1p(EXPERIENCE_SATURATION), 1.0)
+
+
+def _profile(has_photo, described):
+    return (bool(has_photo) + bool(described)) / 2
+
+
+def caregiver_changed(caregiver_user_id):
+    """
+    Queue `caregiver_user_id` for re-reading by every process's index.
+    """
+    cache.add(CHANGES_KEY, 0, None)
+    number = cache.incr(CHANGES_KEY)
+    cache.set(_change_key(number), caregiver_user_id, CHANGE_TIMEOUT)
+
+
+def invalidate():
+    """
+    Make every process rebuild its index, e.g. after a bulk load.
+    """
+    cache.set(GENERATION_KEY, time.time_ns(), None)
+
+
+def build_index(generation=None, changes_seen=0):
+    index = MatchingIndex(generation, changes_seen)
+    # A server-side cursor streams the rows, unless PgBouncer's transaction mode rules it out.
+    if connection.settings_dict.get("DISABLE_SERVER_SIDE_CURSORS"):
+        cursor = connection.cursor()
+    else:
+        cursor = connection.chunked_cursor()
+    with cursor:
+        cursor.execute(ALL_CAREGIVERS_SQL)
+        index.load(_iter_rows(cursor))
+    return index
+
+
+_index = None
+_index_lock = threading.Lock()
+# The thread building a replacement for _index, if any.
+_rebuilding = None
+
+
+def get_index():
+    """
+    This process's index, built on first use and brought up to date with the
+    change log on every call. When it needs a rebuild instead, one starts in
+    the background and the current index is returned meanwhile.
+    """
+    global _index
+    state = cache.get_many([GENERATION_KEY, CHANGES_KEY])
+    generation, changes = state.get(GENERATION_KEY), state.get(CHANGES_KEY, 0)
+    with _index_lock:
+        if _index is None:
+            # There is nothing to serve until the first build is done.
+            _index = build_index(generation, changes)
+        elif not _sync(_index, generation, changes):
+            _start_rebuild(generation, changes)
+        return _index
+
+
+def rank_caregivers(job, k):
+    """
+    The `k` best caregivers for `job` as [(caregiver_user_id, score)], best first.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(JOB_CONTEXT_SQL, [job.job_id, job.member_id])
+        row = cursor.fetchone()
+    city, applicant_ids = row if row else ("", [])
+    return get_index().top(job.required_caregiving_type, city, k, applicant_ids)
+
+
+def _sync(index, generation, changes):
+    """
+    Apply the changes logged since `index` was last synced. Return False if
+    it needs a rebuild instead.
+    """
+    if (
+        index.generation != generation
+        or changes < index.changes_seen
+        or changes - index.changes_seen > settings.MATCHING_MAX_CHANGES
+    ):
+        return False
+    if changes > index.changes_seen:
+        changed = _read_changes(index.changes_seen, changes)
+        if changed is None:
+            return False
+        caregiver_user_ids, index.changes_seen = changed
+        if caregiver_user_ids:
+            index.reload(caregiver_user_ids)
+    return time.monotonic() - index.built_at <= settings.MATCHING_REBUILD_SECONDS
+
+
+def _start_rebuild(generation, changes):
+    global _rebuilding
+    if _rebuilding is None or not _rebuilding.is_alive():
+        _rebuilding = threading.Thread(target=_rebuild, args=(generation, changes), daemon=True)
+        _rebuilding.start()
+
+
+def _rebuild(generation, changes):
+    global _index
+    try:
+        # Changes logged while the build reads the tables are re-applied by
+        # the next get_index(); reloading is idempotent.
+        index = build_index(generation, changes)
+        with _index_lock:
+            _index = index
+    finally:
+        connection.close()
+
+
+def _read_changes(seen, latest):
+    """
+    Return (caregiver ids, last change number read) for the changes after
+    `seen`, or None if some have been lost. A missing entry at the end is a
+    change still being written and is read next time.
+    """
+    numbers = range(seen + 1, latest + 1)
+    found = cache.get_many([_change_key(number) for number in numbers])
+    last_found = max((number for number in numbers if _change_key(number) in found), default=seen)
+    caregiver_user_ids = []
+    for number in numbers:
+        key = _change_key(number)
+        if key not in found:
+            return None if number < last_found else (caregiver_user_ids, number - 1)
+        caregiver_user_ids.append(found[key])
+    return caregiver_user_ids, latest
+
+
+def _change_key(number):
+    return f"matching:change:{number}"
+
+
+def _iter_rows(cursor, size=10_000):
+    while rows := cursor.fetchmany(size):
+        yield from rows
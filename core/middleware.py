@@ -0,0 +1,165 @@
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from .db_router import PIN_COOKIE, SAFE_METHODS
+from .identity import resolve_identity
+from .sql_stats import QueryRecorder, check_request, log_request, view_totals
+
+
+class HybridMiddleware:
+    """
+    Base for middleware that runs natively in both modes: under ASGI an async
+    view then doesn't need a thread parked behind it for the whole request.
+    Subclasses implement `__call__` and `__acall__`.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise, but without forcing the whole middleware stack into sync mode
+    under ASGI (WhiteNoiseMiddleware is sync-only). Static files are still
+    served by WhiteNoise, in a thread; other requests pass straight through.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
+
+
+class QueryStatsMiddleware(HybridMiddleware):
+    """
+    Count and time the SQL each request runs (see core.sql_stats), warn when
+    a view goes over its budget or repeats a statement, and in DEBUG report
+    the numbers in X-DB-* response headers. Put it before any middleware
+    whose queries should be included (sessions, auth). Queries run while a
+    streaming response is iterated are not included.
+    """
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not settings.SQL_INSTRUMENTATION:
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        with self.recording(recorder):
+            response = self.get_response(request)
+        return self.finish(request, response, recorder)
+
+    async def __acall__(self, request):
+        if not settings.SQL_INSTRUMENTATION:
+            return await self.get_response(request)
+
+        recorder = QueryRecorder()
+        # Connections are per thread, and a request's sync_to_async ORM calls
+        # all run in the same one, so the wrappers are installed there.
+        stack = await sync_to_async(self.recording)(recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self.finish(request, response, recorder)
+
+    def recording(self, recorder):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        return stack
+
+    def finish(self, request, response, recorder):
+        match = getattr(request, "resolver_match", None)
+        view_name = (match and match.view_name) or "unresolved"
+        problems = check_request(view_name, recorder)
+        view_totals.add(view_name, recorder, bool(problems))
+        log_request(request, response, view_name, recorder, problems)
+        if settings.DEBUG:
+            response["X-DB-Query-Count"] = str(recorder.count)
+            response["X-DB-Time-Ms"] = f"{recorder.seconds * 1000:.2f}"
+            response["X-DB-Slowest-Ms"] = f"{recorder.slowest_seconds * 1000:.2f}"
+            response["X-DB-Repeated"] = str(len(recorder.repeated(settings.SQL_REPEAT_THRESHOLD)))
+            if problems:
+                response["X-DB-Budget-Exceeded"] = "; ".join(problems)[:1000]
+        return response
+
+
+class AppIdentityMiddleware(HybridMiddleware):
+    """
+    Attach the logged-in user's AppUser and role profiles to the request as
+    `request.app_user`, `request.caregiver` and `request.member` (None when
+    absent). Must come after AuthenticationMiddleware.
+    """
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        request.app_user, request.caregiver, request.member = resolve_identity(request)
+        # Async views served under WSGI still check login_required through
+        # request.auser(), which would load the user a second time.
+        user = request.user
+
+        async def auser():
+            return user
+
+        request.auser = auser
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        # login_required on async views goes through request.auser(); resolve
+        # it once and share it, so templates reading request.user don't query.
+        request.user = await request.auser()
+        request.app_user, request.caregiver, request.member = await sync_to_async(resolve_identity)(request)
+        return await self.get_response(request)
+
+
+class ReplicaPinMiddleware(HybridMiddleware):
+    """
+    After a request that may have written (an unsafe method), pin the
+    client's reads to the primary for REPLICA_STICKY_SECONDS; see
+    core.db_router.
+    """
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return self.pin(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.pin(request, await self.get_response(request))
+
+    def pin(self, request, response):
+        if request.method not in SAFE_METHODS and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                PIN_COOKIE, "1", max_age=settings.REPLICA_STICKY_SECONDS, httponly=True, samesite="Lax"
+            )
+        return response
@@ -1,9 +1,14 @@
+from django.conf import settings
 from django.db import models
+from django.utils.crypto import salted_hmac
 
 
 class AppUser(models.Model):
     """
     Maps to the `users` table.
+
+    Also the logged-in user (`request.user`) of the site; see
+    core.auth_backends. Only Django's own admin accounts live in auth_user.
     """
     user_id = models.AutoField(primary_key=True, db_column="user_id")
     email = models.EmailField(max_length=100, unique=True)
@@ -13,6 +18,12 @@ class AppUser(models.Model):
     phone_number = models.CharField(max_length=20, null=True, blank=True)
     profile_description = models.TextField(null=True, blank=True)
     password = models.CharField(max_length=100)
+    is_staff = models.BooleanField(default=False)
+
+    # What django.contrib.auth expects of a user.
+    is_active = True
+    is_anonymous = False
+    is_authenticated = True
 
     class Meta:
         managed = False  # table already exists; Django should not create/alter it
@@ -22,6 +33,31 @@ class AppUser(models.Model):
     def __str__(self):
         return f"{self.given_name} {self.surname}"
 
+    def get_username(self):
+        return self.email
+
+    def get_session_auth_hash(self):
+        # Changing the password logs out the user's other sessions.
+        return self._session_auth_hash()
+
+    def get_session_auth_fallback_hash(self):
+        for secret in settings.SECRET_KEY_FALLBACKS:
+            yield self._session_auth_hash(secret)
+
+    def _session_auth_hash(self, secret=None):
+        key_salt = "core.models.AppUser.get_session_auth_hash"
+        return salted_hmac(key_salt, self.password, secret=secret, algorithm="sha256").hexdigest()
+
+    # No admin permissions: /admin/ is for auth_user accounts.
+    def has_perm(self, perm, obj=None):
+        return False
+
+    def has_perms(self, perm_list, obj=None):
+        return False
+
+    def has_module_perms(self, app_label):
+        return False
+
 
 class Caregiver(models.Model):
     """
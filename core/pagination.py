@@ -0,0 +1,188 @@
+import base64
+import binascii
+import json
+from datetime import date
+
+from django.conf import settings
+from django.db.models import Q
+
+
+class KeysetPage:
+    """
+    One page of a keyset-paginated queryset.
+
+    `next_cursor` is an opaque token for the row after the last one on this
+    page, or None when this is the last page.
+    """
+
+    def __init__(self, items, next_cursor, page_size):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.page_size = page_size
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def encode_cursor(*parts):
+    raw = ":".join(str(part) for part in parts).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token, *types):
+    """
+    Split a cursor token into its parts, converting each with `types`.
+
+    Returns None if the token is missing or malformed (a bad token just
+    restarts at the first page).
+    """
+    if not token:
+        return None
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        parts = raw.split(":")
+        if len(parts) != len(types):
+            return None
+        return tuple(convert(part) for convert, part in zip(types, parts))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+
+
+def encode_job_cursor(date_posted, job_id):
+    return encode_cursor(date_posted.isoformat(), job_id)
+
+
+def decode_job_cursor(token):
+    """
+    Return (date_posted, job_id) for a cursor token, or None.
+    """
+    return decode_cursor(token, date.fromisoformat, int)
+
+
+def get_page_size(request, default=None):
+    default = default or settings.JOBS_PAGE_SIZE
+    try:
+        size = int(request.GET.get("page_size") or default)
+    except ValueError:
+        size = default
+    return max(1, min(size, settings.MAX_PAGE_SIZE))
+
+
+def paginate_jobs(jobs, cursor, page_size):
+    """
+    Keyset pagination over `jobs` ordered by (-date_posted, -job_id).
+
+    Seeks past the cursor row instead of using OFFSET, so every page is an
+    index range scan on (date_posted, job_id) regardless of depth.
+    """
+    rows, cursor_for = _jobs_window(jobs, cursor, page_size)
+    return _page(list(rows), page_size, cursor_for)
+
+
+async def apaginate_jobs(jobs, cursor, page_size):
+    """
+    paginate_jobs for async views.
+    """
+    rows, cursor_for = _jobs_window(jobs, cursor, page_size)
+    return _page([row async for row in rows], page_size, cursor_for)
+
+
+def paginate_caregivers(caregivers, cursor, page_size, ranked=False):
+    """
+    Keyset pagination over caregiver search results.
+
+    Unranked results are ordered by caregiver_user_id. Ranked results (those
+    annotated with `rank` by core.search) are ordered by (-rank, caregiver_user_id);
+    the rank is recomputed identically on every request, so it is a stable key.
+    """
+    rows, cursor_for = _caregivers_window(caregivers, cursor, page_size, ranked)
+    return _page(list(rows), page_size, cursor_for)
+
+
+async def apaginate_caregivers(caregivers, cursor, page_size, ranked=False):
+    """
+    paginate_caregivers for async views.
+    """
+    rows, cursor_for = _caregivers_window(caregivers, cursor, page_size, ranked)
+    return _page([row async for row in rows], page_size, cursor_for)
+
+
+def _jobs_window(jobs, cursor, page_size):
+    """
+    The unevaluated queryset for one page of jobs (plus one row to tell
+    whether there is a next page) and the function that makes a cursor.
+    """
+    position = decode_job_cursor(cursor)
+    if position:
+        date_posted, job_id = position
+        # The leading `<=` gives Postgres an index bound; the OR breaks ties.
+        jobs = jobs.filter(date_posted__lte=date_posted).filter(
+            Q(date_posted__lt=date_posted) | Q(job_id__lt=job_id)
+        )
+    rows = jobs.order_by("-date_posted", "-job_id")[: page_size + 1]
+    return rows, lambda last: encode_job_cursor(last.date_posted, last.job_id)
+
+
+def _caregivers_window(caregivers, cursor, page_size, ranked):
+    if ranked:
+        position = decode_cursor(cursor, float, int)
+        if position:
+            rank, user_id = position
+            caregivers = caregivers.filter(
+                Q(rank__lt=rank) | Q(rank=rank, caregiver_user_id__gt=user_id)
+            )
+        rows = caregivers.order_by("-rank", "caregiver_user_id")[: page_size + 1]
+        return rows, lambda last: encode_cursor(repr(last.rank), last.caregiver_user_id)
+
+    position = decode_cursor(cursor, int)
+    if position:
+        caregivers = caregivers.filter(caregiver_user_id__gt=position[0])
+    rows = caregivers.order_by("caregiver_user_id")[: page_size + 1]
+    return rows, lambda last: encode_cursor(last.caregiver_user_id)
+
+
+def _page(rows, page_size, cursor_for):
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = cursor_for(rows[-1])
+    return KeysetPage(rows, next_cursor, page_size)
+
+
+def estimated_count(queryset, exact_limit):
+    """
+    Count `queryset` without loading its rows.
+
+    Counts exactly up to `exact_limit` matches (the COUNT stops scanning
+    there). Past that, returns the planner's row estimate instead of scanning
+    the rest. Returns (count, is_estimate).
+    """
+    queryset = queryset.order_by()
+    bounded = queryset[: exact_limit + 1].count()
+    if bounded <= exact_limit:
+        return bounded, False
+    return _with_estimate(bounded, queryset.explain(format="json"))
+
+
+async def aestimated_count(queryset, exact_limit):
+    """
+    estimated_count for async views.
+    """
+    queryset = queryset.order_by()
+    bounded = await queryset[: exact_limit + 1].acount()
+    if bounded <= exact_limit:
+        return bounded, False
+    return _with_estimate(bounded, await queryset.aexplain(format="json"))
+
+
+def _with_estimate(bounded, plan):
+    estimate = int(json.loads(plan)[0]["Plan"]["Plan Rows"])
+    return max(estimate, bounded), True
@@ -0,0 +1,176 @@
+"""
+Caregiver photo pipeline.
+
+Registration streams the upload to a private staging directory before any
+database work and only schedules processing; a background worker thread then
+resizes it, writes content-hashed files under MEDIA_ROOT and updates
+Caregiver.photo. `manage.py process_photos` drains anything left in staging
+(e.g. after a restart) and can run as a standalone worker. A file that can't
+be decoded as an image is moved to FAILED_DIR in staging rather than retried.
+"""
+import hashlib
+import io
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+
+from .identity import bump_identity_version
+from .matching import caregiver_changed
+from .models import Caregiver
+
+logger = logging.getLogger(__name__)
+
+PHOTO_DIR = "caregiver_photos"
+# Staged files are renamed to "<caregiver_user_id>__<token><ext>" once the
+# registration commits; anything else in staging is an unclaimed upload.
+READY_SEPARATOR = "__"
+# Under the staging directory; kept for inspection, never processed again.
+FAILED_DIR = "failed"
+
+_queue = queue.Queue()
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def stage_upload(upload):
+    """
+    Stream `upload` into the staging directory and return the staged path.
+    """
+    staging = Path(settings.PHOTO_STAGING_ROOT)
+    staging.mkdir(parents=True, exist_ok=True)
+    suffix = Path(upload.name).suffix.lower()[:10]
+    path = staging / f"{uuid.uuid4().hex}{suffix}.part"
+    with open(path, "wb") as out:
+        for chunk in upload.chunks():
+            out.write(chunk)
+    return path
+
+
+def schedule_processing(caregiver_user_id, staged_path):
+    """
+    Hand a staged upload to the worker once the current transaction commits.
+    If it rolls back the file stays a `.part` and is purged by process_photos.
+    """
+    staged_path = Path(staged_path)
+    ready_path = staged_path.with_name(
+        f"{caregiver_user_id}{READY_SEPARATOR}{staged_path.name.removesuffix('.part')}"
+    )
+
+    def on_commit():
+        os.replace(staged_path, ready_path)
+        if settings.PHOTO_BACKGROUND_WORKER:
+            _enqueue(ready_path)
+
+    transaction.on_commit(on_commit)
+
+
+def pending_photos():
+    staging = Path(settings.PHOTO_STAGING_ROOT)
+    if not staging.is_dir():
+        return []
+    return sorted(p for p in staging.iterdir() if READY_SEPARATOR in p.name and not p.name.endswith(".part"))
+
+
+def purge_abandoned_uploads(max_age_seconds):
+    """
+    Delete `.part` files older than `max_age_seconds` (their registration
+    rolled back) and return how many were removed.
+    """
+    staging = Path(settings.PHOTO_STAGING_ROOT)
+    if not staging.is_dir():
+        return 0
+    cutoff = time.time() - max_age_seconds
+    removed = 0
+    for path in staging.glob("*.part"):
+        if path.stat().st_mtime < cutoff:
+            path.unlink(missing_ok=True)
+            removed += 1
+    return removed
+
+
+class UnreadablePhoto(Exception):
+    pass
+
+
+def process_staged_photo(ready_path):
+    """
+    Resize a staged photo, store it and its thumbnail under content-hashed
+    names, point Caregiver.photo at it and remove the staged file.
+
+    Raise UnreadablePhoto, after moving the file to FAILED_DIR, if it can't
+    be decoded (not an image, truncated, a decompression bomb); trying again
+    wouldn't help. Other errors leave it in staging to be retried.
+    """
+    ready_path = Path(ready_path)
+    caregiver_user_id = int(ready_path.name.split(READY_SEPARATOR, 1)[0])
+    storage = FileSystemStorage(location=settings.MEDIA_ROOT, base_url=settings.MEDIA_URL)
+
+    try:
+        with Image.open(ready_path) as image:
+            image = ImageOps.exif_transpose(image).convert("RGB")
+            full = _jpeg_bytes(image, settings.PHOTO_MAX_SIZE)
+            thumb = _jpeg_bytes(image, settings.PHOTO_THUMB_SIZE)
+    except Exception as error:
+        # Decoding only reads the file, so whatever fails here fails every time.
+        failed_path = ready_path.parent / FAILED_DIR / ready_path.name
+        failed_path.parent.mkdir(exist_ok=True)
+        os.replace(ready_path, failed_path)
+        raise UnreadablePhoto(f"{error.__class__.__name__}: {error}; moved to {failed_path}") from error
+
+    name = f"{hashlib.sha256(full).hexdigest()[:32]}.jpg"
+    full_path = f"{PHOTO_DIR}/{name}"
+    thumb_path = f"{PHOTO_DIR}/thumbs/{name}"
+    # Identical content maps to the same name, so an existing file is reused.
+    if not storage.exists(full_path):
+        storage.save(full_path, ContentFile(full))
+    if not storage.exists(thumb_path):
+        storage.save(thumb_path, ContentFile(thumb))
+
+    Caregiver.objects.filter(pk=caregiver_user_id).update(photo=storage.url(full_path))
+    bump_identity_version(caregiver_user_id)
+    # update() sends no post_save, and a photo counts towards matching.
+    caregiver_changed(caregiver_user_id)
+    ready_path.unlink(missing_ok=True)
+    return full_path
+
+
+def _jpeg_bytes(image, max_size):
+    resized = image.copy()
+    resized.thumbnail(max_size)
+    buffer = io.BytesIO()
+    resized.save(buffer, format="JPEG", quality=85, optimize=True)
+    return buffer.getvalue()
+
+
+def _enqueue(ready_path):
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_work, name="photo-worker", daemon=True)
+            _worker.start()
+    _queue.put(ready_path)
+
+
+def _work():
+    while True:
+        ready_path = _queue.get()
+        try:
+            process_staged_photo(ready_path)
+        except UnreadablePhoto as error:
+            logger.warning("Staged photo %s is unreadable: %s", ready_path, error)
+        except Exception:
+            # Left in staging for `manage.py process_photos` to retry.
+            logger.exception("Processing staged photo %s failed", ready_path)
+        finally:
+            close_old_connections()
+            _queue.task_done()
@@ -0,0 +1,87 @@
+"""
+PostgreSQL backend that checks connections out of a per-process pool.
+
+Django opens and closes its connection exactly as with the stock backend
+(CONN_MAX_AGE must be 0), but opening checks a connection out of a
+SQLAlchemy QueuePool and closing returns it. A worker process therefore
+holds at most SIZE + MAX_OVERFLOW server connections however many threads
+it runs, and reuses them across requests. Options come from the "POOL" key
+of the database settings (see DATABASE_POOL in caregiver_site/settings.py);
+`pool_status()` reports how each pool is used.
+"""
+import threading
+
+from django.db.backends.postgresql import base
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+
+# Keyed by (alias, connection parameters), so changing a database's settings
+# (as the test runner does with NAME) gets a new pool.
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    _checkout = None
+
+    def get_new_connection(self, conn_params):
+        key = (self.alias, repr(sorted(conn_params.items())))
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                options = self.settings_dict["POOL"]
+                pool = _pools[key] = QueuePool(
+                    # The stock backend's connect, so fresh connections are set up the same way.
+                    lambda: super(DatabaseWrapper, self).get_new_connection(conn_params),
+                    pool_size=options["SIZE"],
+                    max_overflow=options["MAX_OVERFLOW"],
+                    timeout=options["TIMEOUT"],
+                    recycle=options["RECYCLE"],
+                )
+                if options["PRE_PING"]:
+                    event.listen(pool, "checkout", _ping)
+        self._checkout = pool.connect()
+        return self._checkout.dbapi_connection
+
+    def _close(self):
+        if self._checkout is None:
+            return super()._close()
+        checkout, self._checkout = self._checkout, None
+        with self.wrap_database_errors:
+            # Back to the pool, which rolls back anything left open.
+            checkout.close()
+
+    def close_pool(self):
+        with _pools_lock:
+            for key in [key for key in _pools if key[0] == self.alias]:
+                _pools.pop(key).dispose()
+
+
+def _ping(dbapi_connection, connection_record, connection_proxy):
+    # The pool's own pre_ping needs a SQLAlchemy dialect; raising
+    # DisconnectionError makes it discard the connection and try another.
+    try:
+        with dbapi_connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        if not dbapi_connection.autocommit:
+            dbapi_connection.rollback()
+    except base.Database.Error as error:
+        raise exc.DisconnectionError() from error
+
+
+def pool_status():
+    """
+    {alias: usage counters} for the pools of this process.
+    """
+    with _pools_lock:
+        pools = list(_pools.items())
+    return {
+        alias: {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            # QueuePool counts overflow from -size while the pool fills up.
+            "overflow": max(0, pool.overflow()),
+        }
+        for (alias, _), pool in pools
+    }
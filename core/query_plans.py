@@ -0,0 +1,214 @@
+"""
+EXPLAIN checks for the hot query paths.
+
+`hot_queries()` runs the read paths the views use (through the same helpers,
+so the SQL is exactly what a request sends) with parameters sampled from the
+current data, and adds the write statements and the reporting queries from
+queries.py as plain SQL. `manage.py check_query_plans` EXPLAINs each one and
+fails if a large table is read with a sequential scan.
+"""
+import json
+from collections import namedtuple
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from . import views
+from .models import AppUser, Job
+from .pagination import encode_cursor, encode_job_cursor, paginate_caregivers, paginate_jobs
+from .search import count_caregivers, find_caregivers
+
+HotQuery = namedtuple("HotQuery", "label sql params allow_seq_scan", defaults=((), ()))
+
+PAGE_SIZE = 50
+
+# Reporting queries from queries.py. Each one reads a large share of the
+# tables in its allow_seq_scan (a third of all appointments or jobs, or a
+# LIKE '%...%' no b-tree can serve), where a scan is the right plan; every
+# other table it touches must still be reached through an index.
+REPORT_QUERIES = [
+    HotQuery(
+        "queries.py 5.3 work hours for babysitters",
+        """
+        SELECT a.appointment_id, a.work_hours
+        FROM appointments a
+        JOIN caregivers c ON a.caregiver_user_id = c.caregiver_user_id
+        WHERE c.caregiving_type = 'Babysitter'
+        """,
+        allow_seq_scan=("appointments",),
+    ),
+    HotQuery(
+        "queries.py 5.4 members in Astana looking for elderly care",
+        """
+        SELECT DISTINCT u.given_name, u.surname, u.city, m.house_rules
+        FROM members m
+        JOIN users u ON m.member_user_id = u.user_id
+        JOIN jobs j ON m.member_user_id = j.member_user_id
+        WHERE u.city = 'Astana'
+          AND m.house_rules LIKE '%No pets%'
+          AND j.required_caregiving_type = 'Elderly Care'
+        """,
+        allow_seq_scan=("members", "jobs"),
+    ),
+    HotQuery(
+        "queries.py 8 job applications view, one job",
+        """
+        SELECT j.job_id, u_mem.given_name AS employer, u_app.given_name AS applicant_name, ja.date_applied
+        FROM job_applications ja
+        JOIN jobs j ON ja.job_id = j.job_id
+        JOIN users u_mem ON j.member_user_id = u_mem.user_id
+        JOIN users u_app ON ja.caregiver_user_id = u_app.user_id
+        WHERE ja.job_id = (SELECT MAX(job_id) FROM job_applications)
+        """,
+    ),
+]
+
+
+def hot_queries():
+    """
+    Return the HotQuery list for the current database. Paths whose sample
+    rows don't exist (e.g. an empty jobs table) are left out.
+    """
+    queries = []
+    samples = _samples()
+
+    def capture(label, run):
+        with CaptureQueriesContext(connection) as captured:
+            run()
+        # Paths like estimated_count() run their own EXPLAIN; its query is already captured.
+        statements = [query["sql"] for query in captured.captured_queries if not query["sql"].startswith("EXPLAIN")]
+        for n, sql in enumerate(statements, 1):
+            suffix = f" [{n}]" if len(statements) > 1 else ""
+            queries.append(HotQuery(f"{label}{suffix}", sql))
+
+    if samples["email"]:
+        capture(
+            "login / identity lookup",
+            lambda: AppUser.objects.select_related("caregiver_profile", "member_profile")
+            .filter(email=samples["email"])
+            .first(),
+        )
+
+    jobs = Job.objects.select_related("member__member_user")
+    capture("jobs_list first page", lambda: paginate_jobs(jobs, None, PAGE_SIZE))
+    if samples["job"]:
+        date_posted, job_id = samples["job"]
+        cursor = encode_job_cursor(date_posted, job_id)
+        capture("jobs_list deep page", lambda: paginate_jobs(jobs, cursor, PAGE_SIZE))
+    if samples["caregiving_type"]:
+        by_type = jobs.filter(required_caregiving_type=samples["caregiving_type"])
+        capture("jobs_list by caregiving type", lambda: paginate_jobs(by_type, None, PAGE_SIZE))
+    if samples["caregiver"]:
+        capture("jobs_list applied job ids", lambda: views._fetch_applied_job_ids(samples["caregiver"]))
+        queries.append(
+            HotQuery("apply to jobs", views.APPLY_TO_JOBS_SQL, [[samples["job"][1]], samples["caregiver"]])
+        )
+
+    if samples["member"]:
+        member_jobs = Job.objects.filter(member_id=samples["member"])
+        capture("member_jobs page", lambda: paginate_jobs(member_jobs, None, PAGE_SIZE))
+        job_ids = list(member_jobs.order_by("-date_posted", "-job_id").values_list("job_id", flat=True)[:PAGE_SIZE])
+        capture("member_jobs applicant counts", lambda: views._fetch_applicant_counts(job_ids))
+    if samples["applied_job"]:
+        capture("job_applicants page", lambda: views._fetch_applicants_page(samples["applied_job"], 0, PAGE_SIZE + 1))
+
+    if samples["booking"]:
+        caregiver_user_id, day = samples["booking"]
+        capture("caregiver bookings for a day", lambda: views._fetch_bookings(caregiver_user_id, day))
+
+    if samples["caregiving_type"]:
+        caregiving_type = samples["caregiving_type"]
+        capture(
+            "search by caregiving type",
+            lambda: paginate_caregivers(find_caregivers(caregiving_type=caregiving_type), None, PAGE_SIZE),
+        )
+        capture(
+            "search by caregiving type, deep page",
+            lambda: paginate_caregivers(
+                find_caregivers(caregiving_type=caregiving_type), encode_cursor(samples["caregiver"] or 0), PAGE_SIZE
+            ),
+        )
+    if samples["city"]:
+        capture(
+            "search by city",
+            lambda: paginate_caregivers(find_caregivers(city=samples["city"]), None, PAGE_SIZE),
+        )
+    if samples["word"]:
+        capture(
+            "search by keyword",
+            lambda: paginate_caregivers(find_caregivers(q=samples["word"]), None, PAGE_SIZE, ranked=True),
+        )
+        capture("search by keyword, count", lambda: count_caregivers(q=samples["word"]))
+
+    return queries + REPORT_QUERIES
+
+
+def explain(query):
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {query.sql}", query.params or None)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+
+def seq_scans(plan):
+    """
+    Yield the relation name of every sequential scan in an EXPLAIN plan tree.
+    """
+    if plan["Node Type"] == "Seq Scan":
+        yield plan["Relation Name"]
+    for child in plan.get("Plans", ()):
+        yield from seq_scans(child)
+
+
+def table_sizes():
+    """
+    Return {table: estimated rows} from the planner statistics.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT relname, reltuples::bigint FROM pg_class "
+            "WHERE relkind = 'r' AND relnamespace = current_schema()::regnamespace"
+        )
+        return dict(cursor.fetchall())
+
+
+def _samples():
+    with connection.cursor() as cursor:
+        return {
+            "email": _first(cursor, "SELECT email FROM users ORDER BY user_id DESC LIMIT 1"),
+            # The median job, so a deep page has rows on both sides of the cursor.
+            "job": _first_row(
+                cursor,
+                "SELECT date_posted, job_id FROM jobs ORDER BY date_posted, job_id "
+                "OFFSET (SELECT COUNT(*) / 2 FROM jobs) LIMIT 1",
+            ),
+            "caregiving_type": _first(
+                cursor, "SELECT caregiving_type FROM caregivers WHERE caregiving_type IS NOT NULL LIMIT 1"
+            ),
+            "caregiver": _first(cursor, "SELECT caregiver_user_id FROM job_applications LIMIT 1"),
+            "city": _first(cursor, "SELECT city FROM users ORDER BY user_id DESC LIMIT 1"),
+            "member": _first(cursor, "SELECT member_user_id FROM jobs ORDER BY job_id DESC LIMIT 1"),
+            "applied_job": _first(cursor, "SELECT job_id FROM job_applications ORDER BY job_id DESC LIMIT 1"),
+            "booking": _first_row(
+                cursor, "SELECT caregiver_user_id, appointment_date FROM appointments ORDER BY appointment_id DESC LIMIT 1"
+            ),
+            "word": _first_word(
+                _first(cursor, "SELECT profile_description FROM users WHERE profile_description <> '' LIMIT 1")
+            ),
+        }
+
+
+def _first_word(text):
+    return next((word for word in (text or "").split() if len(word) > 3 and word.isalpha()), None)
+
+
+def _first(cursor, sql):
+    row = _first_row(cursor, sql)
+    return row[0] if row else None
+
+
+def _first_row(cursor, sql):
+    cursor.execute(sql)
+    return cursor.fetchone()
@@ -0,0 +1,138 @@
+"""
+Materialized reporting layer for the analytics in queries.py.
+
+Each report is a materialized view with a unique index, so
+`manage.py refresh_reports` can rebuild it with REFRESH ... CONCURRENTLY
+while readers keep using the previous contents. The readers below are index
+lookups: one row for the accepted-appointment totals, keyset pages for the
+per-job and per-caregiver reports.
+"""
+from collections import namedtuple
+
+from django.db import connection
+
+ReportView = namedtuple("ReportView", "name sql unique_columns")
+
+REPORT_VIEWS = [
+    # queries.py 6.2 (accepted hours), 6.3 (average pay) and 7 (total cost).
+    # Always exactly one row; refreshed_at stamps the whole refresh.
+    ReportView(
+        "report_accepted_totals",
+        """
+        SELECT 1 AS id,
+               COUNT(*) AS accepted_appointments,
+               COALESCE(SUM(a.work_hours), 0) AS total_hours,
+               AVG(c.hourly_rate) AS average_pay,
+               COALESCE(SUM(c.hourly_rate * a.work_hours), 0) AS total_cost,
+               now() AS refreshed_at
+        FROM appointments a
+        JOIN caregivers c ON c.caregiver_user_id = a.caregiver_user_id
+        WHERE a.status = 'Accepted'
+        """,
+        ("id",),
+    ),
+    # queries.py 6.4: caregivers whose rate is above the average pay of 6.3.
+    ReportView(
+        "report_above_average_caregivers",
+        """
+        WITH accepted AS (
+            SELECT c.caregiver_user_id, c.hourly_rate, COUNT(*) AS accepted_appointments
+            FROM caregivers c
+            JOIN appointments a ON a.caregiver_user_id = c.caregiver_user_id
+            WHERE a.status = 'Accepted'
+            GROUP BY c.caregiver_user_id, c.hourly_rate
+        )
+        SELECT ac.caregiver_user_id, u.given_name, u.surname, ac.hourly_rate, ac.accepted_appointments
+        FROM accepted ac
+        JOIN users u ON u.user_id = ac.caregiver_user_id
+        WHERE ac.hourly_rate > (
+            SELECT SUM(hourly_rate * accepted_appointments) / SUM(accepted_appointments) FROM accepted
+        )
+        """,
+        ("caregiver_user_id",),
+    ),
+    # queries.py 6.1: applicant count for every job, including jobs with none.
+    ReportView(
+        "report_job_applicant_counts",
+        """
+        SELECT j.job_id, COUNT(ja.caregiver_user_id) AS applicant_count
+        FROM jobs j
+        LEFT JOIN job_applications ja ON ja.job_id = j.job_id
+        GROUP BY j.job_id
+        """,
+        ("job_id",),
+    ),
+]
+
+
+def existing_views(cursor):
+    cursor.execute("SELECT matviewname FROM pg_matviews WHERE schemaname = current_schema()")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def create_sql(view):
+    return [
+        f"CREATE MATERIALIZED VIEW {view.name} AS {view.sql}",
+        f"CREATE UNIQUE INDEX {view.name}_key ON {view.name} ({', '.join(view.unique_columns)})",
+    ]
+
+
+def refresh_sql(view, concurrently=True):
+    return f"REFRESH MATERIALIZED VIEW {'CONCURRENTLY ' if concurrently else ''}{view.name}"
+
+
+def fetch_accepted_totals():
+    """
+    The accepted-appointment totals as a dict, or None before the first refresh.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT accepted_appointments, total_hours, average_pay, total_cost, refreshed_at "
+            "FROM report_accepted_totals WHERE id = 1"
+        )
+        row = cursor.fetchone()
+    if row is None:
+        return None
+    accepted, hours, average_pay, total_cost, refreshed_at = row
+    return {
+        "accepted_appointments": accepted,
+        "total_hours": hours,
+        "average_pay": average_pay,
+        "total_cost": total_cost,
+        "refreshed_at": refreshed_at,
+    }
+
+
+def fetch_above_average_caregivers(after_caregiver_user_id, limit):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT caregiver_user_id, given_name, surname, hourly_rate, accepted_appointments "
+            "FROM report_above_average_caregivers WHERE caregiver_user_id > %s "
+            "ORDER BY caregiver_user_id LIMIT %s",
+            [after_caregiver_user_id, limit],
+        )
+        return [
+            {
+                "caregiver_user_id": caregiver_user_id,
+                "given_name": given_name,
+                "surname": surname,
+                "hourly_rate": hourly_rate,
+                "accepted_appointments": accepted,
+            }
+            for caregiver_user_id, given_name, surname, hourly_rate, accepted in cursor.fetchall()
+        ]
+
+
+def fetch_job_applicant_counts(after_job_id, limit, job_id=None):
+    with connection.cursor() as cursor:
+        if job_id is not None:
+            cursor.execute(
+                "SELECT job_id, applicant_count FROM report_job_applicant_counts WHERE job_id = %s", [job_id]
+            )
+        else:
+            cursor.execute(
+                "SELECT job_id, applicant_count FROM report_job_applicant_counts "
+                "WHERE job_id > %s ORDER BY job_id LIMIT %s",
+                [after_job_id, limit],
+            )
+        return [{"job_id": row[0], "applicant_count": row[1]} for row in cursor.fetchall()]
@@ -0,0 +1,112 @@
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import FloatField
+from django.db.models.expressions import RawSQL
+
+from .models import Caregiver
+from .pagination import aestimated_count, estimated_count
+
+# Must match the text search config of users.search_vector (see setup/schema.sql).
+SEARCH_CONFIG = "english"
+TSQUERY_SQL = f"websearch_to_tsquery('{SEARCH_CONFIG}', %s)"
+
+ResultCount = namedtuple("ResultCount", "count is_estimate truncated")
+
+
+def find_caregivers(caregiving_type="", city="", q=""):
+    """
+    Caregivers matching the search form, most relevant first when `q` is given.
+
+    - `city` is a substring match; Postgres serves the UPPER(city) LIKE that
+      Django emits for `icontains` from the trigram index on users.
+    - `q` is a web-search style query over given name, surname and profile
+      description, matched against the GIN-indexed users.search_vector column
+      and ranked with ts_rank. Only the SEARCH_RANK_CANDIDATES matches with
+      the lowest ids are ranked: every request picks the same ones, so
+      pagination cursors stay valid, without computing ts_rank for every
+      match of a common word. count_caregivers reports the same cap.
+    """
+    if not q:
+        return filter_caregivers(caregiving_type, city).order_by("caregiver_user_id")
+
+    candidates_sql, params = _keyword_candidates_sql(caregiving_type, city, q)
+    return (
+        Caregiver.objects.select_related("caregiver_user")
+        .filter(caregiver_user_id__in=RawSQL(candidates_sql, params))
+        .annotate(
+            # float8 so the rank round-trips exactly through pagination cursors
+            rank=RawSQL(
+                f'ts_rank("users"."search_vector", {TSQUERY_SQL})::float8', [q], output_field=FloatField()
+            )
+        )
+        .order_by("-rank", "caregiver_user_id")
+    )
+
+
+def filter_caregivers(caregiving_type="", city="", q=""):
+    """
+    Every caregiver matching the search form, unranked and uncapped.
+    """
+    caregivers = Caregiver.objects.select_related("caregiver_user")
+    if caregiving_type:
+        caregivers = caregivers.filter(caregiving_type=caregiving_type)
+    if city:
+        caregivers = caregivers.filter(caregiver_user__city__icontains=city)
+    if q:
+        caregivers = caregivers.filter(
+            caregiver_user_id__in=RawSQL(
+                f"SELECT user_id FROM users WHERE search_vector @@ {TSQUERY_SQL}", [q]
+            )
+        )
+    return caregivers
+
+
+def count_caregivers(caregiving_type="", city="", q=""):
+    """
+    Number of caregivers matching the search form, as a ResultCount.
+
+    Keyword searches list at most SEARCH_RANK_CANDIDATES results, so their
+    count stops there too, with `truncated` set when more caregivers match.
+    """
+    caregivers = filter_caregivers(caregiving_type, city, q)
+    if q:
+        return _capped_count(caregivers[: settings.SEARCH_RANK_CANDIDATES + 1].count())
+    return ResultCount(*estimated_count(caregivers, settings.SEARCH_EXACT_COUNT_LIMIT), False)
+
+
+async def acount_caregivers(caregiving_type="", city="", q=""):
+    """
+    count_caregivers for async views.
+    """
+    caregivers = filter_caregivers(caregiving_type, city, q)
+    if q:
+        return _capped_count(await caregivers[: settings.SEARCH_RANK_CANDIDATES + 1].acount())
+    return ResultCount(*await aestimated_count(caregivers, settings.SEARCH_EXACT_COUNT_LIMIT), False)
+
+
+def _capped_count(bounded):
+    limit = settings.SEARCH_RANK_CANDIDATES
+    return ResultCount(min(bounded, limit), False, bounded > limit)
+
+
+def _keyword_candidates_sql(caregiving_type, city, q):
+    sql = f"""
+        SELECT c.caregiver_user_id
+        FROM caregivers c
+        JOIN users u ON u.user_id = c.caregiver_user_id
+        WHERE u.search_vector @@ {TSQUERY_SQL}
+    """
+    params = [q]
+    if caregiving_type:
+        sql += " AND c.caregiving_type = %s"
+        params.append(caregiving_type)
+    if city:
+        sql += " AND UPPER(u.city) LIKE UPPER(%s)"
+        params.append(f"%{connection.ops.prep_for_like_query(city)}%")
+    # The same candidates on every request, picked by a key the caregivers_pkey
+    # order can serve; ranking them all first cost ~350 ms for a common word.
+    sql += " ORDER BY c.caregiver_user_id LIMIT %s"
+    params.append(settings.SEARCH_RANK_CANDIDATES)
+    return sql, params
@@ -0,0 +1,71 @@
+from django.contrib.auth.models import User, update_last_login
+from django.contrib.auth.signals import user_logged_in
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .identity import bump_identity_version
+from .listings import job_created, jobs_changed
+from .matching import caregiver_changed
+from .models import AppUser, Caregiver, Job, Member
+
+
+@receiver(post_save, sender=AppUser)
+@receiver(post_delete, sender=AppUser)
+@receiver(post_save, sender=Caregiver)
+@receiver(post_delete, sender=Caregiver)
+@receiver(post_save, sender=Member)
+@receiver(post_delete, sender=Member)
+def invalidate_cached_identity(sender, instance, **kwargs):
+    bump_identity_version(instance.pk)
+
+
+@receiver(post_save, sender=AppUser)
+@receiver(post_save, sender=Caregiver)
+@receiver(post_delete, sender=Caregiver)
+def update_matching_index(sender, instance, **kwargs):
+    # AppUser saves matter for the city and profile description; for members
+    # the re-read finds no caregiver and changes nothing.
+    caregiver_changed(instance.pk)
+
+
+@receiver(post_save, sender=Job)
+def invalidate_job_listing_on_save(sender, instance, created, **kwargs):
+    if created:
+        job_created(instance.required_caregiving_type)
+    else:
+        jobs_changed()
+
+
+@receiver(post_delete, sender=Job)
+def invalidate_job_listing_on_delete(sender, instance, **kwargs):
+    jobs_changed()
+
+
+# Listings show the posting member's name.
+NAME_FIELDS = ("given_name", "surname")
+
+
+@receiver(post_init, sender=AppUser)
+def remember_loaded_name(sender, instance, **kwargs):
+    instance._saved_name = _name(instance)
+
+
+@receiver(post_save, sender=AppUser)
+def invalidate_job_listing_on_rename(sender, instance, created, update_fields, **kwargs):
+    saved_name, instance._saved_name = instance._saved_name, _name(instance)
+    # A new user has no jobs yet; other saves only matter if the name changed.
+    if created or saved_name == instance._saved_name or (update_fields and update_fields.isdisjoint(NAME_FIELDS)):
+        return
+    if Job.objects.filter(member_id=instance.pk).exists():
+        jobs_changed()
+
+
+def _name(instance):
+    # Deferred fields aren't loaded just to compare them; they can't have changed.
+    return tuple(instance.__dict__.get(field) for field in NAME_FIELDS)
+
+
+# django.contrib.auth records last_login on every login, but the site's
+# users (AppUser) have no such column; only admin accounts get it.
+user_logged_in.disconnect(dispatch_uid="update_last_login")
+user_logged_in.connect(update_last_login, sender=User, dispatch_uid="update_last_login")
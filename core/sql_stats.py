@@ -0,0 +1,148 @@
+"""
+Per-request SQL instrumentation.
+
+QueryStatsMiddleware installs a QueryRecorder as an execute wrapper on every
+database connection for the duration of a request, so ORM querysets and raw
+`connection.cursor()` SQL are both counted. Each request's numbers are
+checked against its view's budget in SQL_QUERY_BUDGETS and folded into the
+per-process totals served by the `sql_metrics` view.
+
+Only the SQL run before the view returns its response is counted: queries a
+StreamingHttpResponse runs while the server iterates it (the NDJSON API
+pages and CSV exports) come after recording stops.
+"""
+import json
+import logging
+import re
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+
+logger = logging.getLogger("core.sql")
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST_RE = re.compile(r"\((?:\s*%s\s*,)+\s*%s\s*\)")
+
+
+def normalize_sql(sql):
+    """
+    Reduce a statement to its shape so that the same query with different
+    values (inlined literals or an IN list of any length) counts as one pattern.
+    """
+    sql = _STRING_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    sql = _PLACEHOLDER_LIST_RE.sub("(...)", sql)
+    return _WHITESPACE_RE.sub(" ", sql).strip()
+
+
+class QueryRecorder:
+    """
+    Execute wrapper that times every statement and counts statement patterns.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_sql = None
+        self.patterns = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            pattern = normalize_sql(sql)
+            self.count += 1
+            self.seconds += elapsed
+            self.patterns[pattern] += 1
+            if elapsed >= self.slowest_seconds:
+                self.slowest_seconds = elapsed
+                self.slowest_sql = pattern
+
+    def repeated(self, threshold):
+        """
+        Patterns executed at least `threshold` times, most frequent first;
+        usually a loop issuing one query per row (N+1).
+        """
+        return [(pattern, count) for pattern, count in self.patterns.most_common() if count >= threshold]
+
+
+def budget_for(view_name):
+    budgets = settings.SQL_QUERY_BUDGETS
+    return budgets.get(view_name, budgets["default"])
+
+
+def check_request(view_name, recorder):
+    """
+    Return the reasons (possibly none) this request breaks its SQL budget.
+    """
+    max_queries, max_db_ms = budget_for(view_name)
+    problems = []
+    if recorder.count > max_queries:
+        problems.append(f"{recorder.count} queries (budget {max_queries})")
+    if recorder.seconds * 1000 > max_db_ms:
+        problems.append(f"{recorder.seconds * 1000:.1f} ms in the database (budget {max_db_ms} ms)")
+    for pattern, count in recorder.repeated(settings.SQL_REPEAT_THRESHOLD):
+        problems.append(f"statement repeated {count} times (possible N+1): {pattern[:200]}")
+    return problems
+
+
+def log_request(request, response, view_name, recorder, problems):
+    record = {
+        "view": view_name,
+        "method": request.method,
+        "path": request.path,
+        "status": response.status_code,
+        "queries": recorder.count,
+        "db_ms": round(recorder.seconds * 1000, 2),
+        "slowest_ms": round(recorder.slowest_seconds * 1000, 2),
+        "slowest_sql": recorder.slowest_sql,
+    }
+    if problems:
+        logger.warning(json.dumps({**record, "problems": problems}))
+    elif settings.SQL_LOG_REQUESTS:
+        logger.info(json.dumps(record))
+
+
+class ViewTotals:
+    """
+    Running SQL totals per view for this process (each worker keeps its own).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def add(self, view_name, recorder, over_budget):
+        with self._lock:
+            totals = self._views.setdefault(
+                view_name,
+                {"requests": 0, "queries": 0, "db_ms": 0.0, "max_queries": 0, "max_db_ms": 0.0, "over_budget": 0},
+            )
+            db_ms = recorder.seconds * 1000
+            totals["requests"] += 1
+            totals["queries"] += recorder.count
+            totals["db_ms"] += db_ms
+            totals["max_queries"] = max(totals["max_queries"], recorder.count)
+            totals["max_db_ms"] = max(totals["max_db_ms"], db_ms)
+            totals["over_budget"] += over_budget
+
+    def snapshot(self):
+        with self._lock:
+            views = {name: dict(totals) for name, totals in self._views.items()}
+        for name, totals in views.items():
+            totals["avg_queries"] = round(totals["queries"] / totals["requests"], 2)
+            totals["avg_db_ms"] = round(totals["db_ms"] / totals["requests"], 2)
+            totals["db_ms"] = round(totals["db_ms"], 2)
+            totals["max_db_ms"] = round(totals["max_db_ms"], 2)
+            totals["budget"] = dict(zip(("queries", "db_ms"), budget_for(name)))
+        return views
+
+
+view_totals = ViewTotals()
@@ -0,0 +1,292 @@
+"""
+Synthetic data at production scale.
+
+`manage.py generate_data --users N` builds N users, a CAREGIVER_SHARE of
+them caregivers and the rest members with one address each, then jobs,
+applications and appointments with the distributions below. Every table is
+streamed into PostgreSQL with COPY. Rows are generated lazily; the only state
+kept per row is a few bytes in typed arrays, so memory stays small at 10M
+users.
+"""
+import io
+import random
+from array import array
+from datetime import time, timedelta
+from decimal import Decimal
+from itertools import accumulate, islice
+
+EMAIL_DOMAIN = "synthetic.invalid"
+
+# Relative weights, roughly by population.
+CITIES = {
+    "Almaty": 22, "Astana": 14, "Shymkent": 12, "Karaganda": 5, "Aktobe": 5,
+    "Taraz": 4, "Pavlodar": 3, "Oskemen": 3, "Semey": 3, "Atyrau": 3,
+    "Kostanay": 2, "Kyzylorda": 2, "Oral": 2, "Petropavl": 2, "Turkistan": 2,
+}
+CAREGIVING_TYPES = {"Babysitter": 50, "Elderly Care": 30, "Playmate for children": 20}
+# Hourly rates are log-normal around these medians.
+MEDIAN_RATES = {"Babysitter": 12.0, "Elderly Care": 16.0, "Playmate for children": 10.0}
+CAREGIVER_SHARE = 0.4
+FEMALE_CAREGIVER_SHARE = 0.8
+
+JOBS_PER_MEMBER = 1.5
+APPLICATIONS_PER_JOB = 4
+MAX_APPLICATIONS_PER_JOB = 300
+APPOINTMENTS_PER_MEMBER = 2
+HISTORY_DAYS = 730  # jobs are posted over the last two years, more of them recently
+
+GIVEN_NAMES_F = [
+    "Aigerim", "Aruzhan", "Dana", "Madina", "Saule", "Zarina", "Gulnara", "Amina", "Aliya", "Dinara",
+    "Olga", "Anna", "Elena", "Laura", "Fiona", "Alice", "Julia", "Hannah", "Nina", "Rachel",
+]
+GIVEN_NAMES_M = [
+    "Daniyar", "Nurlan", "Erlan", "Ruslan", "Timur", "Arman", "Askar", "Bauyrzhan", "Yerlan", "Marat",
+    "Ivan", "Sergey", "Dmitry", "Bob", "Kevin", "Mike", "Oscar", "Paul", "George", "Evan",
+]
+# Slavic and Kazakh -ov/-ev/-in surnames take an -a for women.
+SURNAMES = [
+    "Akhmetov", "Nurlanov", "Omarov", "Sadykov", "Iskakov", "Zhakupov", "Suleimenov", "Abenov",
+    "Ivanov", "Petrov", "Smirnov", "Kuznetsov", "Kim", "Li", "Tsoi", "Smith", "Brown", "Evans",
+]
+CAREGIVER_BLURBS = {
+    "Babysitter": ["Loves kids", "Certified babysitter", "Energetic student", "Mother of three"],
+    "Elderly Care": ["Experienced nurse", "Patient and kind", "Professional care", "Special needs experience"],
+    "Playmate for children": ["Music tutor and sitter", "Art and crafts teacher", "Sports coach", "Part-time helper"],
+}
+CAREGIVER_EXTRAS = [
+    "available weekends", "first aid certified", "speaks English and Kazakh", "non-smoker",
+    "has a driver license", "cooks healthy meals", "night shifts ok", "good with pets too",
+]
+MEMBER_BLURBS = [
+    "Busy father", "Single mom", "Need help weekends", "Looking for elderly care", "Three kids",
+    "Frequent traveler", "Need urgent help", "Requires regular help", "Looking for professional",
+]
+HOUSE_RULES = [
+    "No pets.", "No smoking", "Shoes off", "Vegetarian food only", "Quiet after 9pm",
+    "Be on time", "Clean up toys", "No loud music", "Hygiene is priority", "Safety first",
+]
+DEPENDENTS = {
+    "Babysitter": ["Newborn baby", "Toddler", "5 year old girl", "Two energetic twins", "10 year old boy"],
+    "Elderly Care": ["Elderly father with mobility issues", "Grandmother needs company", "Sick relative"],
+    "Playmate for children": ["Son likes painting", "Daughter needs tutoring", "Two boys who love football"],
+}
+JOB_REQUIREMENTS = [
+    "Must be strong and patient", "English speaking preferred", "Must be soft-spoken and kind",
+    "Weekend availability", "Math tutoring required", "Artistic skills", "Driver license needed",
+    "Night shift", "Sports oriented", "Cooking skills",
+]
+STREETS = [
+    "Abay", "Dostyk", "Kabanbay Batyr", "Mangilik El", "Turan", "Saryarka", "Kunaev", "Tauke Khan",
+    "Gogol", "Zhibek Zholy", "Satpayev", "Baitursynov", "Republic", "Tole Bi", "Nazarbayev",
+]
+# Appointment status weights for past and for upcoming dates.
+PAST_STATUSES = {"Accepted": 75, "Declined": 15, "Pending": 10}
+UPCOMING_STATUSES = {"Pending": 70, "Accepted": 30}
+WORK_HOURS = {1: 5, 2: 15, 3: 20, 4: 20, 5: 12, 6: 10, 8: 12, 10: 6}
+
+TABLE_COLUMNS = {
+    "users": ["user_id", "email", "given_name", "surname", "city", "phone_number", "profile_description", "password"],
+    "caregivers": ["caregiver_user_id", "photo", "gender", "caregiving_type", "hourly_rate"],
+    "members": ["member_user_id", "house_rules", "dependent_description"],
+    "addresses": ["member_user_id", "house_number", "street", "town"],
+    "jobs": ["job_id", "member_user_id", "required_caregiving_type", "other_requirements", "date_posted"],
+    "job_applications": ["caregiver_user_id", "job_id", "date_applied"],
+    "appointments": [
+        "appointment_id", "caregiver_user_id", "member_user_id", "appointment_date",
+        "appointment_time", "work_hours", "status",
+    ],
+}
+
+
+class SyntheticData:
+    """
+    One generated dataset. Iterate the tables in TABLE_COLUMNS order; later
+    tables refer back to what earlier ones produced (caregiver types, job
+    dates), which is kept in compact arrays rather than as rows.
+    """
+
+    def __init__(self, users, first_user_id, first_job_id, first_appointment_id, password, today, seed=0):
+        self.random = random.Random(seed)
+        self.password = password
+        self.today = today
+        self.first_user_id = first_user_id
+        self.caregiver_count = max(1, int(users * CAREGIVER_SHARE))
+        self.member_count = max(1, users - self.caregiver_count)
+        # Caregivers take the first block of ids, members the next one.
+        self.first_member_id = first_user_id + self.caregiver_count
+        self.first_job_id = first_job_id
+        self.first_appointment_id = first_appointment_id
+
+        self.type_names = list(CAREGIVING_TYPES)
+        self.city_names = list(CITIES)
+        self.type_weights = list(accumulate(CAREGIVING_TYPES.values()))
+        self.work_hours = (list(WORK_HOURS), list(accumulate(WORK_HOURS.values())))
+        self.past_statuses = (list(PAST_STATUSES), list(accumulate(PAST_STATUSES.values())))
+        self.upcoming_statuses = (list(UPCOMING_STATUSES), list(accumulate(UPCOMING_STATUSES.values())))
+        # Date objects by day offset from today, shared instead of rebuilt per row.
+        self.days = {offset: today + timedelta(days=offset) for offset in range(-HISTORY_DAYS, 31)}
+
+        type_indexes = range(len(self.type_names))
+        self.city_of_user = array(
+            "B", self.random.choices(range(len(CITIES)), cum_weights=list(accumulate(CITIES.values())), k=users)
+        )
+        self.type_of_caregiver = array(
+            "B", self.random.choices(type_indexes, cum_weights=self.type_weights, k=self.caregiver_count)
+        )
+        self.caregivers_by_type = [array("i") for _ in self.type_names]
+        for offset, type_index in enumerate(self.type_of_caregiver):
+            self.caregivers_by_type[type_index].append(first_user_id + offset)
+        self.female_caregiver = array(
+            "B", (self.random.random() < FEMALE_CAREGIVER_SHARE for _ in range(self.caregiver_count))
+        )
+        # Filled in by jobs(), read by job_applications().
+        self.job_type = array("B")
+        self.job_age = array("H")
+
+    def rows(self, table):
+        return getattr(self, table)()
+
+    def users(self):
+        rnd = self.random
+        for offset in range(len(self.city_of_user)):
+            user_id = self.first_user_id + offset
+            is_caregiver = offset < self.caregiver_count
+            female = self.female_caregiver[offset] if is_caregiver else rnd.random() < 0.6
+            given = rnd.choice(GIVEN_NAMES_F if female else GIVEN_NAMES_M)
+            surname = rnd.choice(SURNAMES)
+            if female and surname.endswith(("ov", "ev", "in")):
+                surname += "a"
+            if is_caregiver:
+                type_name = self.type_names[self.type_of_caregiver[offset]]
+                description = f"{rnd.choice(CAREGIVER_BLURBS[type_name])}, {rnd.choice(CAREGIVER_EXTRAS)}"
+            else:
+                description = rnd.choice(MEMBER_BLURBS)
+            phone = None if rnd.random() < 0.1 else f"+77{rnd.randrange(10**9):09d}"
+            yield (
+                user_id,
+                f"{given.lower()}.{surname.lower()}.{user_id}@{EMAIL_DOMAIN}",
+                given,
+                surname,
+                self.city_names[self.city_of_user[offset]],
+                phone,
+                description,
+                self.password,
+            )
+
+    def caregivers(self):
+        rnd = self.random
+        for offset, type_index in enumerate(self.type_of_caregiver):
+            type_name = self.type_names[type_index]
+            rate = min(60.0, max(5.0, rnd.lognormvariate(0, 0.35) * MEDIAN_RATES[type_name]))
+            yield (
+                self.first_user_id + offset,
+                "",
+                "F" if self.female_caregiver[offset] else "M",
+                type_name,
+                Decimal(f"{rate:.2f}"),
+            )
+
+    def members(self):
+        rnd = self.random
+        for member_id in self._member_ids():
+            rules = ", ".join(rnd.sample(HOUSE_RULES, rnd.choice((1, 1, 2, 3))))
+            type_name = self.type_names[self._type_index()]
+            yield member_id, rules, rnd.choice(DEPENDENTS[type_name])
+
+    def addresses(self):
+        rnd = self.random
+        for member_id in self._member_ids():
+            house = str(rnd.randint(1, 250)) + (rnd.choice("ABC") if rnd.random() < 0.15 else "")
+            city = self.city_names[self.city_of_user[member_id - self.first_user_id]]
+            yield member_id, house, rnd.choice(STREETS), city
+
+    def jobs(self):
+        rnd = self.random
+        job_id = self.first_job_id
+        # Geometric number of jobs per member with mean JOBS_PER_MEMBER.
+        keep_posting = JOBS_PER_MEMBER / (1 + JOBS_PER_MEMBER)
+        for member_id in self._member_ids():
+            while rnd.random() < keep_posting:
+                type_index = self._type_index()
+                # Skewed towards recent dates: the site grows over time.
+                age = int(HISTORY_DAYS * (1 - rnd.random() ** 0.5))
+                self.job_type.append(type_index)
+                self.job_age.append(age)
+                yield (
+                    job_id,
+                    member_id,
+                    self.type_names[type_index],
+                    rnd.choice(JOB_REQUIREMENTS),
+                    self.days[-age],
+                )
+                job_id += 1
+
+    def job_applications(self):
+        rnd = self.random
+        for offset, type_index in enumerate(self.job_type):
+            candidates = self.caregivers_by_type[type_index]
+            # Heavy-tailed popularity: most jobs get a few applicants, some get hundreds.
+            wanted = int(APPLICATIONS_PER_JOB * (rnd.paretovariate(2.0) - 1))
+            wanted = min(wanted, MAX_APPLICATIONS_PER_JOB, len(candidates))
+            age = self.job_age[offset]
+            for index in rnd.sample(range(len(candidates)), wanted):
+                days_later = min(age, int(rnd.expovariate(1 / 3)))
+                yield candidates[index], self.first_job_id + offset, self.days[days_later - age]
+
+    def appointments(self):
+        rnd = self.random
+        # Caregivers take turns, and each turn books within its own window of
+        # days, so no caregiver is ever double-booked (appointments_no_overlap).
+        # A booking starts by 20:30 and lasts at most 10 hours, so it ends
+        # before the 07:00 start of any booking on a later day.
+        total = self.member_count * APPOINTMENTS_PER_MEMBER
+        turns = -(-total // self.caregiver_count)
+        window = max(1, 396 // turns)
+        total = min(total, self.caregiver_count * 396)
+        for n in range(total):
+            turn, caregiver_offset = divmod(n, self.caregiver_count)
+            days = -365 + turn * window + rnd.randrange(window)
+            statuses, status_weights = self.upcoming_statuses if days > 0 else self.past_statuses
+            yield (
+                self.first_appointment_id + n,
+                self.first_user_id + caregiver_offset,
+                self.first_member_id + rnd.randrange(self.member_count),
+                self.days[days],
+                time(rnd.randint(7, 20), rnd.choice((0, 30))),
+                rnd.choices(self.work_hours[0], cum_weights=self.work_hours[1])[0],
+                rnd.choices(statuses, cum_weights=status_weights)[0],
+            )
+
+    def _member_ids(self):
+        return range(self.first_member_id, self.first_member_id + self.member_count)
+
+    def _type_index(self):
+        return self.random.choices(range(len(self.type_names)), cum_weights=self.type_weights)[0]
+
+
+def copy_rows(cursor, table, columns, rows, chunk_size, progress=None):
+    """
+    Stream `rows` into `table` with one COPY per `chunk_size` rows and return
+    the number of rows written. `progress(total)` is called after each chunk.
+    """
+    sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN"
+    rows = iter(rows)
+    total = 0
+    while chunk := list(islice(rows, chunk_size)):
+        cursor.copy_expert(sql, io.StringIO("".join(_copy_line(row) for row in chunk)))
+        total += len(chunk)
+        if progress:
+            progress(total)
+    return total
+
+
+def _copy_line(row):
+    return "\t".join(_copy_value(value) for value in row) + "\n"
+
+
+def _copy_value(value):
+    if value is None:
+        return r"\N"
+    if isinstance(value, str):
+        return value.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+    return str(value)
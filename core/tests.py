@@ -1,3 +1,1024 @@
-from django.test import TestCase
+import asyncio
+import csv
+import gzip
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO, StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from threading import Event, Thread
+from unittest import skipUnless
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, check_password
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, connections, router, transaction
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, SimpleTestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from PIL import Image
+from sqlalchemy import exc
+
+from . import matching
+from .db_router import PIN_COOKIE, replica_reads
+from .exports import Export, _aiter, iter_csv
+from .identity import bump_identity_version
+from .importer import import_records
+from .matching import MatchingIndex, get_index
+from .middleware import ReplicaPinMiddleware
+from .models import AppUser, Caregiver, Job, JobApplication
+from .pagination import paginate_jobs
+from .photos import FAILED_DIR, PHOTO_DIR, pending_photos
+from .pooled_postgresql.base import DatabaseWrapper as PooledDatabaseWrapper
+from .pooled_postgresql.base import pool_status
+from .sql_stats import QueryRecorder, check_request, log_request, normalize_sql
+
+SCHEMA_SQL = Path(settings.BASE_DIR) / "setup" / "schema.sql"
+
+
+def load_schema():
+    """
+    (Re)create the externally managed tables in the test database; Django
+    skips them because every model is `managed = False`.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(SCHEMA_SQL.read_text())
+    call_command("apply_indexes", stdout=StringIO(), stderr=StringIO())
+    # Cached users and pages describe the previous test's rows.
+    cache.clear()
+
+
+@skipUnless(connection.vendor == "postgresql", "schema.sql is PostgreSQL-specific")
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class ConcurrentRegistrationTests(TransactionTestCase):
+    registrations = 100
+    workers = 32  # stays under the default max_connections=100
+
+    def setUp(self):
+        load_schema()
+        # Seed explicit ids the way setup/populate.py does, then repair once.
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO users (user_id, email, given_name, surname, city, password) "
+                "SELECT g, 'seed' || g || '@mail.com', 'Seed', 'User', 'Astana', 'x' "
+                "FROM generate_series(1, 20) AS g"
+            )
+        call_command("sync_sequences", stdout=StringIO())
+
+    def _register(self, n):
+        try:
+            response = Client().post(
+                reverse("register_member"),
+                {
+                    "given_name": "Load",
+                    "surname": f"Member{n}",
+                    "email": f"load{n}@mail.com",
+                    "password1": "secret-pass",
+                    "password2": "secret-pass",
+                    "city": "Astana",
+                },
+            )
+            return response.status_code
+        finally:
+            connections.close_all()
+
+    def test_parallel_registrations_get_distinct_ids(self):
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            # The timeout turns a lock pileup into a failure instead of a hang.
+            statuses = list(pool.map(self._register, range(self.registrations), timeout=60))
+
+        self.assertEqual(statuses, [302] * self.registrations)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT u.user_id), MIN(u.user_id) "
+                "FROM users u JOIN members m ON m.member_user_id = u.user_id "
+                "WHERE u.email LIKE %s",
+                ["load%@mail.com"],
+            )
+            count, distinct, lowest = cursor.fetchone()
+        self.assertEqual(count, self.registrations)
+        self.assertEqual(distinct, self.registrations)
+        self.assertGreater(lowest, 20)
+
+
+@skipUnless(connection.vendor == "postgresql", "schema.sql is PostgreSQL-specific")
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class LoginTests(TransactionTestCase):
+    def setUp(self):
+        load_schema()
+
+    def test_users_log_in_from_the_users_table(self):
+        response = self.client.post(
+            reverse("register_member"),
+            {
+                "given_name": "New",
+                "surname": "Member",
+                "email": "new@mail.com",
+                "password1": "secret-pass",
+                "password2": "secret-pass",
+                "city": "Astana",
+            },
+        )
+        self.assertRedirects(response, reverse("member_jobs"))
+        self.client.logout()
+
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.post(reverse("login"), {"username": "new@mail.com", "password": "secret-pass"})
+        self.assertRedirects(response, reverse("home"), fetch_redirect_response=False)
+        self.assertEqual([query for query in captured.captured_queries if "auth_user" in query["sql"]], [])
+        self.assertFalse(User.objects.exists())
+        self.assertEqual(self.client.get(reverse("member_jobs")).status_code, 200)
+
+        # A password change logs out existing sessions.
+        user = AppUser.objects.get(email="new@mail.com")
+        user.password = "changed"
+        user.save()
+        self.assertEqual(self.client.get(reverse("member_jobs")).status_code, 302)
+
+    @override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.PBKDF2PasswordHasher"])
+    def test_outdated_passwords_are_rehashed_on_successful_login(self):
+        hasher = PBKDF2PasswordHasher()
+        outdated = hasher.encode("secret-pass", hasher.salt(), iterations=1000)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO users (user_id, email, given_name, surname, city, password) VALUES "
+                "(1, 'plain@mail.com', 'Plain', 'Text', 'Astana', 'secret-pass'), "
+                "(2, 'old@mail.com', 'Old', 'Hash', 'Astana', %s)",
+                [outdated],
+            )
+
+        def log_in(email, password):
+            response = Client().post(reverse("login"), {"username": email, "password": password})
+            return response.status_code, AppUser.objects.get(email=email).password
+
+        self.assertEqual(log_in("plain@mail.com", "wrong-pass"), (200, "secret-pass"))
+        self.assertEqual(log_in("old@mail.com", "wrong-pass"), (200, outdated))
+
+        for email in ["plain@mail.com", "old@mail.com"]:
+            status, stored = log_in(email, "secret-pass")
+            self.assertEqual(status, 302)
+            self.assertEqual(hasher.decode(stored)["iterations"], hasher.iterations)
+            self.assertTrue(check_password("secret-pass", stored))
+
+    def test_only_auth_accounts_reach_the_admin(self):
+        create_poster_with_jobs()
+        staff = AppUser.objects.get(user_id=1)
+        staff.is_staff = True
+        staff.save()
+        self.client.force_login(staff)
+        for name in ["admin:index", "admin:password_change"]:
+            self.assertRedirects(
+                self.client.get(reverse(name)), f"{reverse('admin:login')}?next={reverse(name)}"
+            )
+
+        admin = User.objects.create_superuser("admin", "admin@mail.com", "secret-pass")
+        self.client.force_login(admin, backend="django.contrib.auth.backends.ModelBackend")
+        self.assertEqual(self.client.get(reverse("admin:password_change")).status_code, 200)
+
+    @override_settings(SESSION_ENGINE="django.contrib.sessions.backends.cached_db", USER_CACHE_SECONDS=300)
+    def test_requests_load_the_session_and_user_from_the_cache(self):
+        self.client.force_login(create_poster_with_jobs())
+        self.client.get(reverse("member_jobs"))
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(reverse("member_jobs"))
+        self.assertEqual(len(response.context["jobs"]), 5)
+        session_and_user_queries = [
+            query["sql"]
+            for query in captured.captured_queries
+            if 'FROM "django_session"' in query["sql"] or 'FROM "users"' in query["sql"]
+        ]
+        self.assertEqual(session_and_user_queries, [])
+
+        # Saving a profile invalidates the cached user.
+        poster = AppUser.objects.get(user_id=1)
+        poster.given_name = "Renamed"
+        poster.save()
+        self.assertEqual(self.client.get(reverse("member_jobs")).wsgi_request.user.given_name, "Renamed")
+
+
+@skipUnless(connection.vendor == "postgresql", "schema.sql is PostgreSQL-specific")
+@override_settings(
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"], PHOTO_BACKGROUND_WORKER=False
+)
+class CaregiverPhotoTests(TransactionTestCase):
+    def setUp(self):
+        load_schema()
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.media_root = Path(directory.name) / "media"
+        settings_override = override_settings(
+            MEDIA_ROOT=self.media_root, PHOTO_STAGING_ROOT=Path(directory.name) / "staging"
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def register(self, email, photo):
+        buffer = BytesIO()
+        Image.new("RGB", (1600, 1200), photo).save(buffer, format="PNG")
+        response = self.client.post(
+            reverse("register_caregiver"),
+            {
+                "given_name": "Photo",
+                "surname": "Sitter",
+                "email": email,
+                "password1": "secret-pass",
+                "password2": "secret-pass",
+                "city": "Astana",
+                "caregiving_type": "Babysitter",
+                "hourly_rate": "10",
+                "photo": SimpleUploadedFile("me.png", buffer.getvalue(), content_type="image/png"),
+            },
+        )
+        self.assertRedirects(response, reverse("jobs_list"), fetch_redirect_response=False)
+        return Caregiver.objects.get(caregiver_user__email=email)
+
+    def test_staged_uploads_are_resized_and_stored_by_content(self):
+        first = self.register("first@mail.com", "red")
+        second = self.register("second@mail.com", "red")
+        self.assertEqual((first.photo, second.photo), ("", ""))
+        self.assertEqual(len(pending_photos()), 2)
+
+        call_command("process_photos", stdout=StringIO())
+        self.assertEqual(pending_photos(), [])
+        first.refresh_from_db()
+        second.refresh_from_db()
+        # Identical images share one stored file.
+        self.assertEqual(first.photo, second.photo)
+        name = first.photo.removeprefix(f"{settings.MEDIA_URL}{PHOTO_DIR}/")
+        with Image.open(self.media_root / PHOTO_DIR / name) as image:
+            self.assertEqual(image.size, (800, 600))
+        with Image.open(self.media_root / PHOTO_DIR / "thumbs" / name) as image:
+            self.assertEqual(image.size, (200, 150))
+
+    def test_unreadable_photos_are_set_aside_after_one_attempt(self):
+        caregiver = self.register("sitter@mail.com", "blue")
+        call_command("process_photos", stdout=StringIO())
+        caregiver.refresh_from_db()
+        staged = Path(settings.PHOTO_STAGING_ROOT) / f"{caregiver.pk}__truncated.png"
+        stored = self.media_root / caregiver.photo.removeprefix(settings.MEDIA_URL)
+        staged.write_bytes(stored.read_bytes()[:100])
+
+        stderr = StringIO()
+        call_command("process_photos", stdout=StringIO(), stderr=stderr)
+        self.assertIn("moved to", stderr.getvalue())
+        self.assertEqual(pending_photos(), [])
+        self.assertTrue((staged.parent / FAILED_DIR / staged.name).exists())
+        # The caregiver keeps the photo they had.
+        self.assertEqual(Caregiver.objects.get(pk=caregiver.pk).photo, caregiver.photo)
+
+        stderr = StringIO()
+        call_command("process_photos", stdout=StringIO(), stderr=stderr)
+        self.assertEqual(stderr.getvalue(), "")
+
+    def test_stored_photos_reach_the_matching_index(self):
+        caregiver = self.register("sitter@mail.com", "blue")
+        # As in a new process, rather than an index another test left behind.
+        matching._index = None
+        index = get_index()
+        self.assertEqual(index.top("Babysitter", "Astana", 1)[0][0], caregiver.pk)
+        unscored = index.top("Babysitter", "Astana", 1)[0][1]
+
+        call_command("process_photos", stdout=StringIO())
+        # The same index object, updated from the change log rather than rebuilt.
+        self.assertIs(get_index(), index)
+        self.assertGreater(index.top("Babysitter", "Astana", 1)[0][1], unscored)
+
+    def test_rebuilds_serve_the_old_index_meanwhile(self):
+        first = self.register("first@mail.com", "blue")
+        matching._index = None
+        index = get_index()
+        matching.invalidate()
+        second = self.register("second@mail.com", "red")
+
+        self.assertIs(get_index(), index)
+        matching._rebuilding.join()
+        rebuilt = get_index()
+        self.assertIsNot(rebuilt, index)
+        self.assertEqual({i for i, _ in rebuilt.top("Babysitter", "Astana", 10)}, {first.pk, second.pk})
+
+
+@skipUnless(connection.vendor == "postgresql", "schema.sql is PostgreSQL-specific")
+class ConcurrentBookingTests(TransactionTestCase):
+    members = 32
+    caregiver_user_id = 1
+
+    def setUp(self):
+        load_schema()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO users (user_id, email, given_name, surname, city, password) "
+                "SELECT g, 'book' || g || '@mail.com', 'Book', 'User', 'Astana', 'x' "
+                "FROM generate_series(1, %s) AS g",
+                [self.members + 1],
+            )
+            cursor.execute(
+                "INSERT INTO caregivers (caregiver_user_id, caregiving_type, hourly_rate) "
+                "VALUES (%s, 'Babysitter', 10)",
+                [self.caregiver_user_id],
+            )
+            cursor.execute(
+                "INSERT INTO members (member_user_id) SELECT g FROM generate_series(2, %s) AS g",
+                [self.members + 1],
+            )
+
+    def _book(self, user_id, time, hours=2):
+        try:
+            client = Client()
+            client.force_login(AppUser.objects.get(user_id=user_id))
+            response = client.post(
+                reverse("book_appointment"),
+                {
+                    "caregiver_user_id": self.caregiver_user_id,
+                    "appointment_date": "2030-01-15",
+                    "appointment_time": time,
+                    "work_hours": hours,
+                },
+            )
+            return response.status_code
+        finally:
+            connections.close_all()
+
+    def _bookings(self):
+        client = Client()
+        client.force_login(AppUser.objects.get(user_id=2))
+        response = client.get(
+            reverse("caregiver_bookings", args=[self.caregiver_user_id]), {"date": "2030-01-15"}
+        )
+        return response.json()["bookings"]
+
+    def test_overlapping_parallel_bookings_admit_exactly_one(self):
+        # Every request overlaps every other: start times 09:00-10:30 for two hours.
+        times = [f"{9 + n % 4 // 2}:{n % 2 * 30:02d}" for n in range(self.members)]
+        with ThreadPoolExecutor(max_workers=self.members) as pool:
+            statuses = list(pool.map(self._book, range(2, self.members + 2), times, timeout=60))
+
+        self.assertEqual(sorted(statuses), [201] + [409] * (self.members - 1))
+        self.assertEqual(len(self._bookings()), 1)
+
+    def test_back_to_back_bookings_do_not_conflict(self):
+        self.assertEqual(self._book(2, "09:00"), 201)
+        self.assertEqual(self._book(3, "11:00"), 201)
+        self.assertEqual(self._book(4, "07:00"), 201)
+        self.assertEqual(self._book(5, "10:59", hours=1), 409)
+        self.assertEqual(
+            [booking["start"] for booking in self._bookings()],
+            ["2030-01-15T07:00:00", "2030-01-15T09:00:00", "2030-01-15T11:00:00"],
+        )
+
+
+@skipUnless(connection.vendor == "postgresql", "schema.sql is PostgreSQL-specific")
+class JobPaginationTests(TransactionTestCase):
+    def setUp(self):
+        load_schema()
+        create_poster_with_jobs()
+        # Jobs 6-12 share one date, so cursors inside it rely on the job_id tie-break.
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO jobs (job_id, member_user_id, required_caregiving_type, date_posted) "
+                "SELECT g, 1, 'Babysitter', DATE '2025-02-01' FROM generate_series(6, 12) AS g"
+            )
+
+    def test_cursors_walk_every_job_once_across_equal_dates(self):
+        seen, cursor = [], None
+        while True:
+            page = paginate_jobs(Job.objects.all(), cursor, 2)
+            seen.extend(job.job_id for job in page)
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+        self.assertEqual(seen, [12, 11, 10, 9, 8, 7, 6, 5, 4, 3, 2, 1])
+
+        # A cursor that doesn't decode restarts at the first page.
+        self.assertEqual([job.job_id for job in paginate_jobs(Job.objects.all(), "garbage", 3)], [12, 11, 10])
+
+
+@skipUnless(connection.vendor == "postgresql", "schema.sql is PostgreSQL-specific")
+class JobListingCacheTests(TransactionTestCase):
+    def setUp(self):
+        load_schema()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO users (user_id, email, given_name, surname, city, password) "
+                "VALUES (1, 'poster@mail.com', 'Job', 'Poster', 'Astana', 'x')"
+            )
+            cursor.execute("INSERT INTO members (member_user_id) VALUES (1)")
+            cursor.execute(
+                "INSERT INTO jobs (job_id, member_user_id, required_caregiving_type, other_requirements, date_posted) "
+                "SELECT g, 1, 'Babysitter', '', DATE '2025-01-01' + g FROM generate_series(1, 5) AS g"
+            )
+        call_command("sync_sequences", stdout=StringIO())
+        self.client.force_login(AppUser.objects.get(user_id=1))
+
+    def listed_job_ids(self, **params):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(reverse("jobs_list"), {"page_size": 3, **params})
+        jobs_queries = [query for query in captured.captured_queries if 'FROM "jobs"' in query["sql"]]
+        return [job.job_id for job in response.context["jobs"]], len(jobs_queries)
+
+    def test_pages_are_cached_until_jobs_change(self):
+        self.assertEqual(self.listed_job_ids(), ([5, 4, 3], 1))
+        self.assertEqual(self.listed_job_ids(), ([5, 4, 3], 0))
+        self.assertEqual(self.listed_job_ids(caregiving_type="Babysitter"), ([5, 4, 3], 1))
+
+        # A new job refreshes the first pages; pages behind a cursor stay cached.
+        cursor = self.client.get(reverse("jobs_list"), {"page_size": 3}).context["page"].next_cursor
+        self.assertEqual(self.listed_job_ids(cursor=cursor), ([2, 1], 1))
+        self.client.post(reverse("member_jobs"), {"required_caregiving_type": "Babysitter"})
+        new_job_id = Job.objects.latest("job_id").job_id
+        self.assertEqual(self.listed_job_ids(), ([new_job_id, 5, 4], 1))
+        self.assertEqual(self.listed_job_ids(caregiving_type="Babysitter"), ([new_job_id, 5, 4], 1))
+        self.assertEqual(self.listed_job_ids(caregiving_type="Elderly Care"), ([], 1))
+        self.assertEqual(self.listed_job_ids(cursor=cursor), ([2, 1], 0))
+
+        # A deletion can touch any page.
+        Job.objects.filter(job_id=1).delete()
+        self.assertEqual(self.listed_job_ids(cursor=cursor), ([2], 1))
+        self.assertEqual(self.listed_job_ids(), ([new_job_id, 5, 4], 1))
+
+    def test_only_renaming_a_poster_refreshes_the_pages(self):
+        self.assertEqual(self.listed_job_ids(), ([5, 4, 3], 1))
+        poster = AppUser.objects.get(user_id=1)
+        poster.city = "Almaty"
+        with CaptureQueriesContext(connection) as captured:
+            poster.save()
+        self.assertEqual([query for query in captured.captured_queries if 'FROM "jobs"' in query["sql"]], [])
+        self.assertEqual(self.listed_job_ids(), ([5, 4, 3], 0))
+
+        poster.surname = "Renamed"
+        poster.save()
+        self.assertEqual(self.listed_job_ids(), ([5, 4, 3], 1))
+
+    @override_settings(USER_CACHE_SECONDS=300)
+    def test_cached_pages_hold_only_the_rendered_fields(self):
+        self.listed_job_ids()
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(reverse("jobs_list"), {"page_size": 3})
+        # Rendering the cached page doesn't go back for a deferred field.
+        self.assertEqual([query for query in captured.captured_queries if 'FROM "users"' in query["sql"]], [])
+        poster = next(iter(response.context["jobs"])).member.member_user
+        self.assertEqual((poster.given_name, poster.surname), ("Job", "Poster"))
+        self.assertLessEqual({"password", "email", "phone_number"}, poster.get_deferred_fields())
+
+    async def test_served_under_asgi(self):
+        await self.async_client.aforce_login(await AppUser.objects.aget(user_id=1))
+        response = await self.async_client.get(reverse("jobs_list"), {"page_size": 3})
+        self.assertEqual([job.job_id for job in response.context["jobs"]], [5, 4, 3])
+        response = await self.async_client.post(reverse("member_jobs"), {"required_caregiving_type": "Babysitter"})
+        self.assertEqual(response.status_code, 302)
+        response = await self.async_client.get(reverse("member_jobs"))
+        self.assertEqual(len(response.context["jobs"]), 6)
+
+
+@skipUnless(connection.vendor == "postgresql", "schema.sql is PostgreSQL-specific")
+class CaregiverSearchTests(TransactionTestCase):
+    def setUp(self):
+        load_schema()
+        # Caregivers 2 and 5 mention "nanny" three times, the others once; 6 does elderly care.
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO users (user_id, email, given_name, surname, city, password, profile_description) "
+                "SELECT g, 'care' || g || '@mail.com', 'Care', 'Giver', 'Astana', 'x', "
+                "CASE WHEN g IN (2, 5) THEN 'nanny nanny nanny' ELSE 'nanny' END FROM generate_series(1, 6) AS g"
+            )
+            cursor.execute(
+                "INSERT INTO caregivers (caregiver_user_id, caregiving_type, hourly_rate) "
+                "SELECT g, CASE WHEN g = 6 THEN 'Elderly Care' ELSE 'Babysitter' END, 10 "
+                "FROM generate_series(1, 6) AS g"
+            )
+
+    def search(self, **params):
+        response = self.client.get(reverse("search"), params)
+        context = response.context
+        return [c.caregiver_user_id for c in context["caregivers"]], context["page"].next_cursor, context
+
+    @override_settings(SEARCH_RANK_CANDIDATES=3)
+    def test_keyword_results_rank_the_first_candidates(self):
+        # 5 ranks higher than 1 and 3 but isn't among the three candidates.
+        ids, cursor, context = self.search(q="nanny", page_size=2)
+        self.assertEqual(ids, [2, 1])
+        self.assertEqual((context["result_count"], context["count_truncated"]), (3, True))
+
+        # The next page continues from the same candidates.
+        ids, cursor, _ = self.search(q="nanny", page_size=2, cursor=cursor)
+        self.assertEqual((ids, cursor), ([3], None))
+
+    @override_settings(SEARCH_EXACT_COUNT_LIMIT=4)
+    def test_broad_searches_page_by_id_and_estimate_large_counts(self):
+        ids, cursor, context = self.search(page_size=4)
+        self.assertEqual(ids, [1, 2, 3, 4])
+        # Past the exact limit the count comes from the planner, never below what was counted.
+        self.assertTrue(context["count_is_estimate"])
+        self.assertGreaterEqual(context["result_count"], 5)
+        ids, cursor, _ = self.search(page_size=4, cursor=cursor)
+        self.assertEqual((ids, cursor), ([5, 6], None))
+
+        _, _, context = self.search(caregiving_type="Elderly Care", city="asta")
+        self.assertEqual((context["result_count"], context["count_is_estimate"]), (1, False))
+
+    def test_api_leaves_out_contact_details(self):
+        page = self.client.get(reverse("api_caregivers"), {"q": "nanny", "page_size": 2}).json()
+        response = self.client.get(reverse("api_caregivers"), {"format": "ndjson"})
+        streamed = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual([caregiver["caregiver_user_id"] for caregiver in streamed], [1, 2, 3, 4, 5, 6])
+        for caregiver in page["results"] + streamed:
+            self.assertEqual(caregiver["surname"], "Giver")
+            self.assertNotIn("email", caregiver)
+            self.assertNotIn("phone_number", caregiver)
+
+
+def create_poster_with_jobs():
+    """
+    A member (user 1, poster@mail.com) with jobs 1-5 posted on consecutive
+    days from 2025-01-02, alternately Elderly Care and Babysitter; returns
+    the user.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO users (user_id, email, given_name, surname, city, password) "
+            "VALUES (1, 'poster@mail.com', 'Job', 'Poster', 'Astana', 'x')"
+        )
+        cursor.execute("INSERT INTO members (member_user_id) VALUES (1)")
+        cursor.execute(
+            "INSERT INTO jobs (job_id, member_user_id, required_caregiving_type, other_requirements, date_posted) "
+            "SELECT g, 1, CASE WHEN g % 2 = 0 THEN 'Babysitter' ELSE 'Elderly Care' END, '', "
+            "DATE '2025-01-01' + g FROM generate_series(1, 5) AS g"
+        )
+    return AppUser.objects.get(user_id=1)
+
+
+@skipUnless(connection.vendor == "postgresql", "schema.sql is PostgreSQL-specific")
+@override_settings(API_CHUNK_SIZE=2)
+class JobsApiTests(TransactionTestCase):
+    def setUp(self):
+        load_schema()
+        self.client.force_login(create_poster_with_jobs())
+
+    def test_pages_and_stream_list_the_same_jobs(self):
+        page = self.client.get(reverse("api_jobs"), {"page_size": 2}).json()
+        self.assertEqual([job["job_id"] for job in page["results"]], [5, 4])
+        self.assertEqual(page["results"][0]["member_surname"], "Poster")
+        page = self.client.get(reverse("api_jobs"), {"page_size": 2, "cursor": page["next_cursor"]}).json()
+        self.assertEqual([job["job_id"] for job in page["results"]], [3, 2])
+
+        response = self.client.get(reverse("api_jobs"), {"format": "ndjson"})
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        jobs = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual([job["job_id"] for job in jobs], [5, 4, 3, 2, 1])
+        self.assertEqual(jobs[0]["date_posted"], "2025-01-06")
+
+        response = self.client.get(
+            reverse("api_jobs"), {"caregiving_type": "Babysitter"}, HTTP_ACCEPT="application/x-ndjson"
+        )
+        lines = b"".join(response.streaming_content).splitlines()
+        self.assertEqual([json.loads(line)["job_id"] for line in lines], [4, 2])
+
+
+@skipUnless(connection.vendor == "postgresql", "schema.sql is PostgreSQL-specific")
+class MemberJobsTests(TransactionTestCase):
+    def setUp(self):
+        load_schema()
+        self.client.force_login(create_poster_with_jobs())
+        # Caregivers 2-4 applied to job 5, caregiver 2 also to job 4.
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO users (user_id, email, given_name, surname, city, password) "
+                "SELECT g, 'care' || g || '@mail.com', 'Care', 'Giver' || g, 'Astana', 'x' "
+                "FROM generate_series(2, 4) AS g"
+            )
+            cursor.execute(
+                "INSERT INTO caregivers (caregiver_user_id, caregiving_type, hourly_rate) "
+                "SELECT g, 'Babysitter', 10 FROM generate_series(2, 4) AS g"
+            )
+            cursor.execute(
+                "INSERT INTO job_applications (caregiver_user_id, job_id, date_applied) "
+                "SELECT g, 5, DATE '2025-01-07' FROM generate_series(2, 4) AS g "
+                "UNION ALL SELECT 2, 4, DATE '2025-01-07'"
+            )
+
+    def test_pages_show_applicant_counts(self):
+        page = self.client.get(reverse("member_jobs"), {"page_size": 2}).context["page"]
+        self.assertEqual([(job.job_id, job.applicant_count) for job in page], [(5, 3), (4, 1)])
+        page = self.client.get(reverse("member_jobs"), {"page_size": 2, "cursor": page.next_cursor}).context["page"]
+        self.assertEqual([(job.job_id, job.applicant_count) for job in page], [(3, 0), (2, 0)])
+
+    def test_applicants_are_paged_by_caregiver(self):
+        url = reverse("job_applicants", args=[5])
+        context = self.client.get(url, {"page_size": 2}).context
+        self.assertEqual([applicant["name"] for applicant in context["applicants"]], ["Care Giver2", "Care Giver3"])
+        context = self.client.get(url, {"page_size": 2, "cursor": context["page"].next_cursor}).context
+        self.assertEqual([applicant["caregiver_user_id"] for applicant in context["applicants"]], [4])
+        self.assertIsNone(context["page"].next_cursor)
+
+        # Only the job's own member sees its applicants.
+        self.client.force_login(AppUser.objects.get(user_id=2))
+        self.assertEqual(self.client.get(url).status_code, 302)
+        with connection.cursor() as cursor:
+            cursor.execute("INSERT INTO members (member_user_id) VALUES (2)")
+        bump_identity_version(2)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+@skipUnless(connection.vendor == "postgresql", "schema.sql is PostgreSQL-specific")
+class ReportTests(TransactionTestCase):
+    def setUp(self):
+        load_schema()
+        staff = create_poster_with_jobs()
+        staff.is_staff = True
+        staff.save()
+        self.client.force_login(staff)
+        # Caregiver 2 (10/h) and 3 (30/h), one accepted booking each; 2 applied to job 5.
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO users (user_id, email, given_name, surname, city, password) "
+                "SELECT g, 'care' || g || '@mail.com', 'Care', 'Giver', 'Astana', 'x' "
+                "FROM generate_series(2, 3) AS g"
+            )
+            cursor.execute(
+                "INSERT INTO caregivers (caregiver_user_id, caregiving_type, hourly_rate) "
+                "VALUES (2, 'Babysitter', 10), (3, 'Babysitter', 30)"
+            )
+            cursor.execute(
+                "INSERT INTO appointments (caregiver_user_id, member_user_id, appointment_date, appointment_time, "
+                "work_hours, status) VALUES (2, 1, '2025-03-01', '09:00', 2, 'Accepted'), "
+                "(3, 1, '2025-03-01', '09:00', 3, 'Accepted'), (3, 1, '2025-03-02', '09:00', 8, 'Pending')"
+            )
+            cursor.execute(
+                "INSERT INTO job_applications (caregiver_user_id, job_id, date_applied) VALUES (2, 5, '2025-01-07')"
+            )
+
+    def report(self, name, **params):
+        return self.client.get(reverse(name), params)
+
+    def test_reports_read_the_last_refresh(self):
+        self.assertEqual(self.report("reports_summary").status_code, 503)
+        call_command("refresh_reports", stdout=StringIO())
+
+        totals = self.report("reports_summary").json()
+        self.assertEqual(
+            [totals[key] for key in ("accepted_appointments", "total_hours", "average_pay", "total_cost")],
+            [2, 5, "20.0000000000000000", "110.00"],
+        )
+        caregivers = self.report("report_above_average_caregivers").json()["results"]
+        self.assertEqual([caregiver["caregiver_user_id"] for caregiver in caregivers], [3])
+        page = self.report("report_job_applicants", page_size=3).json()
+        self.assertEqual([row["job_id"] for row in page["results"]], [1, 2, 3])
+        page = self.report("report_job_applicants", page_size=3, cursor=page["next_cursor"]).json()
+        self.assertEqual([(row["job_id"], row["applicant_count"]) for row in page["results"]], [(4, 0), (5, 1)])
+        self.assertIsNone(page["next_cursor"])
+
+        # Changes show up after the next (concurrent) refresh only.
+        with connection.cursor() as cursor:
+            cursor.execute("UPDATE appointments SET status = 'Accepted' WHERE status = 'Pending'")
+        self.assertEqual(self.report("reports_summary").json()["total_hours"], 5)
+        call_command("refresh_reports", "report_accepted_totals", stdout=StringIO())
+        self.assertEqual(self.report("reports_summary").json()["total_hours"], 13)
+
+        self.client.force_login(AppUser.objects.get(user_id=2))
+        self.assertEqual(self.report("reports_summary").status_code, 404)
+
+
+@skipUnless(connection.vendor == "postgresql", "schema.sql is PostgreSQL-specific")
+class BulkApplyTests(TransactionTestCase):
+    def setUp(self):
+        load_schema()
+        create_poster_with_jobs()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO users (user_id, email, given_name, surname, city, password) "
+                "VALUES (2, 'sitter@mail.com', 'Baby', 'Sitter', 'Astana', 'x')"
+            )
+            cursor.execute(
+                "INSERT INTO caregivers (caregiver_user_id, caregiving_type, hourly_rate) VALUES (2, 'Babysitter', 10)"
+            )
+        self.client.force_login(AppUser.objects.get(user_id=2))
+
+    def apply(self, job_ids):
+        response = self.client.post(reverse("bulk_apply_jobs"), {"job_ids": job_ids}, HTTP_ACCEPT="application/json")
+        return {result["job_id"]: result["status"] for result in response.json()["results"]}
+
+    def test_statuses_per_job(self):
+        self.assertEqual(self.apply("1,2,99"), {1: "applied", 2: "applied", 99: "not_found"})
+        self.assertEqual(self.apply(["2", "3"]), {2: "already_applied", 3: "applied"})
+        self.assertEqual(sorted(JobApplication.objects.values_list("job_id", flat=True)), [1, 2, 3])
+
+    def test_ids_outside_the_integer_range_are_not_found(self):
+        self.assertEqual(
+            self.apply("4,2147483648,0,-1"), {4: "applied", 2147483648: "not_found", 0: "not_found", -1: "not_found"}
+        )
+        self.assertEqual(self.apply("99999999999"), {99999999999: "not_found"})
+        response = self.client.post(reverse("apply_job", args=[2147483648]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_job_deleted_mid_statement_is_reported_missing(self):
+        deleting, done = Event(), Event()
+
+        def delete_job():
+            try:
+                with transaction.atomic(), connection.cursor() as cursor:
+                    cursor.execute("DELETE FROM jobs WHERE job_id = 4")
+                    deleting.set()
+                    # Hold the row lock until the insert's foreign key check waits on it.
+                    time.sleep(0.5)
+            finally:
+                connections.close_all()
+                done.set()
+
+        Thread(target=delete_job).start()
+        deleting.wait(10)
+        self.assertEqual(self.apply("4,5"), {4: "not_found", 5: "applied"})
+        done.wait(10)
+        self.assertEqual(list(JobApplication.objects.values_list("job_id", flat=True)), [5])
+
+
+@skipUnless(connection.vendor == "postgresql", "schema.sql is PostgreSQL-specific")
+@override_settings(EXPORT_CHUNK_BYTES=16, EXPORT_QUEUE_CHUNKS=1)
+class CsvExportTests(TransactionTestCase):
+    def setUp(self):
+        load_schema()
+        self.client.force_login(create_poster_with_jobs())
+
+    def export(self, name, **params):
+        return self.client.get(reverse("export_csv", args=[name]), params)
+
+    def test_staff_download_date_filtered_and_gzipped_csv(self):
+        self.assertEqual(self.export("jobs").status_code, 404)
+        poster = AppUser.objects.get(user_id=1)
+        poster.is_staff = True
+        poster.save()
+
+        response = self.export("jobs", since="2025-01-03", until="2025-01-05", gzip="1")
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="jobs.csv.gz"')
+        rows = list(csv.reader(gzip.decompress(b"".join(response.streaming_content)).decode().splitlines()))
+        self.assertEqual(
+            rows[0], ["job_id", "member_user_id", "required_caregiving_type", "other_requirements", "date_posted"]
+        )
+        self.assertEqual(sorted(row[0] for row in rows[1:]), ["2", "3", "4"])
+
+        rows = b"".join(self.export("view_job_applications").streaming_content).decode().splitlines()
+        self.assertEqual(rows, ["job_id,employer,applicant_name,date_applied"])
+        self.assertEqual(self.export("users", since="2025-01-01").status_code, 400)
+        self.assertEqual(self.export("jobs", since="yesterday").status_code, 400)
+
+    async def test_cancelled_async_stream_stops_the_copy(self):
+        # One row every 0.2s, so the reader is cancelled while waiting on the COPY.
+        stream = await sync_to_async(iter_csv)(Export("slow", "SELECT job_id, pg_sleep(0.2) FROM jobs", None))
+        chunks = _aiter(stream)
+        reading = asyncio.ensure_future(anext(chunks))
+        await asyncio.sleep(0.05)
+        reading.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await reading
+        self.assertTrue(stream.stopped.is_set())
+        self.assertFalse(stream.worker.is_alive())
+
+
+@skipUnless(connection.vendor == "postgresql", "schema.sql is PostgreSQL-specific")
+class ImporterTests(TransactionTestCase):
+    feed = [
+        {"model": "core.appuser", "pk": 1, "fields": {
+            "email": "ann@partner.invalid", "given_name": "Ann", "surname": "Lee", "city": "Astana", "password": "x",
+        }},
+        {"model": "core.appuser", "pk": 2, "fields": {
+            "email": "poster@mail.com", "given_name": "Jo", "surname": "Poster", "city": "Astana", "password": "x",
+        }},
+        {"model": "core.appuser", "pk": 4, "fields": {
+            "email": "ann@partner.invalid", "given_name": "Anna", "surname": "Lee", "city": "Astana", "password": "x",
+        }},
+        {"model": "core.appuser", "pk": 6, "fields": {
+            "email": "not-an-email", "given_name": "Bo", "surname": "Ek", "city": "Almaty", "password": "x",
+        }},
+        {"model": "core.caregiver", "pk": 1, "fields": {"caregiving_type": "Babysitter", "hourly_rate": "12.50"}},
+        {"model": "core.job", "fields": {
+            "member": 2, "required_caregiving_type": "Babysitter", "date_posted": "2025-02-01",
+        }},
+        {"model": "core.job", "fields": {
+            "member": 6, "required_caregiving_type": "Babysitter", "date_posted": "2025-02-01",
+        }},
+        {"model": "core.jobapplication", "pk": 3, "fields": {"caregiver": 1, "date_applied": "2025-02-02"}},
+    ]
+
+    def setUp(self):
+        load_schema()
+        create_poster_with_jobs()
+
+    def import_feed(self, **kwargs):
+        with TemporaryDirectory() as directory:
+            path = Path(directory) / "feed.ndjson"
+            path.write_text("".join(json.dumps(record) + "\n" for record in self.feed))
+            return import_records(path, **kwargs)
+
+    def test_users_matched_by_email_and_bad_records_rejected(self):
+        report = self.import_feed(batch_size=2)
+
+        # Pk 1 is taken by poster@mail.com, whose feed pk 2 now means user 1;
+        # Ann gets an id above the feed's highest pk.
+        ann = AppUser.objects.get(email="ann@partner.invalid")
+        self.assertEqual((ann.user_id, ann.given_name), (7, "Ann"))
+        self.assertEqual(AppUser.objects.get(user_id=1).given_name, "Job")
+        self.assertTrue(JobApplication.objects.filter(caregiver_id=7, job_id=3).exists())
+        self.assertEqual(Job.objects.get(job_id=6).member_id, 1)
+
+        users = report.models["core.appuser"]
+        # The second ann@partner.invalid is in the next batch: skipped, not merged.
+        self.assertEqual((users.read, users.written, users.skipped, users.merged, users.rejected), (4, 1, 2, 0, 1))
+        self.assertEqual(
+            [(rejection.model, rejection.reason) for rejection in report.rejections],
+            [
+                ("core.appuser", "email: Enter a valid email address."),
+                ("core.job", "member: 6 does not exist."),
+            ],
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence('users', 'user_id')), "
+                "nextval(pg_get_serial_sequence('jobs', 'job_id'))"
+            )
+            self.assertEqual(cursor.fetchone(), (8, 7))
+
+    def test_dry_run_and_update(self):
+        self.import_feed(update=True, dry_run=True)
+        self.assertEqual(AppUser.objects.count(), 1)
+
+        self.import_feed(update=True)
+        self.assertEqual(AppUser.objects.get(user_id=1).given_name, "Jo")
+        self.assertEqual(AppUser.objects.get(email="ann@partner.invalid").given_name, "Anna")
+
+    def test_job_ids_taken_by_another_members_job_are_remapped(self):
+        self.feed = [
+            {"model": "core.appuser", "pk": 1, "fields": {
+                "email": "kim@partner.invalid", "given_name": "Kim", "surname": "Oh", "city": "Astana", "password": "x",
+            }},
+            {"model": "core.appuser", "pk": 9, "fields": {
+                "email": "poster@mail.com", "given_name": "Job", "surname": "Poster", "city": "Astana", "password": "x",
+            }},
+            {"model": "core.caregiver", "pk": 1, "fields": {"caregiving_type": "Babysitter", "hourly_rate": "10"}},
+            {"model": "core.member", "pk": 1, "fields": {}},
+            # Job 3 exists but is user 1's; job 4 is the poster's own, already imported.
+            {"model": "core.job", "pk": 3, "fields": {
+                "member": 1, "required_caregiving_type": "Babysitter", "date_posted": "2025-03-01",
+            }},
+            {"model": "core.job", "pk": 4, "fields": {
+                "member": 9, "required_caregiving_type": "Babysitter", "other_requirements": "Updated",
+                "date_posted": "2025-01-05",
+            }},
+            {"model": "core.jobapplication", "fields": {"caregiver": 1, "job": 3, "date_applied": "2025-03-02"}},
+        ]
+        self.import_feed(update=True)
+
+        kim = AppUser.objects.get(email="kim@partner.invalid").user_id
+        self.assertEqual(kim, 10)
+        self.assertEqual(
+            list(
+                Job.objects.filter(job_id__in=[3, 4, 6])
+                .order_by("job_id")
+                .values_list("job_id", "member_id", "other_requirements")
+            ),
+            [(3, 1, ""), (4, 1, "Updated"), (6, kim, None)],
+        )
+        self.assertEqual(list(JobApplication.objects.values_list("caregiver_id", "job_id")), [(kim, 6)])
+
+
+class MatchingIndexTests(SimpleTestCase):
+    # (caregiver_user_id, caregiving_type, city, hourly_rate, has_photo, described, accepted appointments)
+    rows = [
+        (1, "Babysitter", "ASTANA", 10, True, True, 5),
+        (2, "Babysitter", "ALMATY", 10, True, True, 5),
+        (3, "Babysitter", "ASTANA", 30, False, False, 0),
+        (4, "Elderly Care", "ASTANA", 10, True, True, 5),
+    ]
+
+    def setUp(self):
+        self.index = MatchingIndex()
+        self.index.load(self.rows)
+
+    def ranked(self, *args, **kwargs):
+        return [caregiver_user_id for caregiver_user_id, _ in self.index.top(*args, **kwargs)]
+
+    def test_ranks_within_caregiving_type_preferring_the_jobs_city(self):
+        self.assertEqual(self.ranked("Babysitter", "Astana", 10), [1, 3, 2])
+        self.assertEqual(self.ranked("Babysitter", "Almaty", 1), [2])
+        # Having applied lifts 2 above a weaker local caregiver, not above an equal one.
+        self.assertEqual(self.ranked("Babysitter", "Astana", 10, applicant_ids=[2]), [1, 2, 3])
+
+    def test_incremental_updates(self):
+        self.index.upsert(
+            [
+                (2, "Babysitter", "ASTANA", 5, True, True, 20),  # moved and improved
+                (5, "Babysitter", "ASTANA", 10, True, True, 5),  # new
+                (4, "Babysitter", "ASTANA", 10, True, True, 5),  # changed caregiving type
+            ]
+        )
+        self.index.remove([1])
+        self.assertEqual(self.ranked("Babysitter", "Astana", 10), [2, 4, 5, 3])
+        self.assertEqual(self.ranked("Elderly Care", "Astana", 10), [])
+        self.assertEqual(len(self.index), 4)
+
+
+@skipUnless(connection.vendor == "postgresql", "core.pooled_postgresql is PostgreSQL-only")
+class PooledBackendTests(TransactionTestCase):
+    alias = "pooled"
+    pool = {"SIZE": 1, "MAX_OVERFLOW": 0, "TIMEOUT": 0.2, "RECYCLE": 1800, "PRE_PING": True}
+
+    def wrapper(self):
+        wrapper = PooledDatabaseWrapper({**connection.settings_dict, "POOL": self.pool}, self.alias)
+        self.addCleanup(wrapper.close_pool)
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def test_connections_are_reused_and_checkouts_wait_for_one(self):
+        first, second = self.wrapper(), self.wrapper()
+        first.ensure_connection()
+        backend_pid = first.connection.get_backend_pid()
+        self.assertEqual(pool_status()[self.alias], {"size": 1, "checked_out": 1, "idle": 0, "overflow": 0})
+
+        started = time.monotonic()
+        with self.assertRaises(exc.TimeoutError):
+            second.ensure_connection()
+        self.assertGreaterEqual(time.monotonic() - started, self.pool["TIMEOUT"])
+
+        first.close()
+        self.assertEqual(pool_status()[self.alias], {"size": 1, "checked_out": 0, "idle": 1, "overflow": 0})
+        second.ensure_connection()
+        self.assertEqual(second.connection.get_backend_pid(), backend_pid)
+        second.close()
+        first.ensure_connection()
+        self.assertEqual(first.connection.get_backend_pid(), backend_pid)
+
+
+@override_settings(DATABASE_REPLICAS=["replica_1"])
+class ReplicaRoutingTests(SimpleTestCase):
+    factory = RequestFactory()
+
+    def read_alias(self, request):
+        @replica_reads
+        def view(request):
+            view.alias = router.db_for_read(Job)
+            return HttpResponse()
+
+        view(request)
+        return view.alias
+
+    def test_only_unpinned_reads_of_opted_in_views_use_a_replica(self):
+        self.assertEqual(self.read_alias(self.factory.get("/")), "replica_1")
+        self.assertEqual(self.read_alias(self.factory.post("/")), "default")
+        pinned = self.factory.get("/")
+        pinned.COOKIES[PIN_COOKIE] = "1"
+        self.assertEqual(self.read_alias(pinned), "default")
+        self.assertEqual(router.db_for_read(Job), "default")
+        self.assertEqual(router.db_for_write(Job), "default")
+
+    async def test_async_views_read_from_a_replica(self):
+        @replica_reads
+        async def view(request):
+            view.alias = router.db_for_read(Job)
+            return HttpResponse()
+
+        await view(self.factory.get("/"))
+        self.assertEqual(view.alias, "replica_1")
+
+    def test_writes_pin_the_client_to_the_primary(self):
+        middleware = ReplicaPinMiddleware(lambda request: HttpResponse())
+        self.assertIn(PIN_COOKIE, middleware(self.factory.post("/")).cookies)
+        self.assertNotIn(PIN_COOKIE, middleware(self.factory.get("/")).cookies)
+
+
+class SqlStatsTests(SimpleTestCase):
+    def record(self, *statements):
+        recorder = QueryRecorder()
+        for sql in statements:
+            recorder(lambda sql, params, many, context: None, sql, None, False, {})
+        return recorder
+
+    def test_normalize_sql_keeps_only_the_shape(self):
+        self.assertEqual(
+            normalize_sql("SELECT *  FROM users\n WHERE email = 'o''neil@mail.com' AND user_id IN (%s, %s, %s)"),
+            "SELECT * FROM users WHERE email = ? AND user_id IN (...)",
+        )
+        self.assertEqual(normalize_sql("SELECT 1.5, 42 FROM t2"), normalize_sql("SELECT 7, 3 FROM t2"))
+
+    @override_settings(SQL_REPEAT_THRESHOLD=3, SQL_QUERY_BUDGETS={"default": (20, 1000)})
+    def test_statements_repeated_up_to_the_threshold_are_flagged(self):
+        statements = [f"SELECT * FROM jobs WHERE job_id = {job_id}" for job_id in range(3)]
+        self.assertEqual(check_request("jobs_list", self.record(*statements[:2])), [])
+        self.assertEqual(
+            check_request("jobs_list", self.record(*statements)),
+            ["statement repeated 3 times (possible N+1): SELECT * FROM jobs WHERE job_id = ?"],
+        )
+
+    @override_settings(SQL_QUERY_BUDGETS={"default": (20, 1000), "jobs_list": (2, 1000)})
+    def test_budget_overruns_log_a_warning(self):
+        recorder = self.record("SELECT 1", "SELECT 'a'", "SELECT 'b'")
+        self.assertEqual(check_request("search", recorder), [])
+        problems = check_request("jobs_list", recorder)
+        self.assertEqual(problems, ["3 queries (budget 2)"])
+
+        with self.assertLogs("core.sql", "WARNING") as logs:
+            log_request(RequestFactory().get("/jobs/"), HttpResponse(), "jobs_list", recorder, problems)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual((record["view"], record["queries"], record["problems"]), ("jobs_list", 3, problems))
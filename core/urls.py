@@ -10,8 +10,33 @@ urlpatterns = [
     path("register/member/", views.register_member, name="register_member"),
     path("search/", views.search_caregivers, name="search"),
     path("member/jobs/", views.member_jobs, name="member_jobs"),
+    path("member/jobs/<int:job_id>/applicants/", views.job_applicants, name="job_applicants"),
+    path("member/jobs/<int:job_id>/matches/", views.job_matches, name="job_matches"),
     path("jobs/", views.jobs_list, name="jobs_list"),
+    path("api/jobs/", views.api_jobs, name="api_jobs"),
+    path("api/caregivers/", views.api_caregivers, name="api_caregivers"),
     path("jobs/<int:job_id>/apply/", views.apply_job, name="apply_job"),
+    path("jobs/apply/", views.bulk_apply_jobs, name="bulk_apply_jobs"),
+    path("appointments/", views.book_appointment, name="book_appointment"),
+    path(
+        "appointments/<int:appointment_id>/respond/",
+        views.respond_appointment,
+        name="respond_appointment",
+    ),
+    path(
+        "caregivers/<int:caregiver_user_id>/bookings/",
+        views.caregiver_bookings,
+        name="caregiver_bookings",
+    ),
     path("users/", views.users, name="users"),
     path("users/<int:pk>/delete/", views.delete_user, name="delete_user"),
+    path("metrics/sql/", views.sql_metrics, name="sql_metrics"),
+    path("exports/<str:name>/", views.export_csv, name="export_csv"),
+    path("reports/", views.reports_summary, name="reports_summary"),
+    path(
+        "reports/above-average-caregivers/",
+        views.report_above_average_caregivers,
+        name="report_above_average_caregivers",
+    ),
+    path("reports/job-applicants/", views.report_job_applicants, name="report_job_applicants"),
 ]
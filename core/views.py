@@ -1,22 +1,46 @@
+from datetime import date
+
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.contrib import messages
-from django.contrib.auth import authenticate, login, logout
+from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required
-from django.core.files.storage import FileSystemStorage
-from django.db import connection, transaction
+from django.db import IntegrityError, ProgrammingError, connection, transaction
+from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 from django.utils import timezone
 from django.views.decorators.http import require_POST
 
+from .api import CAREGIVER_FIELDS, JOB_FIELDS, json_page, ndjson_response, wants_ndjson
+from .db_router import read_connection, replica_reads
+from .exports import EXPORTS, ExportError, csv_response
 from .forms import (
+    AppointmentForm,
     AppUserForm,
     CaregiverRegistrationForm,
     EmailAuthenticationForm,
     JobForm,
     MemberRegistrationForm,
 )
-from .models import Address, AppUser, Caregiver, Job, Member
+from .listings import PAGE_FIELDS, acached_jobs_page
+from .matching import caregiver_changed, rank_caregivers
+from .models import Address, Appointment, AppUser, Caregiver, Job, Member
+from .pagination import (
+    KeysetPage,
+    apaginate_caregivers,
+    apaginate_jobs,
+    decode_cursor,
+    encode_cursor,
+    get_page_size,
+    paginate_caregivers,
+    paginate_jobs,
+)
+from .photos import schedule_processing, stage_upload
+from .pooled_postgresql.base import pool_status
+from .reports import fetch_above_average_caregivers, fetch_accepted_totals, fetch_job_applicant_counts
+from .search import acount_caregivers, find_caregivers
+from .sql_stats import view_totals
 
 
 def home(request):
@@ -25,14 +49,10 @@ def home(request):
 
 def login_view(request):
     form = EmailAuthenticationForm(request, data=request.POST or None)
+    # The form authenticates while validating; a second authenticate() would hash the password again.
     if request.method == "POST" and form.is_valid():
-        user = authenticate(
-            request, username=form.cleaned_data["username"], password=form.cleaned_data["password"]
-        )
-        if user:
-            login(request, user)
-            return redirect(reverse("home"))
-        messages.error(request, "Invalid credentials.")
+        login(request, form.get_user())
+        return redirect(reverse("home"))
     return render(request, "auth/login.html", {"form": form})
 
 
@@ -46,7 +66,6 @@ def users(request):
     users_qs = AppUser.objects.order_by("user_id")
 
     if request.method == "POST":
-        _sync_user_id_sequence()
         form = AppUserForm(request.POST)
         if form.is_valid():
             form.save()
@@ -60,11 +79,13 @@ def users(request):
 def register_caregiver(request):
     form = CaregiverRegistrationForm(request.POST or None, request.FILES or None)
     if request.method == "POST" and form.is_valid():
+        # Stream the photo to staging before opening the transaction so a slow
+        # upload never holds a DB connection; the photo worker finishes it.
+        upload = request.FILES.get("photo")
+        staged_photo = stage_upload(upload) if upload else None
         with transaction.atomic():
-            from django.contrib.auth import get_user_model
             from django.contrib.auth.hashers import make_password
 
-            _sync_user_id_sequence()
             password_raw = form.cleaned_data["password1"]
             hashed_pw = make_password(password_raw)
             app_user = AppUser.objects.create(
@@ -76,32 +97,16 @@ def register_caregiver(request):
                 profile_description=form.cleaned_data.get("profile_description") or "",
                 password=hashed_pw,
             )
-            User = get_user_model()
-            user = User.objects.create(
-                username=app_user.email,
-                email=app_user.email,
-                first_name=app_user.given_name,
-                last_name=app_user.surname,
-                password=hashed_pw,
-            )
-            photo_url = ""
-            upload = request.FILES.get("photo")
-            if upload:
-                storage = FileSystemStorage(
-                    location=settings.MEDIA_ROOT,
-                    base_url=settings.MEDIA_URL,
-                )
-                saved_path = storage.save(f"caregiver_photos/{upload.name}", upload)
-                photo_url = storage.url(saved_path)
             Caregiver.objects.create(
                 caregiver_user=app_user,
                 caregiving_type=form.cleaned_data["caregiving_type"],
                 gender=form.cleaned_data.get("gender") or "",
                 hourly_rate=form.cleaned_data["hourly_rate"],
-                photo=photo_url,
+                photo="",
             )
-        user.backend = "core.auth_backends.AppUserBackend"
-        login(request, user)
+            if staged_photo:
+                schedule_processing(app_user.user_id, staged_photo)
+        login(request, app_user, backend="core.auth_backends.AppUserBackend")
         messages.success(request, "Caregiver account created.")
         return redirect(reverse("jobs_list"))
 
@@ -112,10 +117,8 @@ def register_member(request):
     form = MemberRegistrationForm(request.POST or None)
     if request.method == "POST" and form.is_valid():
         with transaction.atomic():
-            from django.contrib.auth import get_user_model
             from django.contrib.auth.hashers import make_password
 
-            _sync_user_id_sequence()
             password_raw = form.cleaned_data["password1"]
             hashed_pw = make_password(password_raw)
             app_user = AppUser.objects.create(
@@ -126,14 +129,6 @@ def register_member(request):
                 phone_number=form.cleaned_data.get("phone_number") or "",
                 password=hashed_pw,
             )
-            User = get_user_model()
-            user = User.objects.create(
-                username=app_user.email,
-                email=app_user.email,
-                first_name=app_user.given_name,
-                last_name=app_user.surname,
-                password=hashed_pw,
-            )
 
             member = Member.objects.create(
                 member_user=app_user,
@@ -146,40 +141,52 @@ def register_member(request):
                 street=form.cleaned_data.get("street") or "",
                 town=form.cleaned_data.get("town") or "",
             )
-        user.backend = "core.auth_backends.AppUserBackend"
-        login(request, user)
+        login(request, app_user, backend="core.auth_backends.AppUserBackend")
         messages.success(request, "Member account created.")
         return redirect(reverse("member_jobs"))
 
     return render(request, "auth/register_member.html", {"form": form})
 
 
-def search_caregivers(request):
+@replica_reads
+async def search_caregivers(request):
     caregiving_type = request.GET.get("caregiving_type") or ""
     city = request.GET.get("city") or ""
-    caregivers = Caregiver.objects.select_related("caregiver_user")
-    if caregiving_type:
-        caregivers = caregivers.filter(caregiving_type=caregiving_type)
-    if city:
-        caregivers = caregivers.filter(caregiver_user__city__icontains=city)
+    q = (request.GET.get("q") or "").strip()
+    page = await apaginate_caregivers(
+        find_caregivers(caregiving_type=caregiving_type, city=city, q=q),
+        request.GET.get("cursor"),
+        get_page_size(request, default=settings.SEARCH_PAGE_SIZE),
+        ranked=bool(q),
+    )
+    result_count = await acount_caregivers(caregiving_type=caregiving_type, city=city, q=q)
     return render(
         request,
         "search.html",
-        {"caregivers": caregivers, "selected_type": caregiving_type, "city": city},
+        {
+            "caregivers": page,
+            "page": page,
+            "result_count": result_count.count,
+            "count_is_estimate": result_count.is_estimate,
+            "count_truncated": result_count.truncated,
+            "selected_type": caregiving_type,
+            "city": city,
+            "q": q,
+        },
     )
 
 
 @login_required
-def member_jobs(request):
-    member = _get_member_for_request(request)
+@replica_reads
+async def member_jobs(request):
+    member = request.member
     if not member:
         messages.error(request, "Member profile required to manage jobs.")
         return redirect(reverse("home"))
 
     form = JobForm(request.POST or None)
     if request.method == "POST" and form.is_valid():
-        _sync_job_id_sequence()
-        Job.objects.create(
+        await Job.objects.acreate(
             member=member,
             required_caregiving_type=form.cleaned_data["required_caregiving_type"],
             other_requirements=form.cleaned_data.get("other_requirements") or "",
@@ -188,35 +195,100 @@ def member_jobs(request):
         messages.success(request, "Job posted.")
         return redirect(reverse("member_jobs"))
 
-    jobs = Job.objects.filter(member=member).order_by("-date_posted", "-job_id")
-    applicants_by_job = _fetch_applicants_for_jobs(jobs)
-    for job in jobs:
-        job.applicants = applicants_by_job.get(job.job_id, [])
+    page = await apaginate_jobs(
+        Job.objects.filter(member=member), request.GET.get("cursor"), get_page_size(request)
+    )
+    counts = await sync_to_async(_fetch_applicant_counts)([job.job_id for job in page])
+    for job in page:
+        job.applicant_count = counts.get(job.job_id, 0)
     return render(
         request,
         "member_jobs.html",
-        {"form": form, "jobs": jobs},
+        {"form": form, "jobs": page, "page": page},
     )
 
 
 @login_required
-def jobs_list(request):
+def job_applicants(request, job_id):
+    member = request.member
+    if not member:
+        messages.error(request, "Member profile required to manage jobs.")
+        return redirect(reverse("home"))
+    job = get_object_or_404(Job, pk=job_id, member=member)
+
+    page_size = get_page_size(request)
+    after = decode_cursor(request.GET.get("cursor"), int)
+    applicants = _fetch_applicants_page(job.job_id, after[0] if after else 0, page_size + 1)
+    next_cursor = None
+    if len(applicants) > page_size:
+        applicants = applicants[:page_size]
+        next_cursor = encode_cursor(applicants[-1]["caregiver_user_id"])
+    return render(
+        request,
+        "job_applicants.html",
+        {"job": job, "applicants": applicants, "page": KeysetPage(applicants, next_cursor, page_size)},
+    )
+
+
+@login_required
+def job_matches(request, job_id):
+    """
+    The best-matching caregivers for one of the member's jobs, ranked by the
+    in-memory matching index (core.matching); `?page_size=` sets how many.
+    """
+    member = request.member
+    if not member:
+        return JsonResponse({"error": "Only members can match caregivers to jobs."}, status=403)
+    job = get_object_or_404(Job, pk=job_id, member=member)
+
+    matches = rank_caregivers(job, get_page_size(request, settings.MATCHING_RESULTS))
+    caregivers = Caregiver.objects.select_related("caregiver_user").in_bulk([pk for pk, _ in matches])
+    return JsonResponse(
+        {
+            "job_id": job.job_id,
+            "results": [
+                {
+                    "caregiver_user_id": pk,
+                    "name": str(caregivers[pk].caregiver_user),
+                    "city": caregivers[pk].caregiver_user.city,
+                    "hourly_rate": caregivers[pk].hourly_rate,
+                    "score": round(score, 4),
+                }
+                for pk, score in matches
+                # Deleted since the index last synced.
+                if pk in caregivers
+            ],
+        }
+    )
+
+
+@login_required
+@replica_reads
+async def jobs_list(request):
     caregiving_type = request.GET.get("caregiving_type") or ""
-    jobs = Job.objects.select_related("member__member_user")
+    jobs = Job.objects.select_related("member__member_user").only(*PAGE_FIELDS)
     if caregiving_type:
         jobs = jobs.filter(required_caregiving_type=caregiving_type)
-    jobs = jobs.order_by("-date_posted", "-job_id")
+    page_size = get_page_size(request)
+    # The page is shared by everyone (see core.listings); the applied overlay below is per caregiver.
+    page = await acached_jobs_page(
+        caregiving_type,
+        request.GET.get("cursor"),
+        page_size,
+        lambda cursor: apaginate_jobs(jobs, cursor, page_size),
+    )
 
-    caregiver = _get_caregiver_for_request(request)
+    caregiver = request.caregiver
     applied_job_ids = set()
     if caregiver:
-        applied_job_ids = _fetch_applied_job_ids(caregiver.caregiver_user_id)
+        applied_job_ids = await sync_to_async(_fetch_applied_job_ids)(caregiver.caregiver_user_id)
 
     return render(
         request,
         "jobs_list.html",
         {
-            "jobs": jobs,
+            "jobs": page,
+            "page": page,
             "caregiving_type": caregiving_type,
             "caregiver": caregiver,
             "applied_job_ids": applied_job_ids,
@@ -224,33 +296,185 @@ def jobs_list(request):
     )
 
 
+@replica_reads
+def api_caregivers(request):
+    """
+    Caregivers matching the search filters (caregiving_type, city, q) as JSON
+    pages, or all of them as NDJSON with `?format=ndjson`; see core.api.
+    """
+    caregiving_type = request.GET.get("caregiving_type") or ""
+    city = request.GET.get("city") or ""
+    q = (request.GET.get("q") or "").strip()
+    caregivers = find_caregivers(caregiving_type=caregiving_type, city=city, q=q)
+    if wants_ndjson(request):
+        return ndjson_response(request, caregivers, CAREGIVER_FIELDS)
+    page = paginate_caregivers(
+        caregivers,
+        request.GET.get("cursor"),
+        get_page_size(request, default=settings.SEARCH_PAGE_SIZE),
+        ranked=bool(q),
+    )
+    return json_page(page, CAREGIVER_FIELDS)
+
+
+@login_required
+@replica_reads
+def api_jobs(request):
+    """
+    Jobs, newest first and filtered like jobs_list, as JSON pages or all of
+    them as NDJSON with `?format=ndjson`; see core.api.
+    """
+    caregiving_type = request.GET.get("caregiving_type") or ""
+    jobs = Job.objects.select_related("member__member_user")
+    if caregiving_type:
+        jobs = jobs.filter(required_caregiving_type=caregiving_type)
+    if wants_ndjson(request):
+        return ndjson_response(request, jobs.order_by("-date_posted", "-job_id"), JOB_FIELDS)
+    return json_page(paginate_jobs(jobs, request.GET.get("cursor"), get_page_size(request)), JOB_FIELDS)
+
+
 @login_required
 @require_POST
 def apply_job(request, job_id):
-    job = get_object_or_404(Job, pk=job_id)
-    caregiver = _get_caregiver_for_request(request)
+    caregiver = request.caregiver
     if not caregiver:
         messages.error(request, "Only caregivers can apply to jobs.")
         return redirect(reverse("jobs_list"))
 
-    with connection.cursor() as cursor:
-        cursor.execute(
-            "SELECT 1 FROM job_applications WHERE caregiver_user_id=%s AND job_id=%s",
-            [caregiver.caregiver_user_id, job_id],
+    status = _apply_to_jobs(caregiver.caregiver_user_id, [job_id])[job_id]
+    if status == APPLY_NOT_FOUND:
+        raise Http404("No Job matches the given query.")
+    if status == APPLY_ALREADY_APPLIED:
+        messages.info(request, "You already applied to this job.")
+    else:
+        messages.success(request, "Application submitted.")
+    return redirect(reverse("jobs_list"))
+
+
+@login_required
+@require_POST
+def bulk_apply_jobs(request):
+    """
+    Apply to every job in `job_ids` (repeated field or comma-separated) in
+    one statement. Answers JSON with a status per job when the client asks
+    for it, otherwise summarises in messages and returns to the jobs list.
+    """
+    wants_json = "application/json" in request.headers.get("Accept", "")
+    caregiver = request.caregiver
+    if not caregiver:
+        if wants_json:
+            return JsonResponse({"error": "Only caregivers can apply to jobs."}, status=403)
+        messages.error(request, "Only caregivers can apply to jobs.")
+        return redirect(reverse("jobs_list"))
+
+    try:
+        job_ids = [
+            int(value)
+            for raw in request.POST.getlist("job_ids")
+            for value in raw.split(",")
+            if value.strip()
+        ]
+    except ValueError:
+        job_ids = None
+    if not job_ids or len(job_ids) > settings.BULK_APPLY_MAX_JOBS:
+        error = f"Send between 1 and {settings.BULK_APPLY_MAX_JOBS} numeric job_ids."
+        if wants_json:
+            return JsonResponse({"error": error}, status=400)
+        messages.error(request, error)
+        return redirect(reverse("jobs_list"))
+
+    results = _apply_to_jobs(caregiver.caregiver_user_id, job_ids)
+    if wants_json:
+        return JsonResponse(
+            {"results": [{"job_id": job_id, "status": status} for job_id, status in results.items()]}
         )
-        exists = cursor.fetchone()
-        if exists:
-            messages.info(request, "You already applied to this job.")
-        else:
-            cursor.execute(
-                "INSERT INTO job_applications (caregiver_user_id, job_id, date_applied) "
-                "VALUES (%s, %s, CURRENT_DATE)",
-                [caregiver.caregiver_user_id, job_id],
-            )
-            messages.success(request, "Application submitted.")
+    applied = sum(status == APPLY_APPLIED for status in results.values())
+    messages.success(request, f"Applied to {applied} of {len(results)} selected jobs.")
     return redirect(reverse("jobs_list"))
 
 
+@login_required
+@require_POST
+def book_appointment(request):
+    """
+    Book a caregiver for the logged-in member. Overlap is checked by the
+    appointments_no_overlap exclusion constraint as the row is inserted, so
+    of two concurrent bookings for the same time only one can succeed; the
+    other gets 409.
+    """
+    member = request.member
+    if not member:
+        return JsonResponse({"error": "Only members can book appointments."}, status=403)
+    form = AppointmentForm(request.POST)
+    if not form.is_valid():
+        return JsonResponse({"errors": form.errors}, status=400)
+    data = form.cleaned_data
+    if not Caregiver.objects.filter(pk=data["caregiver_user_id"]).exists():
+        return JsonResponse({"error": "No such caregiver."}, status=404)
+
+    try:
+        with transaction.atomic():
+            appointment = Appointment.objects.create(
+                caregiver_id=data["caregiver_user_id"],
+                member_id=member.member_user_id,
+                appointment_date=data["appointment_date"],
+                appointment_time=data["appointment_time"],
+                work_hours=data["work_hours"],
+                status="Pending",
+            )
+    except IntegrityError as exc:
+        if not _is_overlap(exc):
+            raise
+        return JsonResponse({"error": APPOINTMENT_OVERLAP}, status=409)
+    return JsonResponse(_appointment_json(appointment), status=201)
+
+
+@login_required
+@require_POST
+def respond_appointment(request, appointment_id):
+    """
+    Accept or decline one of the logged-in caregiver's appointments. Moving a
+    declined appointment back to Accepted is checked against the constraint
+    again and answers 409 if the time has been booked since.
+    """
+    caregiver = request.caregiver
+    if not caregiver:
+        return JsonResponse({"error": "Only caregivers can respond to appointments."}, status=403)
+    status = request.POST.get("status")
+    if status not in ("Accepted", "Declined"):
+        return JsonResponse({"error": "status must be Accepted or Declined."}, status=400)
+
+    try:
+        with transaction.atomic():
+            updated = Appointment.objects.filter(
+                pk=appointment_id, caregiver_id=caregiver.caregiver_user_id
+            ).update(status=status)
+    except IntegrityError as exc:
+        if not _is_overlap(exc):
+            raise
+        return JsonResponse({"error": APPOINTMENT_OVERLAP}, status=409)
+    if not updated:
+        return JsonResponse({"error": "No such appointment."}, status=404)
+    # Accepted appointments are the experience signal of caregiver matching.
+    caregiver_changed(caregiver.caregiver_user_id)
+    return JsonResponse({"appointment_id": appointment_id, "status": status})
+
+
+@login_required
+def caregiver_bookings(request, caregiver_user_id):
+    """
+    The caregiver's booked (not declined) slots on `?date=YYYY-MM-DD`, read
+    through the exclusion constraint's GiST index.
+    """
+    try:
+        day = date.fromisoformat(request.GET.get("date", ""))
+    except ValueError:
+        return JsonResponse({"error": "date must be YYYY-MM-DD."}, status=400)
+    return JsonResponse(
+        {"caregiver_user_id": caregiver_user_id, "date": day, "bookings": _fetch_bookings(caregiver_user_id, day)}
+    )
+
+
 @require_POST
 def delete_user(request, pk):
     user = get_object_or_404(AppUser, pk=pk)
@@ -258,76 +482,241 @@ def delete_user(request, pk):
     return redirect(reverse("users"))
 
 
-def _get_member_for_request(request):
-    if not request.user.is_authenticated:
-        return None
+def sql_metrics(request):
+    """
+    Per-view SQL totals of this worker process since it started, and the
+    usage of its connection pools when DATABASE_POOL_MODE is "pool".
+    """
+    _require_staff_or_debug(request)
+    return JsonResponse({"views": view_totals.snapshot(), "pools": pool_status()})
+
+
+@login_required
+def export_csv(request, name):
+    """
+    Download one of the core.exports tables as CSV, staff only.
+    `?since=`/`?until=` (YYYY-MM-DD, inclusive) filter by its date and
+    `?gzip=1` compresses it on the fly.
+    """
+    if not request.user.is_staff:
+        raise Http404
+    export = EXPORTS.get(name)
+    if export is None:
+        raise Http404
+    try:
+        since, until = (
+            date.fromisoformat(request.GET[key]) if request.GET.get(key) else None for key in ("since", "until")
+        )
+    except ValueError:
+        return JsonResponse({"error": "since and until must be dates (YYYY-MM-DD)."}, status=400)
+    try:
+        return csv_response(request, export, since, until, compress=request.GET.get("gzip") in ("1", "true"))
+    except ExportError as error:
+        return JsonResponse({"error": str(error)}, status=400)
+
+
+REPORTS_NOT_BUILT = "Reports are not built yet; run `manage.py refresh_reports`."
+
+
+def reports_summary(request):
+    """
+    Accepted-appointment totals (queries.py 6.2, 6.3 and 7) from the
+    materialized reports; see `manage.py refresh_reports`.
+    """
+    _require_staff_or_debug(request)
     try:
-        app_user = AppUser.objects.get(email=request.user.username)
-        return app_user.member_profile
-    except (AppUser.DoesNotExist, Member.DoesNotExist):
-        return None
+        totals = fetch_accepted_totals()
+    except ProgrammingError:
+        totals = None
+    if totals is None:
+        return JsonResponse({"error": REPORTS_NOT_BUILT}, status=503)
+    return JsonResponse(totals)
 
 
-def _get_caregiver_for_request(request):
-    if not request.user.is_authenticated:
-        return None
+def report_above_average_caregivers(request):
+    """
+    Caregivers paid above the average accepted rate (queries.py 6.4), by id.
+    """
+    _require_staff_or_debug(request)
+    page_size = get_page_size(request)
+    after = decode_cursor(request.GET.get("cursor"), int)
     try:
-        app_user = AppUser.objects.get(email=request.user.username)
-        return app_user.caregiver_profile
-    except (AppUser.DoesNotExist, Caregiver.DoesNotExist):
-        return None
+        rows = fetch_above_average_caregivers(after[0] if after else 0, page_size + 1)
+    except ProgrammingError:
+        return JsonResponse({"error": REPORTS_NOT_BUILT}, status=503)
+    return _report_page(rows, page_size, "caregiver_user_id")
 
 
-def _fetch_applied_job_ids(caregiver_user_id):
-    with connection.cursor() as cursor:
-        cursor.execute(
-            "SELECT job_id FROM job_applications WHERE caregiver_user_id=%s",
-            [caregiver_user_id],
+def report_job_applicants(request):
+    """
+    Applicant count per job (queries.py 6.1), by job id; `?job_id=` for one job.
+    """
+    _require_staff_or_debug(request)
+    page_size = get_page_size(request)
+    after = decode_cursor(request.GET.get("cursor"), int)
+    job_id = request.GET.get("job_id")
+    if job_id is not None and not job_id.isdigit():
+        return JsonResponse({"error": "job_id must be a number."}, status=400)
+    try:
+        rows = fetch_job_applicant_counts(
+            after[0] if after else 0, page_size + 1, job_id=int(job_id) if job_id else None
         )
+    except ProgrammingError:
+        return JsonResponse({"error": REPORTS_NOT_BUILT}, status=503)
+    return _report_page(rows, page_size, "job_id")
+
+
+def _report_page(rows, page_size, key):
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor(rows[-1][key])
+    return JsonResponse({"results": rows, "next_cursor": next_cursor})
+
+
+def _require_staff_or_debug(request):
+    if not (settings.DEBUG or request.user.is_staff):
+        raise Http404
+
+
+APPLY_APPLIED = "applied"
+APPLY_ALREADY_APPLIED = "already_applied"
+APPLY_NOT_FOUND = "not_found"
+# jobs.job_id is a Postgres integer: larger ids can't exist and would fail
+# the ::integer[] cast in APPLY_TO_JOBS_SQL.
+MAX_JOB_ID = 2**31 - 1
+
+APPOINTMENT_OVERLAP = "The caregiver is already booked for that time."
+# SQLSTATE exclusion_violation, raised by appointments_no_overlap.
+EXCLUSION_VIOLATION = "23P01"
+
+# Raw SQL used by the views; kept at module level so `manage.py check_query_plans`
+# can EXPLAIN exactly what runs.
+APPLY_TO_JOBS_SQL = """
+    WITH requested AS (
+        SELECT DISTINCT unnest(%s::integer[]) AS job_id
+    ), existing AS (
+        SELECT j.job_id FROM jobs j JOIN requested r ON r.job_id = j.job_id
+    ), inserted AS (
+        INSERT INTO job_applications (caregiver_user_id, job_id, date_applied)
+        SELECT %s, job_id, CURRENT_DATE FROM existing
+        ON CONFLICT (caregiver_user_id, job_id) DO NOTHING
+        RETURNING job_id
+    )
+    SELECT r.job_id, e.job_id IS NOT NULL, i.job_id IS NOT NULL
+    FROM requested r
+    LEFT JOIN existing e ON e.job_id = r.job_id
+    LEFT JOIN inserted i ON i.job_id = r.job_id
+"""
+APPLIED_JOB_IDS_SQL = "SELECT job_id FROM job_applications WHERE caregiver_user_id = %s"
+APPLICANT_COUNTS_SQL = "SELECT job_id, COUNT(*) FROM job_applications WHERE job_id = ANY(%s) GROUP BY job_id"
+CAREGIVER_BOOKINGS_SQL = """
+    SELECT appointment_id, lower(slot), upper(slot), status
+    FROM appointments
+    WHERE int4range(caregiver_user_id, caregiver_user_id, '[]') && int4range(%s, %s, '[]')
+      AND slot && tsrange(%s::date, %s::date + 1)
+      AND status <> 'Declined'
+    ORDER BY lower(slot)
+"""
+APPLICANTS_PAGE_SQL = """
+    SELECT c.caregiver_user_id, u.given_name, u.surname, u.email, u.phone_number,
+           c.caregiving_type, ja.date_applied
+    FROM job_applications ja
+    JOIN caregivers c ON c.caregiver_user_id = ja.caregiver_user_id
+    JOIN users u ON u.user_id = c.caregiver_user_id
+    WHERE ja.job_id = %s AND ja.caregiver_user_id > %s
+    ORDER BY ja.caregiver_user_id
+    LIMIT %s
+"""
+
+
+def _apply_to_jobs(caregiver_user_id, job_ids):
+    """
+    Insert applications for `job_ids` in a single statement and return
+    {job_id: status}, in request order. ON CONFLICT makes repeat or
+    concurrent applications report "already applied" instead of failing.
+
+    A job deleted after the statement saw it fails the insert's foreign key
+    check; the statement is then run once more, which reports it as missing.
+    Ids outside the range of job_id are missing without asking the database.
+    """
+    valid_ids = [job_id for job_id in job_ids if 1 <= job_id <= MAX_JOB_ID]
+    rows = {}
+    for attempt in range(2 if valid_ids else 0):
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(APPLY_TO_JOBS_SQL, [valid_ids, caregiver_user_id])
+                rows = {job_id: (found, inserted) for job_id, found, inserted in cursor.fetchall()}
+            break
+        except IntegrityError:
+            if attempt:
+                raise
+    results = {}
+    for job_id in job_ids:
+        found, inserted = rows.get(job_id, (False, False))
+        if inserted:
+            results[job_id] = APPLY_APPLIED
+        elif found:
+            results[job_id] = APPLY_ALREADY_APPLIED
+        else:
+            results[job_id] = APPLY_NOT_FOUND
+    return results
+
+
+def _fetch_applied_job_ids(caregiver_user_id):
+    with read_connection().cursor() as cursor:
+        cursor.execute(APPLIED_JOB_IDS_SQL, [caregiver_user_id])
         return {row[0] for row in cursor.fetchall()}
 
 
-def _fetch_applicants_for_jobs(jobs):
-    if not jobs:
+def _fetch_applicant_counts(job_ids):
+    if not job_ids:
         return {}
-    job_ids = [job.job_id for job in jobs]
-    placeholders = ",".join(["%s"] * len(job_ids))
-    sql = f"""
-        SELECT ja.job_id, u.given_name, u.surname, u.email, u.phone_number, c.caregiving_type
-        FROM job_applications ja
-        JOIN caregivers c ON c.caregiver_user_id = ja.caregiver_user_id
-        JOIN users u ON u.user_id = c.caregiver_user_id
-        WHERE ja.job_id IN ({placeholders})
-    """
-    by_job = {job_id: [] for job_id in job_ids}
-    with connection.cursor() as cursor:
-        cursor.execute(sql, job_ids)
-        for job_id, given, surname, email, phone, caregiving_type in cursor.fetchall():
-            by_job[job_id].append(
-                {
-                    "name": f"{given} {surname}",
-                    "email": email,
-                    "phone": phone,
-                    "caregiving_type": caregiving_type,
-                }
-            )
-    return by_job
+    with read_connection().cursor() as cursor:
+        cursor.execute(APPLICANT_COUNTS_SQL, [job_ids])
+        return dict(cursor.fetchall())
 
 
-def _sync_user_id_sequence():
+def _fetch_applicants_page(job_id, after_caregiver_user_id, limit):
     with connection.cursor() as cursor:
-        cursor.execute(
-            "SELECT setval(pg_get_serial_sequence('users', 'user_id'), "
-            "(SELECT COALESCE(MAX(user_id), 0) FROM users));"
-        )
+        cursor.execute(APPLICANTS_PAGE_SQL, [job_id, after_caregiver_user_id, limit])
+        return [
+            {
+                "caregiver_user_id": caregiver_user_id,
+                "name": f"{given} {surname}",
+                "email": email,
+                "phone": phone,
+                "caregiving_type": caregiving_type,
+                "date_applied": date_applied,
+            }
+            for caregiver_user_id, given, surname, email, phone, caregiving_type, date_applied in cursor.fetchall()
+        ]
+
+
+def _fetch_bookings(caregiver_user_id, day):
+    with connection.cursor() as cursor:
+        cursor.execute(CAREGIVER_BOOKINGS_SQL, [caregiver_user_id, caregiver_user_id, day, day])
+        return [
+            {"appointment_id": appointment_id, "start": start, "end": end, "status": status}
+            for appointment_id, start, end, status in cursor.fetchall()
+        ]
 
 
-def _sync_job_id_sequence():
-    with connection.cursor() as cursor:
-        cursor.execute(
-            "SELECT setval(pg_get_serial_sequence('jobs', 'job_id'), "
-            "(SELECT COALESCE(MAX(job_id), 0) FROM jobs));"
-        )
+def _appointment_json(appointment):
+    return {
+        "appointment_id": appointment.appointment_id,
+        "caregiver_user_id": appointment.caregiver_id,
+        "member_user_id": appointment.member_id,
+        "appointment_date": appointment.appointment_date,
+        "appointment_time": appointment.appointment_time,
+        "work_hours": appointment.work_hours,
+        "status": appointment.status,
+    }
+
+
+def _is_overlap(exc):
+    return getattr(exc.__cause__, "pgcode", None) == EXCLUSION_VIOLATION
+
 
 from django.http import HttpResponse
 from pathlib import Path
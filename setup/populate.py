@@ -155,6 +155,16 @@ INSERT INTO appointments (caregiver_user_id, member_user_id, appointment_date, a
 (9, 20, '2025-11-08', '15:00:00', 4, 'Pending'),
 (10, 16, '2025-11-09', '11:00:00', 2, 'Accepted'),
 (1, 14, '2025-11-10', '09:00:00', 5, 'Accepted');
+
+
+-- ---------------------------
+-- 8. REPAIR ID SEQUENCES
+-- Rows above use explicit ids, so move each sequence past them once here;
+-- the app then relies on the SERIAL defaults (same as `manage.py sync_sequences`)
+-- ---------------------------
+SELECT setval(pg_get_serial_sequence('users', 'user_id'), COALESCE(MAX(user_id), 0) + 1, false) FROM users;
+SELECT setval(pg_get_serial_sequence('jobs', 'job_id'), COALESCE(MAX(job_id), 0) + 1, false) FROM jobs;
+SELECT setval(pg_get_serial_sequence('appointments', 'appointment_id'), COALESCE(MAX(appointment_id), 0) + 1, false) FROM appointments;
 """
 
 
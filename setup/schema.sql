@@ -0,0 +1,96 @@
+-- FULL SCHEMA WITH CASCADING DELETES
+-- Applied by setup/setup.py; the Django models map onto these tables (managed = False).
+DROP TABLE IF EXISTS appointments CASCADE;
+DROP TABLE IF EXISTS job_applications CASCADE;
+DROP TABLE IF EXISTS jobs CASCADE;
+DROP TABLE IF EXISTS addresses CASCADE;
+DROP TABLE IF EXISTS members CASCADE;
+DROP TABLE IF EXISTS caregivers CASCADE;
+DROP TABLE IF EXISTS users CASCADE;
+
+CREATE TABLE users (
+    user_id SERIAL PRIMARY KEY,
+    email VARCHAR(100) UNIQUE NOT NULL,
+    given_name VARCHAR(50) NOT NULL,
+    surname VARCHAR(50) NOT NULL,
+    city VARCHAR(50) NOT NULL,
+    phone_number VARCHAR(20),
+    profile_description TEXT,
+    password VARCHAR(100) NOT NULL,
+    -- Operations staff: CSV exports and SQL metrics
+    is_staff BOOLEAN NOT NULL DEFAULT FALSE,
+    -- Full-text search document for caregiver search (names weigh more than the description)
+    search_vector TSVECTOR GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', COALESCE(given_name, '') || ' ' || COALESCE(surname, '')), 'A') ||
+        setweight(to_tsvector('english', COALESCE(profile_description, '')), 'B')
+    ) STORED
+);
+
+CREATE TABLE caregivers (
+    caregiver_user_id INTEGER PRIMARY KEY,
+    photo VARCHAR(255),
+    gender VARCHAR(10),
+    caregiving_type VARCHAR(50),
+    hourly_rate DECIMAL(10, 2),
+    CONSTRAINT fk_caregiver_user FOREIGN KEY (caregiver_user_id) REFERENCES users (user_id) ON DELETE CASCADE
+);
+
+CREATE TABLE members (
+    member_user_id INTEGER PRIMARY KEY,
+    house_rules TEXT,
+    dependent_description TEXT,
+    CONSTRAINT fk_member_user FOREIGN KEY (member_user_id) REFERENCES users (user_id) ON DELETE CASCADE
+);
+
+CREATE TABLE addresses (
+    member_user_id INTEGER NOT NULL,
+    house_number VARCHAR(20),
+    street VARCHAR(100),
+    town VARCHAR(50),
+    CONSTRAINT fk_address_member FOREIGN KEY (member_user_id) REFERENCES members (member_user_id) ON DELETE CASCADE
+);
+
+CREATE TABLE jobs (
+    job_id SERIAL PRIMARY KEY,
+    member_user_id INTEGER NOT NULL,
+    required_caregiving_type VARCHAR(50),
+    other_requirements TEXT,
+    date_posted DATE DEFAULT CURRENT_DATE,
+    CONSTRAINT fk_job_member FOREIGN KEY (member_user_id) REFERENCES members (member_user_id) ON DELETE CASCADE
+);
+
+CREATE TABLE job_applications (
+    caregiver_user_id INTEGER NOT NULL,
+    job_id INTEGER NOT NULL,
+    date_applied DATE DEFAULT CURRENT_DATE,
+    PRIMARY KEY (caregiver_user_id, job_id),
+    CONSTRAINT fk_app_caregiver FOREIGN KEY (caregiver_user_id) REFERENCES caregivers (caregiver_user_id) ON DELETE CASCADE,
+    CONSTRAINT fk_app_job FOREIGN KEY (job_id) REFERENCES jobs (job_id) ON DELETE CASCADE
+);
+
+-- THE CRITICAL FIX IS HERE (ON DELETE CASCADE)
+CREATE TABLE appointments (
+    appointment_id SERIAL PRIMARY KEY,
+    caregiver_user_id INTEGER NOT NULL,
+    member_user_id INTEGER NOT NULL,
+    appointment_date DATE NOT NULL,
+    appointment_time TIME NOT NULL,
+    work_hours INTEGER,
+    status VARCHAR(20) DEFAULT 'Pending',
+    -- The booked time as a half-open range, so back-to-back bookings don't overlap
+    slot TSRANGE GENERATED ALWAYS AS (
+        tsrange(appointment_date + appointment_time,
+                appointment_date + appointment_time + make_interval(hours => COALESCE(work_hours, 1)), '[)')
+    ) STORED,
+    CONSTRAINT fk_appt_caregiver FOREIGN KEY (caregiver_user_id) REFERENCES caregivers (caregiver_user_id) ON DELETE CASCADE,
+    CONSTRAINT fk_appt_member FOREIGN KEY (member_user_id) REFERENCES members (member_user_id) ON DELETE CASCADE,
+    -- No caregiver is booked twice at once. The single-value int4range stands in
+    -- for "same caregiver" so the GiST index needs no btree_gist extension.
+    CONSTRAINT appointments_no_overlap EXCLUDE USING gist (
+        int4range(caregiver_user_id, caregiver_user_id, '[]') WITH &&,
+        slot WITH &&
+    ) WHERE (status <> 'Declined')
+);
+
+-- Secondary indexes are managed in core/indexes.py; create them with
+--   python manage.py apply_indexes
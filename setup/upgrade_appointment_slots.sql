@@ -0,0 +1,29 @@
+-- Adds the appointment time ranges and the no-double-booking constraint from
+-- schema.sql to a database created before them. Run once:
+--   psql "$DATABASE_URL" -f setup/upgrade_appointment_slots.sql
+BEGIN;
+
+ALTER TABLE appointments ADD COLUMN IF NOT EXISTS slot TSRANGE GENERATED ALWAYS AS (
+    tsrange(appointment_date + appointment_time,
+            appointment_date + appointment_time + make_interval(hours => COALESCE(work_hours, 1)), '[)')
+) STORED;
+
+-- Existing double bookings would make the constraint fail: keep the earliest
+-- booking of each overlap and decline the later ones.
+UPDATE appointments later
+SET status = 'Declined'
+WHERE later.status <> 'Declined'
+  AND EXISTS (
+      SELECT 1 FROM appointments earlier
+      WHERE earlier.caregiver_user_id = later.caregiver_user_id
+        AND earlier.appointment_id < later.appointment_id
+        AND earlier.status <> 'Declined'
+        AND earlier.slot && later.slot
+  );
+
+ALTER TABLE appointments ADD CONSTRAINT appointments_no_overlap EXCLUDE USING gist (
+    int4range(caregiver_user_id, caregiver_user_id, '[]') WITH &&,
+    slot WITH &&
+) WHERE (status <> 'Declined');
+
+COMMIT;
@@ -0,0 +1,28 @@
+-- Moves a database created before users.is_staff to the single user store:
+-- the site's users log in straight from `users`, so the auth_user rows that
+-- mirrored them are dropped. Staff flags move over first. Django superusers
+-- keep their auth_user row for /admin/, which they reach with a username that
+-- isn't a site user's email (that logs in as the site user). Run once:
+--   psql "$DATABASE_URL" -f setup/upgrade_single_user_store.sql
+-- Everyone logged in through the old mirror is logged out once.
+BEGIN;
+
+ALTER TABLE users ADD COLUMN IF NOT EXISTS is_staff BOOLEAN NOT NULL DEFAULT FALSE;
+
+UPDATE users u
+SET is_staff = TRUE
+FROM auth_user a
+WHERE a.username = u.email AND a.is_staff;
+
+CREATE TEMPORARY TABLE mirrored_auth_users ON COMMIT DROP AS
+SELECT a.id
+FROM auth_user a
+JOIN users u ON u.email = a.username
+WHERE NOT a.is_superuser;
+
+DELETE FROM auth_user_groups WHERE user_id IN (SELECT id FROM mirrored_auth_users);
+DELETE FROM auth_user_user_permissions WHERE user_id IN (SELECT id FROM mirrored_auth_users);
+DELETE FROM django_admin_log WHERE user_id IN (SELECT id FROM mirrored_auth_users);
+DELETE FROM auth_user WHERE id IN (SELECT id FROM mirrored_auth_users);
+
+COMMIT;